@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 import inspect
 from asgiref.sync import async_to_sync, sync_to_async
 from pydantic import BaseModel
 from agents import Runner
 
 from main.models import Project, Paper, PaperContentFormat
+from main.research_services import close_shared_client
 
 from .agents.compilation_agent import compilation_agent, FullLatexPaper
+from ..initial_research_agents.tool_cache import ToolCacheStats, tool_cache_scope
 
 import logging
 logger = logging.getLogger(__name__)
@@ -18,6 +20,7 @@ class CompilationOutput(BaseModel):
     paper_id: int
     applied_diffs: int
     changed: bool = False
+    tool_cache: Optional[ToolCacheStats] = None
 
 
 class CompilationServiceManager:
@@ -27,6 +30,12 @@ class CompilationServiceManager:
         self.runner = Runner()
 
     async def process(self, project_id: int) -> CompilationOutput:
+        with tool_cache_scope() as cache:
+            output = await self._process(project_id)
+        output.tool_cache = cache.stats()
+        return output
+
+    async def _process(self, project_id: int) -> CompilationOutput:
         logger.info(f"CompilationServiceManager.process(project_id={project_id})")
         project = await sync_to_async(Project.objects.get)(pk=project_id)
         paper, _ = await sync_to_async(Paper.objects.get_or_create)(project=project, defaults={'title': project.name, 'abstract': project.abstract})
@@ -59,7 +68,10 @@ class CompilationServiceManager:
 
     def run_for_project_sync(self, project_id: int) -> CompilationOutput:
         async def go():
-            return await self.process(project_id)
+            try:
+                return await self.process(project_id)
+            finally:
+                await close_shared_client()
         return async_to_sync(go)()
 
     async def _run(self, *args, **kwargs):
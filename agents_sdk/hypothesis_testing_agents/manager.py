@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 import asyncio
 import inspect
 from asgiref.sync import async_to_sync, sync_to_async
@@ -8,11 +8,14 @@ from pydantic import BaseModel
 from agents import Runner
 
 from main.models import Project, Hypothesis, HypothesisStatus as DjangoHypothesisStatus
+from main.research_services import close_shared_client
 
 from .agents.research_agent import research_agent, HypothesisResearch
 from .agents.sim_decider_agent import sim_decider_agent, SimulationDecision
 from .agents.simulation_agent import simulation_agent, SimulationResult
 from .agents.answer_agent import answer_agent, HypothesisAnswer
+from ..initial_research_agents.tool_cache import ToolCacheStats, tool_cache_scope
+from ..response_cache import AgentCachePolicy, RunnerCachePolicy, cached_runner, response_cache_scope
 from ..initial_research_agents.utilities import (
     list_hypotheses,
     update_hypothesis_status,
@@ -31,15 +34,30 @@ class HypothesisTestResult(BaseModel):
 class HypothesisTestingOutput(BaseModel):
     project_id: int
     results: List[HypothesisTestResult]
+    tool_cache: Optional[ToolCacheStats] = None
+
+
+# simulation_runner creates and runs experiments, so it is never cached.
+RESPONSE_CACHE_POLICY = RunnerCachePolicy(agents={
+    "hypothesis_researcher": AgentCachePolicy(depends_on=("literature",)),
+    "simulation_decider": AgentCachePolicy(),
+    "hypothesis_answer": AgentCachePolicy(),
+})
 
 
 class HypothesisTestingServiceManager:
     """Sequentially evaluates each hypothesis: research → decide simulation → (optionally) simulate → answer."""
 
     def __init__(self) -> None:
-        self.runner = Runner()
+        self.runner = cached_runner(Runner(), RESPONSE_CACHE_POLICY)
 
     async def process(self, project_id: int) -> HypothesisTestingOutput:
+        with tool_cache_scope() as cache, response_cache_scope(project_id):
+            output = await self._process(project_id)
+        output.tool_cache = cache.stats()
+        return output
+
+    async def _process(self, project_id: int) -> HypothesisTestingOutput:
         project = await sync_to_async(Project.objects.get)(pk=project_id)
         existing = await list_hypotheses(project.id)
 
@@ -62,7 +80,10 @@ class HypothesisTestingServiceManager:
 
     def run_for_project_sync(self, project_id: int) -> HypothesisTestingOutput:
         async def go():
-            return await self.process(project_id)
+            try:
+                return await self.process(project_id)
+            finally:
+                await close_shared_client()
         return async_to_sync(go)()
 
     async def _run(self, *args, **kwargs):
@@ -10,6 +10,7 @@ from pydantic import BaseModel, Field
 from agents import Runner
 
 from main.models import Project, Paper, Note
+from main.research_services import close_shared_client
 
 from .tools import (
     PaperModel,
@@ -24,6 +25,8 @@ from .agents.formalizer_agent import FormalizedAsk, formalizer_agent
 from .agents.literature_reviewer_agent import LiteratureReviewOutcome, literature_reviewer_agent
 from .agents.literature_summarizer_agent import ProjectFocusedSummary, literature_summarizer_agent
 from .agents.hypothesizer_agent import HypothesesOutput, hypothesizer_agent
+from .tool_cache import ToolCacheStats, invalidate_tools, tool_cache_scope
+from ..response_cache import AgentCachePolicy, RunnerCachePolicy, cached_runner, response_cache_scope
 
 import logging
 
@@ -36,6 +39,16 @@ class InitialResearchOutput(BaseModel):
     improved_abstract: Optional[str] = None
     literature_summary_note_id: Optional[int] = None
     created_hypotheses: List[HypothesisModel] = Field(default_factory=list)
+    tool_cache: Optional[ToolCacheStats] = None
+
+
+# The formalizer sees only the project text in its input, so its output holds until that changes.
+RESPONSE_CACHE_POLICY = RunnerCachePolicy(agents={
+    "formalizer": AgentCachePolicy(ttl=7 * 24 * 3600),
+    "literature_reviewer": AgentCachePolicy(depends_on=("literature",)),
+    "literature_summarizer": AgentCachePolicy(depends_on=("literature",)),
+    "hypothesizer": AgentCachePolicy(depends_on=("literature", "hypotheses", "experiments")),
+})
 
 
 class InitialResearchServiceManager:
@@ -49,9 +62,16 @@ class InitialResearchServiceManager:
     """
 
     def __init__(self) -> None:
-        self.runner = Runner()
+        self.runner = cached_runner(Runner(), RESPONSE_CACHE_POLICY)
 
     async def process(self, project_id: int) -> InitialResearchOutput:
+        # Read-only tool results are shared across this run's agents until a write invalidates them.
+        with tool_cache_scope() as cache, response_cache_scope(project_id):
+            output = await self._process(project_id)
+        output.tool_cache = cache.stats()
+        return output
+
+    async def _process(self, project_id: int) -> InitialResearchOutput:
         logger.info(f"InitialResearchServiceManager.process(project_id={project_id})")
         project = await sync_to_async(Project.objects.get)(pk=project_id)
         paper, _ = await sync_to_async(Paper.objects.get_or_create)(
@@ -111,6 +131,7 @@ Task: Improve and formalize the research ask and abstract.
             paper.abstract = improved_abstract
             logger.info(f"Updating paper abstract")
             await sync_to_async(paper.save)(update_fields=['abstract', 'updated_at'])
+            invalidate_tools(project.id, ["get_paper"])
             logger.info(f"paper abstract updated")
 
         # Step 2: Literature review (agent uses tools to search/link)
@@ -168,6 +189,7 @@ Task: Read accessible linked sources using your tools and produce a focused synt
         # Save as Note with a 4-digit id suffix in title
         note_title = f"Literature Summary {random.randint(1000, 9999)}"
         note = await sync_to_async(Note.objects.create)(project=project, title=note_title, body=summary.combined_summary)
+        invalidate_tools(project.id, ["list_notes"])
         logger.info(f"note created {note}")
         # Step 4: Hypothesis generation (agent can create hypotheses via tools)
         experiments_text_after = (
@@ -207,7 +229,11 @@ Task: Propose a small set of high-quality, testable hypotheses that would advanc
         """Sync wrapper for Django contexts."""
 
         async def go():
-            return await self.process(project_id)
+            # async_to_sync runs a fresh loop per call; close the research HTTP pool bound to it.
+            try:
+                return await self.process(project_id)
+            finally:
+                await close_shared_client()
 
         return async_to_sync(go)()
 
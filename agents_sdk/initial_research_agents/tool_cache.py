@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+
+
+T = TypeVar("T")
+
+TOOL_CACHE_ENABLED = os.getenv("AGENT_TOOL_CACHE", "true").lower() == "true"
+
+
+class ToolCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    hit_rate: float = 0.0
+    by_tool: Dict[str, Dict[str, int]] = Field(default_factory=dict, description="tool -> {hits, misses}")
+
+
+class ToolCache:
+    """Results of read-only tools for the duration of one manager run.
+
+    Entries are keyed by (tool, project_id, args). Mutating tools call `invalidate` for the
+    project and tools they affect; a project_id of None drops those tools for every project
+    (for writes addressed by note or hypothesis id). Loads that started before an invalidation
+    are returned to their caller but not stored, so a racing write is never masked.
+
+    Invalidation also happens from sync_to_async worker threads, hence the lock.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, Optional[int], Hashable], Any] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.invalidations = 0
+
+    async def get_or_load(self, tool: str, project_id: Optional[int], args: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        key = (tool, project_id, args)
+        with self._lock:
+            if key in self._entries:
+                self.hits[tool] = self.hits.get(tool, 0) + 1
+                return _copy(self._entries[key])
+            self.misses[tool] = self.misses.get(tool, 0) + 1
+            generation = self._generation
+        value = await load()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = value
+        return _copy(value)
+
+    def invalidate(self, project_id: Optional[int] = None, tools: Optional[Iterable[str]] = None) -> None:
+        tools = set(tools) if tools is not None else None
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in list(self._entries):
+                tool, key_project, _ = key
+                if tools is not None and tool not in tools:
+                    continue
+                if project_id is not None and key_project != project_id:
+                    continue
+                del self._entries[key]
+
+    def stats(self) -> ToolCacheStats:
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            by_tool = {
+                tool: {"hits": self.hits.get(tool, 0), "misses": self.misses.get(tool, 0)}
+                for tool in sorted(set(self.hits) | set(self.misses))
+            }
+            return ToolCacheStats(
+                hits=hits,
+                misses=misses,
+                invalidations=self.invalidations,
+                hit_rate=round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                by_tool=by_tool,
+            )
+
+
+def _copy(value: Any) -> Any:
+    # Callers may append to or sort a returned list; the cached one must stay intact.
+    return list(value) if isinstance(value, list) else value
+
+
+_current: contextvars.ContextVar[Optional[ToolCache]] = contextvars.ContextVar("agent_tool_cache", default=None)
+
+
+@contextmanager
+def tool_cache_scope() -> Iterator[ToolCache]:
+    """Cache read-only tool results for everything run inside the block (agents, tools, utilities)."""
+
+    cache = ToolCache()
+    token = _current.set(cache if TOOL_CACHE_ENABLED else None)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+
+
+async def cached_read(tool: str, project_id: Optional[int], args: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+    """`load()` through the current run's cache, or directly outside a tool_cache_scope."""
+
+    cache = _current.get()
+    if cache is None:
+        return await load()
+    return await cache.get_or_load(tool, project_id, args, load)
+
+
+def invalidate_tools(project_id: Optional[int] = None, tools: Optional[Iterable[str]] = None) -> None:
+    """Drop cached reads made stale by a write (no-op outside a tool_cache_scope)."""
+
+    cache = _current.get()
+    if cache is not None:
+        cache.invalidate(project_id, tools)
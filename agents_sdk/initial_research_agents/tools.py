@@ -7,16 +7,26 @@ from enum import Enum
 from agents import function_tool
 
 from main.models import Project, Paper, Literature, Citation, Simulation, Hypothesis, HypothesisStatus as DjangoHypothesisStatus, Note
-from main.research_services import HttpClient, search_all
+from main.research_services import search_all, get_default_cache, run_async, SearchFilters, PUBLICATION_TYPES, RankingWeights, provider_names
+from main.research_services.citations import harvest_citation_graph, rank_candidates
 from main.research_services.types import PaperRecord, asdict_record
+from main.utils.pdf_harvest import HARVEST_ON_LINK, harvest_in_background
+from main.utils.passages import project_literature_ids, refresh_passages, search_passages
+from main.utils.fulltext import KINDS as LIBRARY_KINDS, plain_snippet, search_library as search_library_index
+from main.utils.library_index import LITERATURE, NOTE, find_similar, library_search_async, literature_document, literature_record
 from asgiref.sync import sync_to_async
 
+from .tool_cache import cached_read, invalidate_tools
+
 import logging
 import subprocess
 import sys
 
 logger = logging.getLogger(__name__)
 
+# Relevance first; well-cited and recent work breaks near-ties.
+LITERATURE_RANKING = RankingWeights(citations=0.3, recency=0.2)
+
 # ==========================
 # Pydantic Models (Tool I/O)
 # ==========================
@@ -24,11 +34,21 @@ logger = logging.getLogger(__name__)
 class SearchInput(BaseModel):
     query: str = Field(description="Search query string")
     limit_per_source: int = Field(default=10, description="Max results per provider")
+    top_k: int = Field(default=10, description="Number of best papers to return after ranking")
+    year_from: Optional[int] = Field(default=None, description="Earliest publication year (inclusive)")
+    year_to: Optional[int] = Field(default=None, description="Latest publication year (inclusive)")
+    publication_types: List[str] = Field(
+        default_factory=list, description="Restrict to: article, preprint, review, conference, book"
+    )
+    providers: List[str] = Field(
+        default_factory=list, description="Only search these providers (e.g. openalex, arxiv); empty searches all of them"
+    )
 
 
 class SearchResultItem(BaseModel):
     source: str
     source_id: str
+    sources: List[str] = Field(default_factory=list, description="Providers that returned this paper")
     title: str
     abstract: str = ""
     year: Optional[int] = None
@@ -44,8 +64,21 @@ class SearchSourceResults(BaseModel):
     papers: List[SearchResultItem]
 
 
+class ProviderDiagnosticsItem(BaseModel):
+    provider: str
+    outcome: str = Field(description="ok, timeout, circuit_open, rate_limited, http_error, transport_error, parse_error or error")
+    seconds: float
+    records: int
+
+
 class SearchResults(BaseModel):
     results: List[SearchSourceResults]
+    unavailable: List[str] = Field(
+        default_factory=list, description="Providers that failed or timed out; results are partial when non-empty"
+    )
+    diagnostics: List[ProviderDiagnosticsItem] = Field(
+        default_factory=list, description="Per-provider outcome, latency and record count for this search"
+    )
 
 
 class LiteratureMeta(BaseModel):
@@ -62,6 +95,9 @@ class LiteratureReadRequest(BaseModel):
     literature_id: int
     max_chars: int = Field(default=6000, ge=100, le=200000)
     include_abstract: bool = True
+    query: Optional[str] = Field(
+        default=None, description="If set, return the passages most relevant to this query instead of the opening text"
+    )
 
 
 class LiteratureReadResult(BaseModel):
@@ -74,6 +110,74 @@ class LiteratureReadResult(BaseModel):
     url: Optional[str] = None
 
 
+class PassageSearchRequest(BaseModel):
+    project_id: int
+    query: str = Field(description="What to look for across the project's linked literature")
+    max_chars: int = Field(default=6000, ge=100, le=200000)
+
+
+class PassageHitModel(BaseModel):
+    literature_id: int
+    title: str
+    passage: int = Field(description="Passage number within the document")
+    text: str
+
+
+class SimilarLiteratureInput(BaseModel):
+    query: Optional[str] = Field(default=None, description="Free text (topic, claim, title) to match")
+    literature_id: Optional[int] = Field(default=None, description="Find entries similar to this library item instead")
+    project_id: Optional[int] = Field(default=None, description="If set, also match this project's notes")
+    k: int = Field(default=10, ge=1, le=100)
+
+
+class SimilarLiteratureItem(BaseModel):
+    kind: str = Field(description="literature or note")
+    id: int
+    title: str
+    score: float = Field(description="Cosine similarity, 0-1")
+    year: Optional[int] = None
+    snippet: str = ""
+
+
+class LibrarySearchInput(BaseModel):
+    query: str = Field(description="Keywords to look up in the local library")
+    project_id: Optional[int] = Field(default=None, description="Limit notes and papers to this project")
+    kinds: List[str] = Field(default_factory=list, description="Any of: literature, note, paper (default: all)")
+    limit: int = Field(default=20, ge=1, le=100)
+
+
+class LibraryHit(BaseModel):
+    kind: str
+    id: int
+    title: str
+    score: float
+    year: Optional[int] = None
+    snippet: str = ""
+
+
+class CitationGraphInput(BaseModel):
+    project_id: int
+    depth: int = Field(default=1, ge=1, le=2, description="Citation hops from the project's linked papers")
+    direction: str = Field(default="both", description="references, citations, or both")
+    top_k: int = Field(default=20, ge=1, le=100)
+    max_papers: int = Field(default=1000, ge=10, le=2000, description="Stop adding papers to the graph after this many")
+
+
+class GraphCandidateItem(SearchResultItem):
+    score: float = Field(description="Combined graph score, higher is better")
+    cocitations: int = Field(description="Papers citing this one together with a project paper")
+    coupling: int = Field(description="References shared with the project's papers")
+
+
+class CitationGraphResults(BaseModel):
+    seeds: int = Field(description="Project papers the graph was expanded from")
+    papers: int = Field(description="Papers in the harvested graph")
+    edges: int
+    candidates: List[GraphCandidateItem]
+    failed_fetches: int = 0
+    truncated: Optional[str] = Field(default=None, description="Budget that cut the harvest short (time budget, request budget, frontier cap), if any")
+
+
 class LinkLiteratureInput(BaseModel):
     project_id: int
     title: str
@@ -177,44 +281,45 @@ class CreateNoteInput(BaseModel):
 async def literature_search(input: SearchInput) -> SearchResults:
     """Search literature across providers (arXiv/OpenAlex/DOAJ/Semantic Scholar).
 
-    Returns structured results grouped by provider.
+    Returns the top_k papers, best first, fused across providers by reciprocal rank fusion with a
+    mild boost for citations and recency; the same paper found by several providers is returned once.
+    Papers already in the local library come back with source "library" and source_id set to their
+    literature id.
     """
     logger.info(f"literature_search(input={input})")
-    client = HttpClient()
-    try:
-        grouped = await search_all(
-            client,
-            query=input.query,
-            limit_per_source=input.limit_per_source,
-            mailto=None,
-            open_access_only=True,
-        )
-        # logger.info(f"literature_search(grouped={grouped})")
-    finally:
-        await client.aclose()
+    grouped = await run_async(
+        search_all,
+        query=input.query,
+        limit_per_source=input.limit_per_source,
+        mailto=None,
+        cache=get_default_cache(),
+        top_k=input.top_k,
+        ranking=LITERATURE_RANKING,
+        library=library_search_async,
+        providers=[p for p in input.providers if p in provider_names()] or None,
+        filters=SearchFilters(
+            open_access=True,
+            year_from=input.year_from,
+            year_to=input.year_to,
+            types=tuple(t for t in input.publication_types if t in PUBLICATION_TYPES),
+        ),
+    )
+    # logger.info(f"literature_search(grouped={grouped})")
     source_results: List[SearchSourceResults] = []
     for provider, records in (grouped or {}).items():
         items: List[SearchResultItem] = []
         for rec in records or []:
-            # rec is a PaperRecord dataclass
-            data = asdict_record(rec)
-            items.append(
-                SearchResultItem(
-                    source=data.get("source", provider),
-                    source_id=data.get("source_id", ""),
-                    title=data.get("title", ""),
-                    abstract=data.get("abstract", ""),
-                    year=data.get("year"),
-                    doi=data.get("doi"),
-                    arxiv_id=data.get("arxiv_id"),
-                    url=data.get("url"),
-                    open_access_pdf_url=data.get("open_access_pdf_url"),
-                    venue=data.get("venue"),
-                )
-            )
+            # Project only the fields the tool returns; authors, topics, etc. are never copied.
+            data = asdict_record(rec, fields=SearchResultItem.model_fields)
+            data["sources"] = data.get("sources") or []
+            items.append(SearchResultItem(**data))
         source_results.append(SearchSourceResults(provider=str(provider), papers=items))
     logger.info(f"literature_search(source_results={source_results})")
-    return SearchResults(results=source_results)
+    diagnostics = [
+        ProviderDiagnosticsItem(provider=provider, outcome=d.outcome, seconds=d.seconds, records=d.records)
+        for provider, d in getattr(grouped, "diagnostics", {}).items()
+    ]
+    return SearchResults(results=source_results, unavailable=sorted(getattr(grouped, "errors", {})), diagnostics=diagnostics)
 
 
 def _list_literature_sync(project_id: int) -> List[LiteratureMeta]:
@@ -245,7 +350,7 @@ def _list_literature_sync(project_id: int) -> List[LiteratureMeta]:
 async def list_literature(project_id: int) -> List[LiteratureMeta]:
     """List literature linked to the project's paper (via citations)."""
     logger.info(f"list_literature(project_id={project_id})")
-    return await sync_to_async(_list_literature_sync)(project_id)
+    return await cached_read("list_literature", project_id, (), lambda: sync_to_async(_list_literature_sync)(project_id))
 
 
 def _read_literature_sync(request: LiteratureReadRequest) -> LiteratureReadResult:
@@ -254,7 +359,16 @@ def _read_literature_sync(request: LiteratureReadRequest) -> LiteratureReadResul
     blocks: List[str] = []
     if request.include_abstract and lit.abstract:
         blocks.append(lit.abstract.strip())
-    if lit.full_text:
+    hits = []
+    if request.query and lit.full_text:
+        refresh_passages([lit.id])
+        # Spend the budget on the passages that match the query rather than the opening pages.
+        budget = max(0, request.max_chars - sum(len(b) + 2 for b in blocks))
+        hits = search_passages([lit.id], request.query, budget)
+        for hit in hits:
+            blocks.append(f"[passage {hit.ordinal}]\n{hit.text.strip()}")
+    if lit.full_text and not hits:
+        # No query, or nothing matched it: read from the start.
         blocks.append(lit.full_text.strip())
     content = ("\n\n".join(blocks)).strip() or ""
     if len(content) > request.max_chars:
@@ -276,11 +390,124 @@ def _read_literature_sync(request: LiteratureReadRequest) -> LiteratureReadResul
 
 @function_tool
 async def read_literature(request: LiteratureReadRequest) -> LiteratureReadResult:
-    """Read literature text up to a maximum number of characters (abstract + full text)."""
+    """Read literature text up to a maximum number of characters (abstract + full text).
+
+    Pass `query` to get the best-matching passages (BM25) within the budget instead of the first max_chars.
+    """
     logger.info(f"read_literature(request={request})")
     return await sync_to_async(_read_literature_sync)(request)
 
 
+def _search_literature_passages_sync(request: PassageSearchRequest) -> List[PassageHitModel]:
+    logger.info(f"search_literature_passages(request={request})")
+    ids = project_literature_ids(request.project_id)
+    refresh_passages(ids)
+    hits = search_passages(ids, request.query, request.max_chars)
+    titles = dict(Literature.objects.filter(pk__in={h.literature_id for h in hits}).values_list("id", "title"))
+    return [
+        PassageHitModel(literature_id=h.literature_id, title=titles.get(h.literature_id, ""), passage=h.ordinal, text=h.text.strip())
+        for h in hits
+    ]
+
+
+@function_tool
+async def search_literature_passages(request: PassageSearchRequest) -> List[PassageHitModel]:
+    """Find the passages most relevant to a query across all literature linked to the project (BM25)."""
+    return await sync_to_async(_search_literature_passages_sync)(request)
+
+
+def _find_similar_literature_sync(input: SimilarLiteratureInput) -> List[SimilarLiteratureItem]:
+    logger.info(f"find_similar_literature(input={input})")
+    text = input.query or ""
+    exclude = []
+    if input.literature_id is not None:
+        text = literature_document(Literature.objects.get(pk=input.literature_id))
+        exclude.append(f"{LITERATURE}:{input.literature_id}")
+    if not text.strip():
+        return []
+    kinds = (LITERATURE, NOTE) if input.project_id is not None else (LITERATURE,)
+    hits = find_similar(text, k=input.k, kinds=kinds, project_id=input.project_id, exclude=exclude)
+    papers = Literature.objects.in_bulk([h.id for h in hits if h.kind == LITERATURE])
+    notes = Note.objects.in_bulk([h.id for h in hits if h.kind == NOTE])
+    items: List[SimilarLiteratureItem] = []
+    for h in hits:
+        if h.kind == LITERATURE and h.id in papers:
+            lit = papers[h.id]
+            items.append(SimilarLiteratureItem(kind=h.kind, id=h.id, title=lit.title, score=round(h.score, 4), year=lit.year, snippet=lit.abstract[:300]))
+        elif h.kind == NOTE and h.id in notes:
+            note = notes[h.id]
+            items.append(SimilarLiteratureItem(kind=h.kind, id=h.id, title=note.title, score=round(h.score, 4), snippet=note.body[:300]))
+    return items
+
+
+@function_tool
+async def find_similar_literature(input: SimilarLiteratureInput) -> List[SimilarLiteratureItem]:
+    """Find library papers (and, with project_id, project notes) similar to a text or to a library item.
+
+    Answered from the local vector index without any provider calls; use before literature_search to
+    check what is already known.
+    """
+    return await sync_to_async(_find_similar_literature_sync)(input)
+
+
+def _search_library_sync(input: LibrarySearchInput) -> List[LibraryHit]:
+    logger.info(f"search_library(input={input})")
+    kinds = [k for k in input.kinds if k in LIBRARY_KINDS] or None
+    project_ids = [input.project_id] if input.project_id is not None else None
+    return [
+        LibraryHit(kind=r.kind, id=r.id, title=r.title, score=round(r.score, 4), year=r.year, snippet=plain_snippet(r.snippet))
+        for r in search_library_index(input.query, kinds=kinds, project_ids=project_ids, limit=input.limit)
+    ]
+
+
+@function_tool
+async def search_library(input: LibrarySearchInput) -> List[LibraryHit]:
+    """Keyword search (full-text index) over saved literature, including extracted full text, and project notes/papers.
+
+    Use for exact terms, names, identifiers or phrases; use find_similar_literature for topical similarity.
+    """
+    return await sync_to_async(_search_library_sync)(input)
+
+
+def _project_seed_records(project_id: int) -> List[PaperRecord]:
+    return [literature_record(lit) for lit in Literature.objects.filter(pk__in=project_literature_ids(project_id))]
+
+
+@function_tool
+async def rank_related_literature(input: CitationGraphInput) -> CitationGraphResults:
+    """Expand the project's linked papers through their references and citing works, and rank what it finds.
+
+    Candidates are scored by PageRank personalized to the project's papers, co-citation and
+    bibliographic coupling. One call covers the neighbourhood that many keyword searches would;
+    link the best candidates with link_literature.
+    """
+    logger.info(f"rank_related_literature(input={input})")
+    seeds = await sync_to_async(_project_seed_records)(input.project_id)
+    if not seeds:
+        return CitationGraphResults(seeds=0, papers=0, edges=0, candidates=[])
+    graph = await run_async(
+        harvest_citation_graph,
+        seeds,
+        depth=input.depth,
+        direction=input.direction if input.direction in ("references", "citations") else "both",
+        max_papers=input.max_papers,
+        cache=get_default_cache(),
+    )
+    candidates: List[GraphCandidateItem] = []
+    for cand in rank_candidates(graph, top_k=input.top_k):
+        data = asdict_record(cand.record, fields=SearchResultItem.model_fields)
+        data["sources"] = data.get("sources") or []
+        candidates.append(GraphCandidateItem(**data, score=round(cand.score, 4), cocitations=cand.cocitations, coupling=cand.coupling))
+    return CitationGraphResults(
+        seeds=len(graph.seeds),
+        papers=len(graph),
+        edges=graph.edge_count,
+        candidates=candidates,
+        failed_fetches=sum(graph.errors.values()),
+        truncated=graph.truncated,
+    )
+
+
 def _link_literature_sync(input: LinkLiteratureInput) -> LinkLiteratureResult:
     """Create or link a Literature entry to the project's paper via a Citation.
 
@@ -309,11 +536,22 @@ def _link_literature_sync(input: LinkLiteratureInput) -> LinkLiteratureResult:
             arxiv_id=input.arxiv_id or "",
             url=input.url or (input.open_access_pdf_url or ""),
             abstract=input.abstract or "",
+            open_access_pdf_url=input.open_access_pdf_url or "",
+            is_open_access=bool(input.open_access_pdf_url),
         )
         created = True
+    elif input.open_access_pdf_url and not literature.open_access_pdf_url:
+        literature.open_access_pdf_url = input.open_access_pdf_url
+        literature.is_open_access = True
+        literature.save(update_fields=["open_access_pdf_url", "is_open_access", "updated_at"])
+
+    if HARVEST_ON_LINK and literature.open_access_pdf_url and not literature.full_text:
+        # Fetch and extract the PDF so read_literature can return more than the abstract.
+        harvest_in_background([literature.id])
 
     last_order = paper.citations.order_by('-order').first().order if paper.citations.exists() else 0
     cit = Citation.objects.create(paper=paper, literature=literature, order=last_order + 1)
+    invalidate_tools(input.project_id, ["list_literature", "get_paper"])
     logger.info(f"link_literature(input={input}) - cit={cit}")
     return LinkLiteratureResult(literature_id=literature.id, created=created, citation_id=cit.id)
 
@@ -339,7 +577,7 @@ def _get_paper_sync(project_id: int) -> PaperModel:
 
 @function_tool
 async def get_paper(project_id: int) -> PaperModel:
-    return await sync_to_async(_get_paper_sync)(project_id)
+    return await cached_read("get_paper", project_id, (), lambda: sync_to_async(_get_paper_sync)(project_id))
 
 
 def _list_experiments_sync(project_id: int) -> List[ExperimentSummary]:
@@ -350,7 +588,7 @@ def _list_experiments_sync(project_id: int) -> List[ExperimentSummary]:
 @function_tool
 async def list_experiments(project_id: int) -> List[ExperimentSummary]:
     """List simulations/experiments for a project."""
-    return await sync_to_async(_list_experiments_sync)(project_id)
+    return await cached_read("list_experiments", project_id, (), lambda: sync_to_async(_list_experiments_sync)(project_id))
 
 
 def _get_experiment_sync(experiment_id: int) -> ExperimentDetail:
@@ -371,6 +609,7 @@ def _create_experiment_sync(input: CreateExperimentInput) -> ExperimentDetail:
     project = Project.objects.get(pk=input.project_id)
     params_dict = {item.name: item.value for item in (input.parameters or [])} if input.parameters else None
     sim = Simulation.objects.create(project=project, name=input.name, description=input.description or "", code=input.code, language=input.language, parameters=params_dict)
+    invalidate_tools(input.project_id, ["list_experiments"])
     return _get_experiment_sync(sim.id)
 
 
@@ -388,6 +627,7 @@ def _run_experiment_sync(experiment_id: int) -> ExperimentDetail:
         sim.run(timeout_seconds=30)
     finally:
         sim.refresh_from_db()
+        invalidate_tools(sim.project_id, ["list_experiments"])
     return _get_experiment_sync(sim.id)
 
 
@@ -405,7 +645,7 @@ def _list_hypotheses_sync(project_id: int) -> List[HypothesisModel]:
 @function_tool
 async def list_hypotheses(project_id: int) -> List[HypothesisModel]:
     """List hypotheses for a project."""
-    return await sync_to_async(_list_hypotheses_sync)(project_id)
+    return await cached_read("list_hypotheses", project_id, (), lambda: sync_to_async(_list_hypotheses_sync)(project_id))
 
 
 def _create_hypothesis_sync(input: CreateHypothesisInput) -> HypothesisModel:
@@ -416,6 +656,7 @@ def _create_hypothesis_sync(input: CreateHypothesisInput) -> HypothesisModel:
         h.save(update_fields=['paper'])
     except Paper.DoesNotExist:
         pass
+    invalidate_tools(input.project_id, ["list_hypotheses"])
     return HypothesisModel(id=h.id, title=h.title, statement=h.statement, status=HypothesisStatus(h.status))
 
 
@@ -429,6 +670,7 @@ def _update_hypothesis_status_sync(input: UpdateHypothesisStatusInput) -> Hypoth
     h = Hypothesis.objects.get(pk=input.hypothesis_id)
     h.status = input.status.value
     h.save(update_fields=['status', 'updated_at'])
+    invalidate_tools(h.project_id, ["list_hypotheses"])
     return HypothesisModel(id=h.id, title=h.title, statement=h.statement, status=HypothesisStatus(h.status))
 
 
@@ -441,6 +683,7 @@ async def update_hypothesis_status(input: UpdateHypothesisStatusInput) -> Hypoth
 def _create_note_sync(input: CreateNoteInput) -> NoteModel:
     project = Project.objects.get(pk=input.project_id)
     note = Note.objects.create(project=project, title=input.title, body=input.body)
+    invalidate_tools(input.project_id, ["list_notes"])
     return NoteModel(id=note.id, title=note.title, body=note.body)
 
 
@@ -464,7 +707,7 @@ def _list_notes_sync(project_id: int) -> List[NoteModel]:
 @function_tool
 async def list_notes(project_id: int) -> List[NoteModel]:
     """List notes for a project."""
-    return await sync_to_async(_list_notes_sync)(project_id)
+    return await cached_read("list_notes", project_id, (), lambda: sync_to_async(_list_notes_sync)(project_id))
 
 
 def _update_note_sync(note_id: int, title: str, body: str) -> NoteModel:
@@ -472,6 +715,7 @@ def _update_note_sync(note_id: int, title: str, body: str) -> NoteModel:
     note.title = title
     note.body = body
     note.save(update_fields=['title', 'body', 'updated_at'])
+    invalidate_tools(note.project_id, ["list_notes"])
     return NoteModel(id=note.id, title=note.title, body=note.body)
 
 
@@ -4,6 +4,8 @@ from typing import List, Optional
 
 from asgiref.sync import sync_to_async
 
+from .tool_cache import cached_read
+
 # Import shared Pydantic models and internal sync helpers from tools
 from .tools import (
     LiteratureMeta,
@@ -42,7 +44,7 @@ from .tools import (
 # ==========================
 
 async def list_literature(project_id: int) -> List[LiteratureMeta]:
-    return await sync_to_async(_list_literature_sync)(project_id)
+    return await cached_read("list_literature", project_id, (), lambda: sync_to_async(_list_literature_sync)(project_id))
 
 
 async def read_literature(request: LiteratureReadRequest) -> LiteratureReadResult:
@@ -54,11 +56,11 @@ async def link_literature(input: LinkLiteratureInput) -> LinkLiteratureResult:
 
 
 async def get_paper(project_id: int) -> PaperModel:
-    return await sync_to_async(_get_paper_sync)(project_id)
+    return await cached_read("get_paper", project_id, (), lambda: sync_to_async(_get_paper_sync)(project_id))
 
 
 async def list_experiments(project_id: int) -> List[ExperimentSummary]:
-    return await sync_to_async(_list_experiments_sync)(project_id)
+    return await cached_read("list_experiments", project_id, (), lambda: sync_to_async(_list_experiments_sync)(project_id))
 
 
 async def get_experiment(experiment_id: int) -> ExperimentDetail:
@@ -89,7 +91,7 @@ async def run_experiment(experiment_id: int) -> ExperimentDetail:
 
 
 async def list_hypotheses(project_id: int) -> List[HypothesisModel]:
-    return await sync_to_async(_list_hypotheses_sync)(project_id)
+    return await cached_read("list_hypotheses", project_id, (), lambda: sync_to_async(_list_hypotheses_sync)(project_id))
 
 
 async def create_hypothesis(input: CreateHypothesisInput) -> HypothesisModel:
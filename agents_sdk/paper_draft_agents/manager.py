@@ -7,8 +7,10 @@ from pydantic import BaseModel
 from agents import Runner
 
 from main.models import Project, Paper
+from main.research_services import close_shared_client
 
 from .agents.drafting_agent import DraftSections, drafting_agent
+from ..initial_research_agents.tool_cache import ToolCacheStats, tool_cache_scope
 
 
 class PaperDraftOutput(BaseModel):
@@ -16,6 +18,7 @@ class PaperDraftOutput(BaseModel):
     paper_id: int
     updated_abstract: Optional[str] = None
     literature_review_added: bool = False
+    tool_cache: Optional[ToolCacheStats] = None
 
 
 class PaperDraftServiceManager:
@@ -25,6 +28,12 @@ class PaperDraftServiceManager:
         self.runner = Runner()
 
     async def process(self, project_id: int) -> PaperDraftOutput:
+        with tool_cache_scope() as cache:
+            output = await self._process(project_id)
+        output.tool_cache = cache.stats()
+        return output
+
+    async def _process(self, project_id: int) -> PaperDraftOutput:
         project = await sync_to_async(Project.objects.get)(pk=project_id)
         paper, _ = await sync_to_async(Paper.objects.get_or_create)(project=project, defaults={'title': project.name, 'abstract': project.abstract})
 
@@ -50,7 +59,10 @@ class PaperDraftServiceManager:
 
     def run_for_project_sync(self, project_id: int) -> PaperDraftOutput:
         async def go():
-            return await self.process(project_id)
+            try:
+                return await self.process(project_id)
+            finally:
+                await close_shared_client()
         return async_to_sync(go)()
 
     async def _run(self, *args, **kwargs):
@@ -7,6 +7,10 @@ from ...initial_research_agents.tools import (
     literature_search,
     list_literature,
     read_literature,
+    search_literature_passages,
+    find_similar_literature,
+    search_library,
+    rank_related_literature,
     link_literature,
     get_paper,
     list_experiments,
@@ -36,8 +40,12 @@ Operating principles:
 Project context tools and their intended use:
 - get_paper(project_id): Retrieve the project's paper metadata and LaTeX/raw content. Use to understand current draft status and title/abstract.
 - list_literature(project_id): List literature already linked to the paper. Use to ground discussion in existing citations.
-- read_literature({literature_id, max_chars, include_abstract}): Read text for a linked item. Use before citing claims or summarizing a work.
-- literature_search({query, limit_per_source}): Search providers (arXiv, OpenAlex, DOAJ, Semantic Scholar). Use to discover candidate works; then optionally link selected items.
+- read_literature({literature_id, max_chars, include_abstract, query?}): Read text for a linked item. Use before citing claims or summarizing a work. Pass query to get only the most relevant passages.
+- search_literature_passages({project_id, query, max_chars}): Find the most relevant passages across all linked literature. Use to locate evidence for a specific claim.
+- find_similar_literature({query? | literature_id?, project_id?, k}): Find papers already in the library (and this project's notes) that are similar to a topic or to a given item. Fast and local; try it before searching providers.
+- literature_search({query, limit_per_source}): Search providers (arXiv, OpenAlex, DOAJ, Semantic Scholar). Use to discover candidate works; then optionally link selected items. Results with source "library" are already in the database (source_id is the literature id).
+- search_library({query, project_id?, kinds?, limit?}): Keyword search over saved literature (titles, abstracts, full text) and this project's notes and paper. Use for exact terms, author names or identifiers.
+- rank_related_literature({project_id, depth?, direction?, top_k?}): Expand the project's linked papers through references and citing works and rank the neighbourhood. Prefer this over repeated keyword searches once a few core papers are linked.
 - link_literature({project_id, title, authors?, year?, doi?, arxiv_id?, url?, open_access_pdf_url?, abstract?, venue?}): Link a selected source to the project's paper. Use after confirming relevance and deduplication intent.
 
 - list_hypotheses(project_id): Review project hypotheses. Use to reference status and plan testing.
@@ -85,6 +93,10 @@ chat_agent = Agent(
         literature_search,
         list_literature,
         read_literature,
+        search_literature_passages,
+        find_similar_literature,
+        search_library,
+        rank_related_literature,
         link_literature,
         get_paper,
         list_experiments,
@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 from agents import Runner
 
 from main.models import Project
+from main.research_services import close_shared_client
 
 from .agents.chat_agent import chat_agent, ChatAssistantReply
 
@@ -67,7 +68,10 @@ class ProjectChatServiceManager:
 
     def run_for_project_sync(self, project_id: int, turns: List[ChatTurn]) -> ChatResponse:
         async def go():
-            return await self.process(project_id, turns)
+            try:
+                return await self.process(project_id, turns)
+            finally:
+                await close_shared_client()
 
         return async_to_sync(go)()
 
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import contextvars
+import dataclasses
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from pydantic import BaseModel
+
+from main.research_services.cache import CacheBackend, SqliteCacheBackend
+
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("AGENT_RESPONSE_CACHE", "false").lower() == "true"
+DEFAULT_RESPONSE_CACHE_PATH = os.getenv(
+    "AGENT_RESPONSE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "forgelore", "agent_cache.sqlite3"),
+)
+DEFAULT_RESPONSE_TTL_SECONDS = float(os.getenv("AGENT_RESPONSE_CACHE_TTL_SECONDS", "86400"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("AGENT_RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+DEFAULT_MAX_BYTES = int(os.getenv("AGENT_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Tools whose calls leave the database untouched; a run that called anything else is not stored.
+READ_ONLY_TOOLS: FrozenSet[str] = frozenset({
+    "literature_search",
+    "list_literature",
+    "read_literature",
+    "search_literature_passages",
+    "find_similar_literature",
+    "search_library",
+    "rank_related_literature",
+    "get_paper",
+    "list_experiments",
+    "get_experiment",
+    "list_hypotheses",
+    "get_note",
+    "list_notes",
+})
+
+# Project state an agent's tools may read; see project_fingerprint.
+STATE_PARTS: FrozenSet[str] = frozenset({"paper", "literature", "hypotheses", "notes", "experiments"})
+
+
+@dataclass(frozen=True)
+class AgentCachePolicy:
+    """Caching for one agent: how long an output stays valid and which project state it depends on.
+
+    Everything the agent sees in its input is already part of the key; `depends_on` adds the
+    state its tools read (e.g. the linked literature for an agent that calls read_literature).
+    """
+
+    ttl: float = DEFAULT_RESPONSE_TTL_SECONDS
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class RunnerCachePolicy:
+    """Per-manager policy: agent name -> AgentCachePolicy. Agents not listed always run."""
+
+    agents: Dict[str, AgentCachePolicy] = field(default_factory=dict)
+
+
+@dataclass
+class CachedRunResult:
+    """Stands in for a RunResult on a cache hit; managers only read `final_output`."""
+
+    final_output: Any
+    age: float
+    last_response_id: Optional[str] = None
+    new_items: List[Any] = field(default_factory=list)
+    cached: bool = True
+
+
+def project_fingerprint(project_id: int, parts: Tuple[str, ...]) -> str:
+    """Hash of the requested parts of a project's state (ids and update times, not full text)."""
+
+    from main.models import Citation, Hypothesis, Note, Paper, PaperSection, Simulation
+
+    state: Dict[str, Any] = {"project": project_id}
+    for part in sorted(set(parts)):
+        if part == "paper":
+            state[part] = [
+                list(Paper.objects.filter(project_id=project_id).values_list("id", "updated_at")),
+                list(PaperSection.objects.filter(paper__project_id=project_id).order_by("id").values_list("id", "updated_at")),
+            ]
+        elif part == "literature":
+            state[part] = list(
+                Citation.objects.filter(paper__project_id=project_id)
+                .order_by("order", "id")
+                .values_list("literature_id", "literature__updated_at")
+            )
+        elif part == "hypotheses":
+            state[part] = list(Hypothesis.objects.filter(project_id=project_id).order_by("id").values_list("id", "updated_at"))
+        elif part == "notes":
+            state[part] = list(Note.objects.filter(project_id=project_id).order_by("id").values_list("id", "updated_at"))
+        elif part == "experiments":
+            state[part] = list(Simulation.objects.filter(project_id=project_id).order_by("id").values_list("id", "updated_at"))
+        else:
+            raise ValueError(f"Unknown project state part {part!r}; expected one of {sorted(STATE_PARTS)}")
+    return hashlib.sha256(json.dumps(state, default=str).encode("utf-8")).hexdigest()
+
+
+_project: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("agent_response_cache_project", default=None)
+
+
+@contextmanager
+def response_cache_scope(project_id: int) -> Iterator[None]:
+    """Tell cached runners which project the agents in this block work on."""
+
+    token = _project.set(project_id)
+    try:
+        yield
+    finally:
+        _project.reset(token)
+
+
+def _describe(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {k: _describe(v) for k, v in dataclasses.asdict(value).items()}
+    if isinstance(value, dict):
+        return {str(k): _describe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_describe(v) for v in value]
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return getattr(value, "model", None) or repr(value)
+
+
+def _instructions_digest(instructions: Any) -> Optional[str]:
+    if instructions is None:
+        return ""
+    if isinstance(instructions, str):
+        return hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+    # Dynamic instructions depend on run state the key cannot see.
+    return None
+
+
+def agent_cache_key(agent: Any, input: Any, run_options: Dict[str, Any], state: str = "") -> Optional[str]:
+    """Key over everything that shapes the output, or None when the agent cannot be cached."""
+
+    instructions = _instructions_digest(getattr(agent, "instructions", None))
+    if instructions is None:
+        return None
+    output_type = getattr(agent, "output_type", None)
+    payload = {
+        "agent": agent.name,
+        "instructions": instructions,
+        "model": _describe(getattr(agent, "model", None)),
+        "model_settings": _describe(getattr(agent, "model_settings", None)),
+        "output_type": _describe(output_type),
+        "output_schema": output_type.model_json_schema() if isinstance(output_type, type) and issubclass(output_type, BaseModel) else None,
+        "tools": sorted(getattr(t, "name", repr(t)) for t in getattr(agent, "tools", None) or []),
+        "handoffs": sorted(getattr(h, "name", repr(h)) for h in getattr(agent, "handoffs", None) or []),
+        "input": _describe(input),
+        "options": _describe(run_options),
+        "state": state,
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"agent:{agent.name}:{digest}"
+
+
+def called_tools(result: Any) -> List[str]:
+    """Names of the tools a run called, from its new_items transcript."""
+
+    names: List[str] = []
+    for item in getattr(result, "new_items", None) or []:
+        if getattr(item, "type", None) != "tool_call_item":
+            continue
+        raw = getattr(item, "raw_item", None)
+        name = getattr(raw, "name", None) or (raw.get("name") if isinstance(raw, dict) else None)
+        names.append(name or "?")
+    return names
+
+
+class CachedRunner:
+    """A Runner whose agent outputs are stored on disk, keyed by their content.
+
+    Only agents named in `policy` are cached. The key covers the agent definition (name,
+    instructions, model, settings, output schema, tools), the input, the run options and a
+    fingerprint of the project state the agent's tools read. A run is stored only when every
+    tool it called is read-only, so a hit never skips a write (linking literature, creating
+    hypotheses, ...).
+    """
+
+    def __init__(
+        self,
+        runner: Any,
+        policy: RunnerCachePolicy,
+        backend: Optional[CacheBackend] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.runner = runner
+        self.policy = policy
+        self.backend = backend if backend is not None else get_default_backend()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    async def _call(self, agent: Any, input: Any, **kwargs: Any) -> Any:
+        result = self.runner.run(agent, input, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run(self, agent: Any, input: Any, **kwargs: Any) -> Any:
+        policy = self.policy.agents.get(getattr(agent, "name", ""))
+        output_type = getattr(agent, "output_type", None)
+        if policy is None or (output_type is not None and not (isinstance(output_type, type) and issubclass(output_type, BaseModel))):
+            return await self._call(agent, input, **kwargs)
+
+        state = ""
+        project_id = _project.get()
+        if policy.depends_on:
+            if project_id is None:
+                return await self._call(agent, input, **kwargs)
+            state = await sync_to_async(project_fingerprint)(project_id, policy.depends_on)
+        key = agent_cache_key(agent, input, kwargs, state)
+        if key is None:
+            return await self._call(agent, input, **kwargs)
+
+        item = await sync_to_async(self.backend.get, thread_sensitive=False)(key)
+        if item is not None:
+            value, created_at = item
+            age = time.time() - created_at
+            if age <= policy.ttl:
+                try:
+                    data = json.loads(value)
+                    output = output_type.model_validate(data) if output_type is not None else data
+                except Exception:
+                    output = None
+                if output is not None:
+                    self.hits += 1
+                    logger.info(f"agent response cache hit: {agent.name} (age {age:.0f}s)")
+                    return CachedRunResult(final_output=output, age=age)
+            await sync_to_async(self.backend.delete, thread_sensitive=False)(key)
+
+        self.misses += 1
+        result = await self._call(agent, input, **kwargs)
+        writes = [name for name in called_tools(result) if name not in READ_ONLY_TOOLS]
+        if writes:
+            logger.info(f"agent response cache: not storing {agent.name}, it called {', '.join(sorted(set(writes)))}")
+            return result
+        output = getattr(result, "final_output", None)
+        value = output.model_dump_json() if isinstance(output, BaseModel) else json.dumps(output)
+        await sync_to_async(self._store, thread_sensitive=False)(key, value.encode("utf-8"))
+        return result
+
+    def _store(self, key: str, value: bytes) -> None:
+        self.backend.set(key, value, time.time())
+        self.backend.evict(self.max_entries, self.max_bytes)
+
+
+_default_backend: Optional[CacheBackend] = None
+
+
+def get_default_backend() -> CacheBackend:
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = SqliteCacheBackend(DEFAULT_RESPONSE_CACHE_PATH)
+    return _default_backend
+
+
+def cached_runner(runner: Any, policy: RunnerCachePolicy) -> Any:
+    """`runner` wrapped in a CachedRunner when AGENT_RESPONSE_CACHE=true, else unchanged."""
+
+    if not RESPONSE_CACHE_ENABLED:
+        return runner
+    return CachedRunner(runner, policy)
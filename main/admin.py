@@ -1,9 +1,48 @@
+from functools import reduce
+from operator import or_
+
 from django.contrib import admin
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
 from .models import (
     Project, Paper, PaperSection, Literature, Citation,
     Hypothesis, Note, Simulation, Attachment,
     AutomationJob, AutomationTask
 )
+from .utils.fulltext import matching_ids
+
+
+# Admin changelists page through at most this many full-text matches.
+ADMIN_FULLTEXT_LIMIT = 1000
+
+
+class FullTextSearchMixin:
+    """Answer the changelist search box from the full-text index instead of icontains scans.
+
+    Only `fulltext_fields` are covered by the index; the other search_fields (relation lookups
+    such as project__name) are still matched with icontains and the two results are unioned.
+    Falls back to search_fields when the database has no full-text backend.
+    """
+
+    fulltext_kind = None
+    fulltext_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        ids = matching_ids(self.fulltext_kind, search_term, limit=ADMIN_FULLTEXT_LIMIT) if search_term.strip() else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        others = [f for f in self.get_search_fields(request) if f not in self.fulltext_fields]
+        if not others:
+            return queryset.filter(pk__in=ids), False
+        # Same semantics as ModelAdmin: every term has to match one of the fields.
+        terms = Q()
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            terms &= reduce(or_, (Q(**{f"{field}__icontains": bit}) for field in others))
+        may_have_duplicates = any(lookup_spawns_duplicates(self.opts, field) for field in others)
+        return queryset.filter(Q(pk__in=ids) | terms), may_have_duplicates
 
 
 @admin.register(Project)
@@ -16,7 +55,9 @@ class ProjectAdmin(admin.ModelAdmin):
 
 
 @admin.register(Paper)
-class PaperAdmin(admin.ModelAdmin):
+class PaperAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    fulltext_kind = 'paper'
+    fulltext_fields = ('title', 'abstract', 'content_raw')
     list_display = ('title', 'project', 'content_format', 'created_at', 'updated_at')
     list_filter = ('content_format', 'created_at', 'updated_at')
     search_fields = ('title', 'abstract', 'content_raw', 'project__name')
@@ -34,7 +75,9 @@ class PaperSectionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Literature)
-class LiteratureAdmin(admin.ModelAdmin):
+class LiteratureAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    fulltext_kind = 'literature'
+    fulltext_fields = ('title', 'authors', 'journal_or_publisher', 'doi', 'arxiv_id', 'abstract', 'tags')
     list_display = ('title', 'authors', 'year', 'source_type', 'is_open_access', 'created_at')
     list_filter = ('source_type', 'is_open_access', 'year', 'created_at', 'published_date')
     search_fields = ('title', 'authors', 'journal_or_publisher', 'doi', 'arxiv_id', 'abstract', 'tags')
@@ -61,7 +104,9 @@ class HypothesisAdmin(admin.ModelAdmin):
 
 
 @admin.register(Note)
-class NoteAdmin(admin.ModelAdmin):
+class NoteAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    fulltext_kind = 'note'
+    fulltext_fields = ('title', 'body')
     list_display = ('title', 'project', 'pinned', 'updated_at', 'created_at')
     list_filter = ('pinned', 'created_at', 'updated_at')
     search_fields = ('title', 'body', 'project__name')
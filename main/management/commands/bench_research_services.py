@@ -0,0 +1,83 @@
+import asyncio
+import json
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand
+
+from main.research_services.bench import bench_memory, bench_parsers, bench_search_all, unthrottled
+from main.research_services.cache import MemoryCacheBackend, SearchCache
+from main.research_services.simulator import LatencyProfile, ProviderProfile, SimulatedTransport
+
+
+class Command(BaseCommand):
+    help = "Benchmark research_services offline against simulated providers (throughput, latency, parser CPU, memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="search_all calls in the load test")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=20, help="limit_per_source")
+        parser.add_argument("--latency-ms", type=float, default=80.0, help="Median simulated provider latency")
+        parser.add_argument("--p99-ms", type=float, default=400.0, help="99th percentile simulated latency")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Chance of a 503 per request")
+        parser.add_argument("--burst-every", type=int, default=0, help="Open a 429 burst every N requests per host")
+        parser.add_argument("--burst-length", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--cache", action="store_true", help="Use an in-memory SearchCache")
+        parser.add_argument("--merge", action="store_true")
+        parser.add_argument("--respect-rate-limits", action="store_true", help="Keep the real per-host pacing")
+        parser.add_argument("--only", choices=["load", "parsers", "memory"], help="Run a single benchmark")
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+
+    def handle(self, *args, **opts):
+        profile = ProviderProfile(
+            latency=LatencyProfile(median=opts["latency_ms"] / 1000, p99=opts["p99_ms"] / 1000),
+            error_rate=opts["error_rate"],
+            burst_every=opts["burst_every"],
+            burst_length=opts["burst_length"],
+            retry_after=0.2,
+        )
+
+        def transport():
+            return SimulatedTransport(default_profile=profile, seed=opts["seed"])
+
+        async def run():
+            out = {}
+            if opts["only"] in (None, "load"):
+                cache = SearchCache(MemoryCacheBackend()) if opts["cache"] else None
+                out["load"] = asdict(
+                    await bench_search_all(
+                        transport(), requests=opts["requests"], concurrency=opts["concurrency"],
+                        limit_per_source=opts["limit"], cache=cache, merge=opts["merge"],
+                    )
+                )
+            if opts["only"] in (None, "parsers"):
+                out["parsers"] = [asdict(r) for r in await bench_parsers()]
+            if opts["only"] in (None, "memory"):
+                out["memory"] = asdict(await bench_memory(transport(), concurrency=opts["concurrency"]))
+            return out
+
+        if opts["respect_rate_limits"]:
+            results = asyncio.run(run())
+        else:
+            with unthrottled():
+                results = asyncio.run(run())
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        if "load" in results:
+            r = results["load"]
+            self.stdout.write(
+                f"search_all: {r['requests']} calls @ {r['concurrency']} concurrent in {r['seconds']:.2f}s "
+                f"-> {r['throughput']:.1f}/s, p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms, "
+                f"{r['records']} records, {r['partial']} partial, "
+                f"{r['issued']} provider requests issued, {r['coalesced']} coalesced"
+            )
+        for r in results.get("parsers", []):
+            self.stdout.write(f"parser {r['provider']:<16} {r['cpu_us_per_record']:8.1f} us CPU/record ({r['records']} records)")
+        if "memory" in results:
+            r = results["memory"]
+            self.stdout.write(
+                f"memory: peak {r['peak_bytes'] / 1024:.0f} KiB for {r['records']} records "
+                f"@ {r['concurrency']} concurrent -> {r['bytes_per_record']:.0f} B/record"
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from main.utils.library_index import get_library_index, rebuild_library_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the local vector index over Literature titles/abstracts and Note bodies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ivf-lists", type=int, default=None, help="Partition into this many IVF lists (default: only for large libraries)")
+        parser.add_argument("--compact", action="store_true", help="Drop replaced/deleted rows instead of re-embedding everything")
+
+    def handle(self, *args, **opts):
+        index = get_library_index()
+        if opts["compact"]:
+            index.compact()
+            if opts["ivf_lists"]:
+                index.build_ivf(opts["ivf_lists"])
+            self.stdout.write(self.style.SUCCESS(f"Compacted library index to {len(index)} vectors"))
+            return
+        total = rebuild_library_index(ivf_lists=opts["ivf_lists"], index=index)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} library items into {index.root}"))
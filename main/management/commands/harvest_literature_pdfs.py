@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from main.research_services.pdfstore import DEFAULT_DOWNLOAD_CONCURRENCY, PdfStore
+from main.utils.pdf_harvest import harvest_literature, harvest_queryset
+
+
+class Command(BaseCommand):
+    help = "Download open access PDFs for Literature entries and fill in full_text (backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Literature ids (default: every entry missing full text)")
+        parser.add_argument("--force", action="store_true", help="Re-extract entries that already have full text")
+        parser.add_argument("--batch-size", type=int, default=200, help="Entries per download/extract/update round")
+        parser.add_argument("--concurrency", type=int, default=DEFAULT_DOWNLOAD_CONCURRENCY, help="Parallel downloads")
+        parser.add_argument("--workers", type=int, default=None, help="Extraction processes (0 = in-process)")
+        parser.add_argument("--store", default=None, help="PDF store directory (default: PDF_STORE_PATH)")
+
+    def handle(self, *args, **opts):
+        store = PdfStore(opts["store"]) if opts["store"] else PdfStore()
+        ids = opts["ids"] or list(harvest_queryset(opts["force"]).order_by("pk").values_list("pk", flat=True))
+        batch = max(1, opts["batch_size"])
+        totals = {"candidates": 0, "downloaded": 0, "reused": 0, "extracted": 0, "failed": 0}
+        for start in range(0, len(ids), batch):
+            report = harvest_literature(
+                ids[start:start + batch],
+                force=opts["force"],
+                max_concurrency=opts["concurrency"],
+                workers=opts["workers"],
+                store=store,
+            )
+            for key in totals:
+                totals[key] += getattr(report, key)
+            self.stdout.write(f"{min(start + batch, len(ids))}/{len(ids)}: {report}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Harvested {totals['extracted']} of {totals['candidates']} entries "
+            f"({totals['downloaded']} downloaded, {totals['reused']} already stored, {totals['failed']} without text)"
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from main.research_services.localcorpus import (
+    DEFAULT_LOCAL_CORPUS_PATH,
+    DUMP_FORMATS,
+    INGEST_BATCH_SIZE,
+    LocalCorpus,
+    iter_dump_lines,
+)
+
+
+class Command(BaseCommand):
+    help = "Load OpenAlex works or arXiv metadata snapshot files (JSONL, optionally .gz) into the local search corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Snapshot files, e.g. openalex/data/works/*/part_*.gz")
+        parser.add_argument("--format", choices=sorted(DUMP_FORMATS), required=True, help="Snapshot format of the files")
+        parser.add_argument("--path", default=DEFAULT_LOCAL_CORPUS_PATH, help="Corpus database (default: LOCAL_CORPUS_PATH)")
+        parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Records written per transaction")
+        parser.add_argument("--no-optimize", action="store_true", help="Skip merging the FTS index after loading")
+
+    def handle(self, *args, **opts):
+        corpus = LocalCorpus(opts["path"])
+        try:
+            for path in opts["paths"]:
+                report = corpus.ingest(
+                    iter_dump_lines(path),
+                    opts["format"],
+                    batch_size=opts["batch_size"],
+                    progress=lambda r: self.stdout.write(f"  {r.lines} lines, {r.stored} stored", ending="\r"),
+                )
+                self.stdout.write(f"{path}: {report.lines} lines, {report.stored} stored, {report.skipped} skipped")
+            if not opts["no_optimize"]:
+                corpus.optimize()
+            self.stdout.write(self.style.SUCCESS(f"Local corpus at {corpus.path} holds {len(corpus)} papers"))
+        finally:
+            corpus.close()
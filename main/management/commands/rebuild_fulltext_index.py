@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.utils.fulltext import fulltext_backend, rebuild_fulltext_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text index over Literature, Notes and Papers (SQLite FTS5 or PostgreSQL tsvector)."
+
+    def handle(self, *args, **opts):
+        if fulltext_backend() is None:
+            self.stdout.write(self.style.WARNING("This database has no full-text backend; admin search uses icontains."))
+            return
+        total = rebuild_fulltext_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} rows"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Literature, LiteraturePassage
+from main.utils.passages import refresh_passages
+
+
+class Command(BaseCommand):
+    help = "Chunk Literature full text into passages where they are missing or out of date (e.g. rows saved before passages existed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Documents checked per query")
+
+    def handle(self, *args, **opts):
+        ids = set(Literature.objects.exclude(full_text="").values_list("id", flat=True))
+        ids |= set(LiteraturePassage.objects.values_list("literature_id", flat=True).distinct())
+        ids = sorted(ids)
+        total = 0
+        for i in range(0, len(ids), opts["batch_size"]):
+            total += refresh_passages(ids[i:i + opts["batch_size"]])
+        self.stdout.write(self.style.SUCCESS(f"Checked {len(ids)} documents, built {total} passages"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_automationjob_automationtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='literature',
+            name='open_access_pdf_url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='literature',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the harvested PDF in the content-addressed store', max_length=64),
+        ),
+    ]
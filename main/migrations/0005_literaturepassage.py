@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_literature_open_access_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiteraturePassage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveIntegerField()),
+                ('char_start', models.PositiveIntegerField()),
+                ('char_end', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('length', models.PositiveIntegerField(help_text='Number of indexed tokens')),
+                ('terms', models.JSONField(default=dict, help_text='term -> frequency within this passage')),
+                ('source_hash', models.CharField(help_text='SHA-1 of the full_text this passage was cut from', max_length=40)),
+                ('literature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passages', to='main.literature')),
+            ],
+            options={
+                'ordering': ['literature', 'ordinal'],
+                'unique_together': {('literature', 'ordinal')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+# Self-contained copy of the schema and document layout as of this migration; later changes to
+# main.utils.fulltext must not alter what it does (rebuild_fulltext_index reindexes live data).
+TABLE = "main_fulltext"
+KIND_SLOTS = 4
+KIND_CODES = {"Literature": 1, "Note": 2, "Paper": 3}
+MAX_BODY_CHARS = 200_000
+BATCH_SIZE = 500
+
+CREATE_SQL = {
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "title, meta, body, tokenize='porter unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+        "id bigint PRIMARY KEY, title text NOT NULL, meta text NOT NULL, body text NOT NULL, "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', title), 'A') || "
+        "setweight(to_tsvector('english', meta), 'B') || "
+        "setweight(to_tsvector('english', body), 'C')) STORED)",
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING GIN (document)",
+    ],
+}
+DROP_SQL = f"DROP TABLE IF EXISTS {TABLE}"
+INSERT_SQL = {
+    "sqlite": f"INSERT INTO {TABLE} (rowid, title, meta, body) VALUES (%s, %s, %s, %s)",
+    "postgresql": f"INSERT INTO {TABLE} (id, title, meta, body) VALUES (%s, %s, %s, %s)",
+}
+
+
+def _row(model_name, obj):
+    if model_name == "Literature":
+        meta = " ".join(p for p in (obj.authors, obj.journal_or_publisher, obj.doi, obj.arxiv_id, obj.tags) if p)
+        body = "\n\n".join(p for p in (obj.abstract, obj.full_text) if p)
+    elif model_name == "Note":
+        meta, body = "", obj.body or ""
+    else:
+        meta, body = "", "\n\n".join(p for p in (obj.abstract, obj.content_raw) if p)
+    return (obj.pk * KIND_SLOTS + KIND_CODES[model_name], obj.title or "", meta, body[:MAX_BODY_CHARS])
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in CREATE_SQL:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+        for sql in CREATE_SQL[connection.vendor]:
+            cursor.execute(sql)
+        for model_name in KIND_CODES:
+            model = apps.get_model("main", model_name)
+            batch = []
+            for obj in model.objects.using(connection.alias).order_by("pk").iterator(chunk_size=BATCH_SIZE):
+                batch.append(_row(model_name, obj))
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(INSERT_SQL[connection.vendor], batch)
+                    batch = []
+            if batch:
+                cursor.executemany(INSERT_SQL[connection.vendor], batch)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_literaturepassage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
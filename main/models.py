@@ -110,6 +110,8 @@ class Literature(TimestampedModel):
     full_text = models.TextField(blank=True)
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
     is_open_access = models.BooleanField(default=False)
+    open_access_pdf_url = models.URLField(max_length=1000, blank=True)
+    pdf_sha256 = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the harvested PDF in the content-addressed store")
 
     def __str__(self) -> str:
         return self.title
@@ -143,6 +145,29 @@ class Citation(TimestampedModel):
         return f"Citation: {self.paper.title} -> {self.literature.title}"
 
 
+class LiteraturePassage(models.Model):
+    """A chunk of Literature.full_text with its term frequencies, used for BM25 passage retrieval.
+
+    Rebuilt automatically whenever full_text changes (see main.signals).
+    """
+
+    literature = models.ForeignKey(Literature, on_delete=models.CASCADE, related_name="passages")
+    ordinal = models.PositiveIntegerField()
+    char_start = models.PositiveIntegerField()
+    char_end = models.PositiveIntegerField()
+    text = models.TextField()
+    length = models.PositiveIntegerField(help_text="Number of indexed tokens")
+    terms = models.JSONField(default=dict, help_text="term -> frequency within this passage")
+    source_hash = models.CharField(max_length=40, help_text="SHA-1 of the full_text this passage was cut from")
+
+    class Meta:
+        ordering = ["literature", "ordinal"]
+        unique_together = ("literature", "ordinal")
+
+    def __str__(self) -> str:
+        return f"{self.literature.title} [{self.ordinal}]"
+
+
 class HypothesisStatus(models.TextChoices):
     PROPOSED = "proposed", "Proposed"
     SUPPORTED = "supported", "Supported"
@@ -1,25 +1,132 @@
-from .types import PaperRecord, Author, asdict_record
-from .http import HttpClient, with_client
-from .arxiv import search_arxiv, fetch_arxiv_by_id
-from .doaj import search_doaj
-from .semanticscholar import search_semantic_scholar, fetch_semantic_scholar_by_id
-from .openalex import search_openalex, fetch_openalex_by_id
-from .aggregate import search_all
+from .types import PaperRecord, Author, asdict_record, record_from_dict
+from .http import HttpClient, UnsafeUrlError, with_client, get_shared_client, close_shared_client, run_in_background, schedule_in_background, run_sync, run_async
+from .arxiv import search_arxiv, search_arxiv_page, search_arxiv_stream, fetch_arxiv_by_id, fetch_many_arxiv
+from .doaj import search_doaj, search_doaj_page
+from .semanticscholar import (
+    search_semantic_scholar,
+    fetch_semantic_scholar_by_id,
+    fetch_many_semantic_scholar,
+    fetch_semantic_scholar_references,
+    fetch_semantic_scholar_citations,
+)
+from .openalex import (
+    search_openalex,
+    search_openalex_page,
+    fetch_openalex_by_id,
+    fetch_many_openalex,
+    fetch_many_openalex_by_doi,
+    fetch_openalex_references,
+    fetch_openalex_citations,
+    work_to_record,
+)
+from .paging import iter_openalex, iter_arxiv, iter_doaj
+from .ratelimit import LocalQueueTimeout, RatePolicy, RATE_POLICIES, register_rate_policy
+from .retry import RetryPolicy, RetryEvent, DEFAULT_RETRY_POLICY
+from .cache import SearchCache, SqliteCacheBackend, MemoryCacheBackend, get_default_cache
+from .merge import drop_seen, fuse_records, identity_keys, merge_records
+from .ranking import RankingWeights, rank_records
+from .filters import SearchFilters, PUBLICATION_TYPES
+from .batch import fetch_many
+from .singleflight import SingleFlight, get_singleflight
+from .metrics import MetricsRegistry, ProviderDiagnostics, get_registry
+from .resilience import CircuitBreaker, CircuitOpenError, GroupedResults, PROVIDER_DEADLINES, HEDGE_AFTER, get_breaker
+from .tokens import STOPWORDS, tokenize
+from .vectors import HashingEmbedder, VectorIndex
+from .localcorpus import LocalCorpus, IngestReport, get_local_corpus, iter_dump_lines, search_local
+from .citations import CitationGraph, GraphWeights, GraphCandidate, harvest_citation_graph, rank_candidates
+from .providers import Provider, FAST_PROVIDERS, register_provider, unregister_provider, get_provider, provider_names
+from .aggregate import search_all, search_all_stream
 
 __all__ = [
     "Author",
     "PaperRecord",
     "asdict_record",
+    "record_from_dict",
     "HttpClient",
+    "UnsafeUrlError",
     "with_client",
+    "get_shared_client",
+    "close_shared_client",
+    "run_in_background",
+    "schedule_in_background",
+    "run_sync",
+    "run_async",
     "search_arxiv",
+    "search_arxiv_page",
+    "search_arxiv_stream",
     "fetch_arxiv_by_id",
+    "fetch_many_arxiv",
     "search_doaj",
+    "search_doaj_page",
     "search_semantic_scholar",
     "fetch_semantic_scholar_by_id",
+    "fetch_many_semantic_scholar",
+    "fetch_semantic_scholar_references",
+    "fetch_semantic_scholar_citations",
     "search_openalex",
+    "search_openalex_page",
     "fetch_openalex_by_id",
+    "fetch_many_openalex",
+    "fetch_many_openalex_by_doi",
+    "fetch_openalex_references",
+    "fetch_openalex_citations",
+    "work_to_record",
+    "fetch_many",
+    "iter_openalex",
+    "iter_arxiv",
+    "iter_doaj",
+    "RatePolicy",
+    "RATE_POLICIES",
+    "register_rate_policy",
+    "RetryPolicy",
+    "RetryEvent",
+    "DEFAULT_RETRY_POLICY",
+    "SearchCache",
+    "SqliteCacheBackend",
+    "MemoryCacheBackend",
+    "get_default_cache",
+    "merge_records",
+    "fuse_records",
+    "identity_keys",
+    "drop_seen",
+    "RankingWeights",
+    "rank_records",
+    "SearchFilters",
+    "PUBLICATION_TYPES",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "LocalQueueTimeout",
+    "GroupedResults",
+    "PROVIDER_DEADLINES",
+    "HEDGE_AFTER",
+    "get_breaker",
+    "MetricsRegistry",
+    "ProviderDiagnostics",
+    "get_registry",
+    "STOPWORDS",
+    "tokenize",
+    "HashingEmbedder",
+    "VectorIndex",
+    "LocalCorpus",
+    "IngestReport",
+    "get_local_corpus",
+    "iter_dump_lines",
+    "search_local",
+    "CitationGraph",
+    "GraphWeights",
+    "GraphCandidate",
+    "harvest_citation_graph",
+    "rank_candidates",
+    "SingleFlight",
+    "get_singleflight",
+    "Provider",
+    "FAST_PROVIDERS",
+    "register_provider",
+    "unregister_provider",
+    "get_provider",
+    "provider_names",
     "search_all",
+    "search_all_stream",
 ]
 
 
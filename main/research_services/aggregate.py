@@ -1,14 +1,152 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, List, Optional
+import concurrent.futures
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from .http import HttpClient
+from .http import HttpClient, get_shared_client, schedule_in_background
 from .types import PaperRecord
-from .arxiv import search_arxiv
-from .doaj import search_doaj
-from .semanticscholar import search_semantic_scholar
-from .openalex import search_openalex
+from .cache import SearchCache
+from .merge import merge_records
+from .filters import SearchFilters, combine_filters
+from .ranking import DEFAULT_WEIGHTS, RankingWeights, rank_records
+from .singleflight import coalesced
+from .resilience import HEDGE_AFTER, PROVIDER_DEADLINES, GroupedResults, describe_error, error_outcome, get_breaker, guarded
+from .metrics import CallStats, ProviderDiagnostics, record_provider_call, track_calls, untrack_calls
+from .providers import Provider, limited, resolve_providers
+
+
+logger = logging.getLogger(__name__)
+
+ProviderCall = Callable[[HttpClient], Awaitable[List[PaperRecord]]]
+# (query, limit, filters) -> records already held locally; see search_all's `library`.
+LibrarySearch = Callable[[str, int, Optional[SearchFilters]], Awaitable[List[PaperRecord]]]
+
+# Answered from disk faster than a cache lookup round-trip is worth; never stored in SearchCache.
+_UNCACHED_PROVIDERS = frozenset({"local"})
+
+# Keeps background refreshes referenced until they finish.
+_refresh_tasks: Set[concurrent.futures.Future] = set()
+
+
+async def _refresh(cache: SearchCache, provider: str, key: str, call: ProviderCall) -> None:
+    # Runs on the background loop: the caller's loop and client may be gone by now.
+    # Its requests happen after the caller's diagnostics were reported, so do not attribute them.
+    track_calls(None)
+    try:
+        records = await coalesced(key, lambda: call(get_shared_client()), label=provider)
+        await asyncio.to_thread(cache.set, key, records)
+    except Exception as exc:
+        logger.debug(f"search cache refresh failed for {key}: {exc}")
+
+
+async def _cached_call(
+    client: HttpClient,
+    cache: Optional[SearchCache],
+    provider: str,
+    key: str,
+    call: ProviderCall,
+) -> List[PaperRecord]:
+    # Identical concurrent requests (same provider, query, limit and filters) share one call.
+    if cache is None or provider in _UNCACHED_PROVIDERS:
+        return await coalesced(key, lambda: call(client), label=provider)
+    # SQLite reads and writes block; keep them off the event loop.
+    hit = await asyncio.to_thread(cache.get, provider, key)
+    if hit is not None:
+        if not hit.fresh:
+            future = schedule_in_background(_refresh(cache, provider, key, call))
+            _refresh_tasks.add(future)
+            future.add_done_callback(_refresh_tasks.discard)
+        return hit.records
+    records = await coalesced(key, lambda: call(client), label=provider)
+    await asyncio.to_thread(cache.set, key, records)
+    return records
+
+
+async def _observed(
+    provider: str, run: Awaitable[List[PaperRecord]], diagnostics: Dict[str, ProviderDiagnostics]
+) -> List[PaperRecord]:
+    """Await one provider's call, recording its metrics and a diagnostics entry either way."""
+
+    stats = CallStats()
+    token = track_calls(stats)
+    started = time.monotonic()
+    records: List[PaperRecord] = []
+    error: Optional[BaseException] = None
+    outcome = "cancelled"
+    try:
+        records = await run
+        outcome = "ok"
+        return records
+    except Exception as exc:
+        error, outcome = exc, error_outcome(exc)
+        raise
+    finally:
+        untrack_calls(token)
+        seconds = time.monotonic() - started
+        record_provider_call(provider, outcome, seconds, len(records))
+        diagnostics[provider] = ProviderDiagnostics(
+            outcome=outcome,
+            seconds=round(seconds, 4),
+            records=len(records),
+            requests=stats.requests,
+            retries=stats.retries,
+            rate_limited=stats.rate_limited,
+            error=describe_error(error) if error is not None else None,
+        )
+
+
+def _provider_calls(
+    query: str,
+    limit_per_source: int,
+    mailto: Optional[str],
+    filters: Optional[SearchFilters] = None,
+    providers: Optional[Iterable[str]] = None,
+) -> Dict[str, ProviderCall]:
+    def bind(provider: Provider) -> ProviderCall:
+        return lambda c: limited(provider, lambda: provider.search(c, query, limit_per_source, filters, mailto))
+
+    return {provider.name: bind(provider) for provider in resolve_providers(providers)}
+
+
+def _cache_key(provider: str, query: str, limit_per_source: int, filters: Optional[SearchFilters]) -> str:
+    return SearchCache.make_key(provider, query, limit_per_source, filters.cache_key() if filters else None)
+
+
+def _resilient_calls(
+    calls: Dict[str, ProviderCall],
+    deadlines: Optional[Dict[str, float]],
+    hedge_after: Optional[Dict[str, float]],
+    breakers: bool,
+) -> Dict[str, ProviderCall]:
+    deadlines = PROVIDER_DEADLINES if deadlines is None else deadlines
+    hedge_after = HEDGE_AFTER if hedge_after is None else hedge_after
+
+    def wrap(provider: str, call: ProviderCall) -> ProviderCall:
+        return lambda c: guarded(
+            provider,
+            lambda: call(c),
+            deadline=deadlines.get(provider),
+            hedge_after=hedge_after.get(provider),
+            breaker=get_breaker(provider) if breakers else None,
+        )
+
+    return {provider: wrap(provider, call) for provider, call in calls.items()}
+
+
+async def _library_stage(
+    library: Optional[LibrarySearch], query: str, limit: int, filters: Optional[SearchFilters], errors: Dict[str, str]
+) -> List[PaperRecord]:
+    if library is None:
+        return []
+    try:
+        return await library(query, limit, filters)
+    except Exception as exc:
+        logger.warning(f"search_all library stage failed: {describe_error(exc)}")
+        errors["library"] = describe_error(exc)
+        return []
 
 
 async def search_all(
@@ -17,34 +155,136 @@ async def search_all(
     limit_per_source: int = 20,
     mailto: Optional[str] = None,
     open_access_only: bool = False,
-) -> Dict[str, List[PaperRecord]]:
+    cache: Optional[SearchCache] = None,
+    merge: bool = False,
+    filters: Optional[SearchFilters] = None,
+    top_k: Optional[int] = None,
+    ranking: RankingWeights = DEFAULT_WEIGHTS,
+    deadlines: Optional[Dict[str, float]] = None,
+    hedge_after: Optional[Dict[str, float]] = None,
+    breakers: bool = True,
+    library: Optional[LibrarySearch] = None,
+    library_sufficient: Optional[int] = None,
+    providers: Optional[Iterable[str]] = None,
+) -> GroupedResults:
     """Run parallel searches across sources and return a dict keyed by source.
 
-    If open_access_only is True, only include records that have an open_access_pdf_url.
+    `filters` (open access, year range, publication types, has-abstract) are pushed down to each
+    provider as native query parameters; records are re-checked afterwards only to catch what a
+    provider cannot express. open_access_only=True is shorthand for SearchFilters(open_access=True).
+    If a cache is given, fresh entries are served without a request and stale entries are
+    served immediately while a background refresh repopulates them.
+    If merge is True, duplicates across providers are fused and returned under a single "merged" key.
+    If top_k is given, the per-provider rankings are fused with reciprocal rank fusion (boosted
+    by `ranking`) and the best top_k papers are returned, in order, under a single "ranked" key.
+
+    Each provider runs under its own deadline (PROVIDER_DEADLINES unless `deadlines` is given)
+    and circuit breaker; `hedge_after` maps providers to a delay after which a duplicate request
+    is raced against the first. Providers that fail or run out of time are left out and named
+    in the result's `errors`, with `partial` set.
+
+    `library` is a local pre-stage (e.g. the vector index over papers already in the database).
+    Its hits come first, under a "library" key, and fuse with provider copies of the same paper
+    when merging or ranking. If it returns at least `library_sufficient` records the providers
+    are not called at all.
+
+    `providers` restricts the search to those registered providers (see providers.py), e.g.
+    FAST_PROVIDERS for interactive pages; by default every available provider is searched.
+    Each provider's searches are capped at its `max_concurrency` across concurrent calls.
+
+    Every provider call is recorded in the metrics registry (see metrics.py) and summarized in
+    the result's `diagnostics`: outcome, latency, records, and the HTTP requests, retries and
+    429s it caused.
     """
 
-    arxiv_coro = search_arxiv(client, query=query, max_results=limit_per_source)
-    doaj_coro = search_doaj(client, query=query, page=1, page_size=limit_per_source)
-    s2_coro = search_semantic_scholar(client, query=query, limit=limit_per_source)
-    openalex_coro = search_openalex(client, query=query, per_page=limit_per_source, page=1, mailto=mailto)
+    filters = combine_filters(filters, open_access_only)
+    results = GroupedResults()
+    local = await _library_stage(library, query, limit_per_source, filters, results.errors)
+    if library is not None:
+        results["library"] = local
+    calls = _resilient_calls(_provider_calls(query, limit_per_source, mailto, filters, providers), deadlines, hedge_after, breakers)
+    if library_sufficient is not None and len(local) >= library_sufficient:
+        calls = {}
+    outcomes = await asyncio.gather(
+        *[
+            _observed(
+                provider,
+                _cached_call(client, cache, provider, _cache_key(provider, query, limit_per_source, filters), call),
+                results.diagnostics,
+            )
+            for provider, call in calls.items()
+        ],
+        return_exceptions=True,
+    )
 
-    arxiv_res, doaj_res, s2_res, oa_res = await asyncio.gather(arxiv_coro, doaj_coro, s2_coro, openalex_coro, return_exceptions=True)
+    for provider, outcome in zip(calls, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning(f"search_all provider {provider} failed: {describe_error(outcome)}")
+            results.errors[provider] = describe_error(outcome)
+            outcome = []
+        results[provider] = outcome
 
-    results: Dict[str, List[PaperRecord]] = {"arxiv": [], "doaj": [], "semanticscholar": [], "openalex": []}
+    if top_k is not None:
+        ranked = GroupedResults(ranked=rank_records(results, top_k, ranking, predicate=filters.matches if filters else None))
+        ranked.errors = results.errors
+        ranked.diagnostics = results.diagnostics
+        return ranked
 
-    if isinstance(arxiv_res, list):
-        results["arxiv"] = arxiv_res
-    if isinstance(doaj_res, list):
-        results["doaj"] = doaj_res
-    if isinstance(s2_res, list):
-        results["semanticscholar"] = s2_res
-    if isinstance(oa_res, list):
-        results["openalex"] = oa_res
+    if merge:
+        # Merge before filtering so a closed copy can borrow an open PDF from its duplicates.
+        merged = GroupedResults(merged=merge_records(results))
+        merged.errors = results.errors
+        merged.diagnostics = results.diagnostics
+        results = merged
 
-    if open_access_only:
+    if filters is not None:
         for source_key, items in results.items():
-            results[source_key] = [r for r in items if getattr(r, "open_access_pdf_url", None)]
+            results[source_key] = [r for r in items if filters.matches(r)]
 
     return results
 
 
+async def search_all_stream(
+    client: HttpClient,
+    query: str,
+    limit_per_source: int = 20,
+    mailto: Optional[str] = None,
+    open_access_only: bool = False,
+    cache: Optional[SearchCache] = None,
+    filters: Optional[SearchFilters] = None,
+    deadlines: Optional[Dict[str, float]] = None,
+    hedge_after: Optional[Dict[str, float]] = None,
+    breakers: bool = True,
+    library: Optional[LibrarySearch] = None,
+    providers: Optional[Iterable[str]] = None,
+) -> AsyncIterator[Tuple[str, List[PaperRecord]]]:
+    """Like search_all, but yield (provider, records) as soon as each provider finishes.
+
+    Failed providers yield an empty list, mirroring search_all. Leaving the loop early cancels
+    the providers that are still running. With `library`, ("library", records) is yielded first.
+    `providers` selects a subset of the registered providers, as in search_all.
+    """
+
+    filters = combine_filters(filters, open_access_only)
+    calls = _resilient_calls(_provider_calls(query, limit_per_source, mailto, filters, providers), deadlines, hedge_after, breakers)
+
+    async def run(provider: str, call: ProviderCall) -> Tuple[str, List[PaperRecord]]:
+        key = _cache_key(provider, query, limit_per_source, filters)
+        try:
+            return provider, await _observed(provider, _cached_call(client, cache, provider, key, call), {})
+        except Exception as exc:
+            logger.warning(f"search_all_stream provider {provider} failed: {describe_error(exc)}")
+            return provider, []
+
+    tasks = [asyncio.ensure_future(run(provider, call)) for provider, call in calls.items()]
+    try:
+        if library is not None:
+            yield "library", await _library_stage(library, query, limit_per_source, filters, {})
+        for next_done in asyncio.as_completed(tasks):
+            provider, records = await next_done
+            if filters is not None:
+                records = [r for r in records if filters.matches(r)]
+            yield provider, records
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import datetime
 import re
+from contextlib import aclosing
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from .http import HttpClient
+from .metrics import record_parse_failure
+from .retry import DEFAULT_RETRY_POLICY
+from .filters import SearchFilters
 from .types import Author, PaperRecord
 
 
 ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ARXIV_HEADERS = {"User-Agent": "ForgeLore/0.1 (mailto:contact@example.com)"}
+ATOM_ENTRY = '{http://www.w3.org/2005/Atom}entry'
+OPENSEARCH_TOTAL = '{http://a9.com/-/spec/opensearch/1.1/}totalResults'
+# arXiv asks clients to wait ~3s between calls, so back off on that scale.
+ARXIV_RETRY_POLICY = DEFAULT_RETRY_POLICY.with_options(backoff_base=3.0)
 
 
 def _strip_ns(tag: str) -> str:
@@ -20,8 +31,10 @@ def _text(elem: Optional[ET.Element]) -> str:
 
 
 def _parse_arxiv_id(id_url: str) -> str:
-    # Examples: http://arxiv.org/abs/1234.5678v1 → 1234.5678v1
-    return id_url.rsplit('/', 1)[-1]
+    # Examples: http://arxiv.org/abs/1234.5678v1 → 1234.5678v1,
+    # http://arxiv.org/abs/hep-th/9901001v1 → hep-th/9901001v1 (old-style ids keep their archive)
+    _, sep, arxiv_id = id_url.partition('/abs/')
+    return arxiv_id.strip() if sep else id_url.rsplit('/', 1)[-1]
 
 
 def _find_pdf_link(entry: ET.Element) -> Optional[str]:
@@ -72,30 +85,130 @@ def _parse_entry(entry: ET.Element) -> PaperRecord:
         arxiv_id=arxiv_id,
         url=f"https://arxiv.org/abs/{arxiv_id}",
         open_access_pdf_url=pdf_url,
+        publication_type="preprint",
         raw={},
     )
     return record
 
 
-async def search_arxiv(client: HttpClient, query: str, start: int = 0, max_results: int = 25, sort_by: str = "relevance", sort_order: str = "descending") -> List[PaperRecord]:
-    params: Dict[str, Any] = {
+@dataclass
+class _FeedInfo:
+    entries: int = 0  # every <entry>, including malformed ones that yield no record
+    total_results: Optional[int] = None
+
+
+async def _stream_entries(client: HttpClient, params: Dict[str, Any], info: Optional[_FeedInfo] = None) -> AsyncIterator[PaperRecord]:
+    """Parse the Atom feed incrementally as bytes arrive, yielding one record per <entry>.
+
+    Finished entries are cleared and detached from the feed element so memory stays
+    proportional to a single entry rather than the whole response. `info`, if given, is
+    filled with the raw entry count and opensearch:totalResults. A malformed feed raises
+    ValueError, like a malformed JSON body from HttpClient.get_json.
+    """
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: Optional[ET.Element] = None
+    chunks = client.stream_bytes(ARXIV_API_URL, params=params, headers=ARXIV_HEADERS, retry_policy=ARXIV_RETRY_POLICY)
+    # Closing this generator early (fetch_arxiv_by_id stops after one entry) must close the
+    # response too, not leave it to garbage collection.
+    try:
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        continue
+                    if elem.tag == OPENSEARCH_TOTAL and info is not None:
+                        try:
+                            info.total_results = int((elem.text or "").strip())
+                        except ValueError:
+                            pass
+                    if elem.tag != ATOM_ENTRY:
+                        continue
+                    if info is not None:
+                        info.entries += 1
+                    try:
+                        record = _parse_entry(elem)
+                    except Exception:
+                        # Skip malformed entries
+                        record = None
+                    elem.clear()
+                    if root is not None:
+                        root.remove(elem)
+                    if record is not None:
+                        yield record
+            parser.close()
+    except ET.ParseError as exc:
+        # The response was already counted as a success; record it the way get_json does.
+        record_parse_failure(ARXIV_API_URL)
+        raise ValueError(f"malformed arXiv feed: {exc}") from exc
+
+
+def _filtered_query(query: str, filters: Optional[SearchFilters]) -> Optional[str]:
+    """AND a submittedDate range onto the query; None if the filters exclude preprints."""
+
+    if filters is None:
+        return query
+    # Every arXiv entry is an open access preprint with an abstract.
+    if filters.types and "preprint" not in filters.types:
+        return None
+    if filters.year_from is None and filters.year_to is None:
+        return query
+    low = filters.year_from if filters.year_from is not None else 1991
+    high = filters.year_to if filters.year_to is not None else datetime.date.today().year
+    return f"({query}) AND submittedDate:[{low}01010000 TO {high}12312359]"
+
+
+async def search_arxiv_stream(client: HttpClient, query: str, start: int = 0, max_results: int = 25, sort_by: str = "relevance", sort_order: str = "descending", filters: Optional[SearchFilters] = None) -> AsyncIterator[PaperRecord]:
+    """Yield arXiv search results while the response body is still downloading."""
+
+    query = _filtered_query(query, filters)
+    if query is None:
+        return
+    async for record in _stream_entries(client, _search_params(query, start, max_results, sort_by, sort_order)):
+        yield record
+
+
+def _search_params(query: str, start: int, max_results: int, sort_by: str, sort_order: str) -> Dict[str, Any]:
+    return {
         "search_query": query,
         "start": start,
         "max_results": max_results,
         "sortBy": sort_by,
         "sortOrder": sort_order,
     }
+
+
+async def search_arxiv(client: HttpClient, query: str, start: int = 0, max_results: int = 25, sort_by: str = "relevance", sort_order: str = "descending", filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
     # arXiv returns Atom XML
-    text = await client.get_text(ARXIV_API_URL, params=params, headers={"User-Agent": "ForgeLore/0.1 (mailto:contact@example.com)"})
-    root = ET.fromstring(text)
-    results: List[PaperRecord] = []
-    for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-        try:
-            results.append(_parse_entry(entry))
-        except Exception:
-            # Skip malformed entries
-            continue
-    return results
+    return [
+        record
+        async for record in search_arxiv_stream(
+            client, query, start=start, max_results=max_results, sort_by=sort_by, sort_order=sort_order, filters=filters
+        )
+    ]
+
+
+async def search_arxiv_page(client: HttpClient, query: str, start: int = 0, max_results: int = 100, sort_by: str = "relevance", sort_order: str = "descending", filters: Optional[SearchFilters] = None) -> Tuple[List[PaperRecord], Optional[int]]:
+    """Fetch one offset page; returns (records, next_start). next_start is None at the end.
+
+    The end is judged from the feed (opensearch:totalResults, else the raw entry count), not
+    from the records: malformed entries are skipped, so a full page can yield fewer records.
+    """
+
+    query = _filtered_query(query, filters)
+    if query is None:
+        return [], None
+    info = _FeedInfo()
+    records = [record async for record in _stream_entries(client, _search_params(query, start, max_results, sort_by, sort_order), info)]
+    next_start = start + info.entries
+    if info.total_results is not None:
+        exhausted = next_start >= info.total_results
+    else:
+        exhausted = info.entries < max_results
+    return records, (None if exhausted or not info.entries else next_start)
 
 
 async def fetch_arxiv_by_id(client: HttpClient, arxiv_id: str) -> Optional[PaperRecord]:
@@ -104,11 +217,30 @@ async def fetch_arxiv_by_id(client: HttpClient, arxiv_id: str) -> Optional[Paper
         "id_list": arxiv_id,
         "max_results": 1,
     }
-    text = await client.get_text(ARXIV_API_URL, params=params, headers={"User-Agent": "ForgeLore/0.1 (mailto:contact@example.com)"})
-    root = ET.fromstring(text)
-    entry = root.find('{http://www.w3.org/2005/Atom}entry')
-    if entry is None:
-        return None
-    return _parse_entry(entry)
+    async with aclosing(_stream_entries(client, params)) as entries:
+        async for record in entries:
+            return record
+    return None
+
+
+# arXiv accepts long id_lists, but very long query strings get rejected by proxies.
+ARXIV_BATCH_SIZE = 100
+
 
+def _strip_version(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", arxiv_id.strip())
 
+
+async def fetch_many_arxiv(client: HttpClient, arxiv_ids: Sequence[str]) -> List[Optional[PaperRecord]]:
+    """Fetch up to ARXIV_BATCH_SIZE ids in one request; results follow input order (None if missing)."""
+
+    if not arxiv_ids:
+        return []
+    params: Dict[str, Any] = {
+        "id_list": ",".join(arxiv_ids),
+        "max_results": len(arxiv_ids),
+    }
+    by_id: Dict[str, PaperRecord] = {}
+    async for rec in _stream_entries(client, params):
+        by_id[_strip_version(rec.arxiv_id or "")] = rec
+    return [by_id.get(_strip_version(i)) for i in arxiv_ids]
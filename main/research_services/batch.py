@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .http import HttpClient
+from .types import PaperRecord
+from .merge import normalize_arxiv_id, normalize_doi
+from .providers import get_provider
+
+
+logger = logging.getLogger(__name__)
+
+_OPENALEX_ID = re.compile(r"^(?:https?://openalex\.org/)?W\d+$", re.IGNORECASE)
+_ARXIV_NEW = re.compile(r"^(?:arxiv:)?\d{4}\.\d{4,5}(?:v\d+)?$", re.IGNORECASE)
+_ARXIV_OLD = re.compile(r"^(?:arxiv:)?[a-z\-]+(?:\.[a-z]{2})?/\d{7}(?:v\d+)?$", re.IGNORECASE)
+_DOI = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)?10\.\d{4,9}/\S+$", re.IGNORECASE)
+
+BatchFetch = Callable[[HttpClient, Sequence[str]], Awaitable[List[Optional[PaperRecord]]]]
+
+
+def classify_id(identifier: str) -> Tuple[str, str]:
+    """Map an identifier to (provider, provider-specific id).
+
+    arXiv ids go to arXiv, OpenAlex work ids to OpenAlex, and everything else (DOIs, S2 ids,
+    "CorpusId:..." style ids) to the Semantic Scholar batch endpoint.
+    """
+
+    value = identifier.strip()
+    if _OPENALEX_ID.match(value):
+        return "openalex", value
+    if _ARXIV_NEW.match(value) or _ARXIV_OLD.match(value):
+        return "arxiv", normalize_arxiv_id(value) or value
+    if _DOI.match(value):
+        return "semanticscholar", f"DOI:{normalize_doi(value)}"
+    return "semanticscholar", value
+
+
+async def fetch_many(
+    client: HttpClient,
+    ids: Sequence[str],
+    max_concurrency: int = 4,
+    mailto: Optional[str] = None,
+) -> List[Optional[PaperRecord]]:
+    """Fetch many papers by identifier with as few requests as possible.
+
+    Ids are routed per provider, split into chunks of each provider's batch limit and fetched
+    with at most `max_concurrency` chunks in flight. The result list matches `ids` position by
+    position, with None for ids that were not found or whose chunk failed.
+    """
+
+    fetchers: Dict[str, Tuple[BatchFetch, int]] = {}
+    for name in ("arxiv", "semanticscholar", "openalex"):
+        provider = get_provider(name)
+        fetchers[name] = (lambda c, chunk, fetch=provider.fetch: fetch(c, chunk, mailto), provider.batch_size)
+
+    positions: Dict[str, List[Tuple[int, str]]] = {}
+    for index, identifier in enumerate(ids):
+        provider, provider_id = classify_id(identifier)
+        positions.setdefault(provider, []).append((index, provider_id))
+
+    results: List[Optional[PaperRecord]] = [None] * len(ids)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_chunk(provider: str, chunk: List[Tuple[int, str]]) -> None:
+        fetch, _ = fetchers[provider]
+        async with semaphore:
+            try:
+                records = await fetch(client, [provider_id for _, provider_id in chunk])
+            except Exception as exc:
+                logger.warning(f"fetch_many: {provider} chunk of {len(chunk)} failed: {exc}")
+                return
+        for (index, _), record in zip(chunk, records):
+            results[index] = record
+
+    jobs = []
+    for provider, items in positions.items():
+        _, batch_size = fetchers[provider]
+        for start in range(0, len(items), batch_size):
+            jobs.append(run_chunk(provider, items[start:start + batch_size]))
+    await asyncio.gather(*jobs)
+    return results
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from .http import HttpClient
+from .ratelimit import RATE_POLICIES
+from .cache import SearchCache
+from .aggregate import search_all
+from .arxiv import search_arxiv
+from .doaj import search_doaj
+from .semanticscholar import search_semantic_scholar
+from .openalex import search_openalex
+from .simulator import SimulatedTransport
+from .singleflight import get_singleflight
+
+
+@dataclass
+class LoadResult:
+    requests: int
+    concurrency: int
+    seconds: float
+    throughput: float  # search_all calls per second
+    p50_ms: float
+    p99_ms: float
+    records: int
+    partial: int  # calls where at least one provider was missing
+    issued: int = 0  # provider requests sent
+    coalesced: int = 0  # provider requests served by an identical one already in flight
+
+
+@dataclass
+class ParserResult:
+    provider: str
+    records: int
+    cpu_us_per_record: float
+
+
+@dataclass
+class MemoryResult:
+    concurrency: int
+    records: int
+    peak_bytes: int
+    bytes_per_record: float
+
+
+@contextlib.contextmanager
+def unthrottled() -> Iterator[None]:
+    """Temporarily drop the per-host rate policies so the simulator, not pacing, is measured."""
+
+    saved = dict(RATE_POLICIES)
+    RATE_POLICIES.clear()
+    try:
+        yield
+    finally:
+        RATE_POLICIES.update(saved)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def bench_search_all(
+    transport: SimulatedTransport,
+    requests: int = 200,
+    concurrency: int = 20,
+    limit_per_source: int = 20,
+    cache: Optional[SearchCache] = None,
+    merge: bool = False,
+) -> LoadResult:
+    """Issue `requests` search_all calls, `concurrency` at a time, and record per-call latency."""
+
+    client = HttpClient(transport=transport)
+    latencies: List[float] = []
+    counters = {"records": 0, "partial": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            results = await search_all(
+                client, f"benchmark query {i % 25}", limit_per_source=limit_per_source, cache=cache, merge=merge, breakers=False
+            )
+            latencies.append(time.perf_counter() - started)
+            counters["records"] += sum(len(v) for v in results.values())
+            counters["partial"] += int(results.partial)
+
+    flights = get_singleflight()
+    before = flights.stats()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await client.aclose()
+    elapsed = time.perf_counter() - started
+    after = flights.stats()
+
+    def delta(counter: str) -> int:
+        return sum(v[counter] - before.get(label, {}).get(counter, 0) for label, v in after.items())
+
+    return LoadResult(
+        requests=requests,
+        concurrency=concurrency,
+        seconds=elapsed,
+        throughput=requests / elapsed if elapsed else 0.0,
+        p50_ms=statistics.median(latencies) * 1000 if latencies else 0.0,
+        p99_ms=_percentile(latencies, 99) * 1000,
+        records=counters["records"],
+        partial=counters["partial"],
+        issued=delta("issued"),
+        coalesced=delta("coalesced"),
+    )
+
+
+ParserCall = Callable[[HttpClient], Awaitable[list]]
+
+_PARSERS: Dict[str, ParserCall] = {
+    "arxiv": lambda c: search_arxiv(c, "bench", max_results=50),
+    "doaj": lambda c: search_doaj(c, "bench", page_size=50),
+    "semanticscholar": lambda c: search_semantic_scholar(c, "bench", limit=50),
+    "openalex": lambda c: search_openalex(c, "bench", per_page=50),
+}
+
+
+async def bench_parsers(rounds: int = 20) -> List[ParserResult]:
+    """CPU time per record for each provider's decode + normalize path, with zero simulated latency."""
+
+    client = HttpClient(transport=SimulatedTransport())
+    results: List[ParserResult] = []
+    try:
+        for provider, call in _PARSERS.items():
+            await call(client)  # warm up
+            records = 0
+            cpu_started = time.process_time()
+            for _ in range(rounds):
+                records += len(await call(client))
+            cpu = time.process_time() - cpu_started
+            results.append(ParserResult(provider=provider, records=records, cpu_us_per_record=cpu / records * 1e6 if records else 0.0))
+    finally:
+        await client.aclose()
+    return results
+
+
+async def bench_memory(transport: SimulatedTransport, concurrency: int = 20, limit_per_source: int = 50) -> MemoryResult:
+    """Peak traced allocation while `concurrency` search_all calls run and their results are held."""
+
+    client = HttpClient(transport=transport)
+    try:
+        # Pay one-off import/connection costs before tracing.
+        await search_all(client, "warm up", limit_per_source=1, breakers=False)
+        tracemalloc.start()
+        try:
+            grouped = await asyncio.gather(
+                *(search_all(client, f"memory {i}", limit_per_source=limit_per_source, breakers=False) for i in range(concurrency))
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        await client.aclose()
+    records = sum(len(v) for results in grouped for v in results.values())
+    return MemoryResult(concurrency=concurrency, records=records, peak_bytes=peak, bytes_per_record=peak / records if records else 0.0)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from .types import PaperRecord, asdict_record, record_from_dict
+
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "SEARCH_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "forgelore", "search_cache.sqlite3"),
+)
+DEFAULT_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+DEFAULT_STALE_SECONDS = float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "604800"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# arXiv listings change slowly; citation-bearing providers drift faster.
+PROVIDER_TTLS: Dict[str, float] = {
+    "arxiv": DEFAULT_TTL_SECONDS,
+    "doaj": DEFAULT_TTL_SECONDS,
+    "semanticscholar": DEFAULT_TTL_SECONDS / 2,
+    "openalex": DEFAULT_TTL_SECONDS / 2,
+}
+
+
+class CacheBackend(Protocol):
+    """Storage interface used by SearchCache. Values are opaque bytes."""
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]: ...
+
+    def set(self, key: str, value: bytes, created_at: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def evict(self, max_entries: int, max_bytes: int) -> int: ...
+
+
+class MemoryCacheBackend:
+    """In-process backend, mostly useful for tests and short-lived workers."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, created_at, _ = item
+            self._data[key] = (value, created_at, time.time())
+            return value, created_at
+
+    def set(self, key: str, value: bytes, created_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, created_at, time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def evict(self, max_entries: int, max_bytes: int) -> int:
+        with self._lock:
+            by_access = sorted(self._data.items(), key=lambda kv: kv[1][2])
+            total = sum(len(v[0]) for _, v in by_access)
+            removed = 0
+            while by_access and (len(by_access) > max_entries or total > max_bytes):
+                key, (value, _, _) = by_access.pop(0)
+                del self._data[key]
+                total -= len(value)
+                removed += 1
+            return removed
+
+
+class SqliteCacheBackend:
+    """On-disk backend with least-recently-used eviction by entry count and size."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return bytes(row[0]), float(row[1])
+
+    def set(self, key: str, value: bytes, created_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), created_at, time.time()),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self, max_entries: int, max_bytes: int) -> int:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            removed = 0
+            if count > max_entries:
+                excess = count - max_entries
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                removed += excess
+                count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if total > max_bytes:
+                freed = 0
+                victims: List[str] = []
+                for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                    if total - freed <= max_bytes:
+                        break
+                    victims.append(key)
+                    freed += size
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+                removed += len(victims)
+            return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CacheHit:
+    records: List[PaperRecord]
+    age: float
+    fresh: bool
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+class SearchCache:
+    """TTL cache of per-provider search results with stale-while-revalidate.
+
+    A hit younger than the provider TTL is fresh. A hit older than the TTL but younger than
+    TTL + stale window is still served, and the caller is expected to refresh it in the background.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        stale_ttl: float = DEFAULT_STALE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        evict_every: int = 100,
+    ) -> None:
+        self.backend: CacheBackend = backend if backend is not None else SqliteCacheBackend()
+        self.ttls = dict(PROVIDER_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict_every = max(1, evict_every)
+        self._writes = 0
+
+    def ttl_for(self, provider: str) -> float:
+        return self.ttls.get(provider, self.default_ttl)
+
+    @staticmethod
+    def make_key(provider: str, query: str, limit: int, filters: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(filters or {}, sort_keys=True, default=str)
+        return f"{provider}|{normalize_query(query)}|{int(limit)}|{payload}"
+
+    def get(self, provider: str, key: str) -> Optional[CacheHit]:
+        item = self.backend.get(key)
+        if item is None:
+            return None
+        value, created_at = item
+        age = time.time() - created_at
+        ttl = self.ttl_for(provider)
+        if age > ttl + self.stale_ttl:
+            self.backend.delete(key)
+            return None
+        try:
+            records = [record_from_dict(d) for d in json.loads(value)]
+        except Exception:
+            self.backend.delete(key)
+            return None
+        return CacheHit(records=records, age=age, fresh=age <= ttl)
+
+    def set(self, key: str, records: List[PaperRecord]) -> None:
+        value = json.dumps([asdict_record(r) for r in records]).encode("utf-8")
+        self.backend.set(key, value, time.time())
+        self._writes += 1
+        if self._writes % self._evict_every == 0:
+            self.backend.evict(self.max_entries, self.max_bytes)
+
+
+_default_cache: Optional[SearchCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache(path: Optional[str] = None) -> Optional[SearchCache]:
+    """Process-wide on-disk cache, or None when disabled via SEARCH_CACHE_ENABLED=false.
+
+    The path is SEARCH_CACHE_PATH as set when called (so test runs can point it elsewhere),
+    falling back to DEFAULT_CACHE_PATH.
+    """
+
+    global _default_cache
+    if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    path = path or os.getenv("SEARCH_CACHE_PATH") or DEFAULT_CACHE_PATH
+    with _default_cache_lock:
+        if _default_cache is None or getattr(_default_cache.backend, "path", None) != path:
+            if _default_cache is not None:
+                _default_cache.backend.close()
+            _default_cache = SearchCache(SqliteCacheBackend(path))
+        return _default_cache
@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .cache import SearchCache
+from .http import HttpClient
+from .merge import fuse_records, identity_keys, normalize_arxiv_id, normalize_doi
+from .openalex import OPENALEX_BATCH_SIZE, fetch_many_openalex_by_doi, fetch_openalex_citations, fetch_openalex_references, short_work_id
+from .resilience import PROVIDER_DEADLINES, describe_error, get_breaker, guarded
+from .singleflight import coalesced
+from .semanticscholar import fetch_semantic_scholar_citations, fetch_semantic_scholar_references
+from .types import PaperRecord
+
+
+logger = logging.getLogger(__name__)
+
+GRAPH_CONCURRENCY = int(os.getenv("CITATION_GRAPH_CONCURRENCY", "4"))
+GRAPH_NEIGHBORS_PER_PAPER = int(os.getenv("CITATION_GRAPH_NEIGHBORS", "100"))
+GRAPH_MAX_PAPERS = int(os.getenv("CITATION_GRAPH_MAX_PAPERS", "2000"))
+# A harvest stops expanding once either budget is spent; cached neighbour lists are free.
+GRAPH_TIME_BUDGET = float(os.getenv("CITATION_GRAPH_TIME_BUDGET", "60"))
+GRAPH_MAX_REQUESTS = int(os.getenv("CITATION_GRAPH_MAX_REQUESTS", "200"))
+# Papers expanded per level past the seeds, best connected first.
+GRAPH_MAX_FRONTIER = int(os.getenv("CITATION_GRAPH_MAX_FRONTIER", "50"))
+GRAPH_PROVIDERS = ("semanticscholar", "openalex")
+# OpenAlex has the more generous rate limit and resolves seeds in batches.
+GRAPH_PROVIDER = os.getenv("CITATION_GRAPH_PROVIDER", "openalex")
+DIRECTIONS = ("references", "citations", "both")
+
+
+class CitationGraph:
+    """Papers and "citing -> cited" edges, with papers deduplicated by DOI/arXiv/title identity.
+
+    Edges are collected as two flat int arrays and compressed on demand into CSR form
+    (indptr, indices) over citing papers, which is all PageRank and co-citation need.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[PaperRecord] = []
+        self.depth: List[int] = []
+        self.seeds: List[int] = []
+        self.errors: Dict[str, int] = {}
+        self.requests = 0
+        self.truncated: Optional[str] = None
+        self._by_key: Dict[str, int] = {}
+        self._src: List[int] = []
+        self._dst: List[int] = []
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def find(self, record: PaperRecord) -> Optional[int]:
+        for key in identity_keys(record):
+            node = self._by_key.get(key)
+            if node is not None:
+                return node
+        return None
+
+    def add_paper(self, record: PaperRecord, depth: int = 0) -> int:
+        node = self.find(record)
+        if node is None:
+            node = len(self.records)
+            self.records.append(record)
+            self.depth.append(depth)
+        else:
+            # Keep the identity of the first copy but fill in fields it was missing.
+            self.records[node] = fuse_records([self.records[node], record])
+            self.depth[node] = min(self.depth[node], depth)
+        for key in identity_keys(self.records[node]):
+            self._by_key.setdefault(key, node)
+        return node
+
+    def truncate(self, reason: str) -> None:
+        """Record why the harvest stopped short (the first reason wins)."""
+
+        if self.truncated is None:
+            self.truncated = reason
+
+    def add_edge(self, citing: int, cited: int) -> None:
+        if citing != cited:
+            self._src.append(citing)
+            self._dst.append(cited)
+            self._csr = None
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.csr()[1])
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(indptr, indices): the papers cited by node i are indices[indptr[i]:indptr[i + 1]]."""
+
+        if self._csr is None:
+            n = len(self.records)
+            pairs = np.unique(np.asarray(self._src, dtype=np.int64) * max(n, 1) + np.asarray(self._dst, dtype=np.int64))
+            src, dst = np.divmod(pairs, max(n, 1))
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+            self._csr = (indptr, dst.astype(np.int32))
+        return self._csr
+
+    def _rows(self) -> np.ndarray:
+        indptr, _ = self.csr()
+        return np.repeat(np.arange(len(self.records)), np.diff(indptr))
+
+    def out_of(self, x: np.ndarray) -> np.ndarray:
+        """y[i] = sum of x over the papers i cites (A @ x)."""
+
+        _, indices = self.csr()
+        return np.bincount(self._rows(), weights=x[indices], minlength=len(self.records))
+
+    def into(self, x: np.ndarray) -> np.ndarray:
+        """y[j] = sum of x over the papers citing j (A.T @ x)."""
+
+        _, indices = self.csr()
+        return np.bincount(indices, weights=x[self._rows()], minlength=len(self.records))
+
+    def pagerank(
+        self,
+        damping: float = 0.85,
+        personalization: Optional[Sequence[int]] = None,
+        undirected: bool = True,
+        iterations: int = 100,
+        tol: float = 1e-10,
+    ) -> np.ndarray:
+        """Power-iteration PageRank, optionally personalized to (restarting at) the given nodes.
+
+        undirected=True lets rank flow both to references and to citing papers, which suits a
+        literature review where newer follow-up work matters as much as classics.
+        """
+
+        n = len(self.records)
+        if n == 0:
+            return np.zeros(0)
+        out_degree = np.diff(self.csr()[0]).astype(np.float64)
+        in_degree = np.bincount(self.csr()[1], minlength=n).astype(np.float64)
+        degree = out_degree + in_degree if undirected else out_degree
+        restart = np.full(n, 1.0 / n)
+        if personalization:
+            restart = np.zeros(n)
+            restart[list(personalization)] = 1.0 / len(set(personalization))
+        rank = restart.copy()
+        for _ in range(iterations):
+            share = np.divide(rank, degree, out=np.zeros(n), where=degree > 0)
+            spread = self.into(share) + (self.out_of(share) if undirected else 0.0)
+            dangling = rank[degree == 0].sum()
+            updated = damping * (spread + dangling * restart) + (1 - damping) * restart
+            if np.abs(updated - rank).sum() < tol:
+                rank = updated
+                break
+            rank = updated
+        return rank
+
+    def cocitation(self, nodes: Sequence[int]) -> np.ndarray:
+        """For every paper, how many papers cite it together with at least one of `nodes`."""
+
+        marked = np.zeros(len(self.records))
+        marked[list(nodes)] = 1.0
+        cites_marked = (self.out_of(marked) > 0).astype(np.float64)
+        return self.into(cites_marked)
+
+    def coupling(self, nodes: Sequence[int]) -> np.ndarray:
+        """For every paper, how many of its references are also cited by one of `nodes` (bibliographic coupling)."""
+
+        marked = np.zeros(len(self.records))
+        marked[list(nodes)] = 1.0
+        cited_by_marked = (self.into(marked) > 0).astype(np.float64)
+        return self.out_of(cited_by_marked)
+
+
+@dataclass(frozen=True, slots=True)
+class GraphWeights:
+    """How the normalized graph signals are combined when ranking candidates."""
+
+    pagerank: float = 1.0
+    cocitation: float = 0.5
+    coupling: float = 0.5
+
+
+DEFAULT_GRAPH_WEIGHTS = GraphWeights()
+
+
+@dataclass(slots=True)
+class GraphCandidate:
+    record: PaperRecord
+    score: float
+    pagerank: float
+    cocitations: int
+    coupling: int
+    depth: int
+
+
+def _normalized(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # Scale by the best candidate, not the seeds (which always dominate their own PageRank).
+    top = values[mask].max() if mask.any() else 0.0
+    return values / top if top > 0 else np.zeros_like(values, dtype=np.float64)
+
+
+def rank_candidates(graph: CitationGraph, top_k: int = 20, weights: GraphWeights = DEFAULT_GRAPH_WEIGHTS) -> List[GraphCandidate]:
+    """Best non-seed papers by seed-personalized PageRank plus co-citation and coupling with the seeds."""
+
+    if top_k <= 0 or not graph.seeds or len(graph) <= len(set(graph.seeds)):
+        return []
+    pr = graph.pagerank(personalization=graph.seeds)
+    cocited = graph.cocitation(graph.seeds)
+    coupled = graph.coupling(graph.seeds)
+    candidates = np.ones(len(graph), dtype=bool)
+    candidates[list(graph.seeds)] = False
+    score = (
+        weights.pagerank * _normalized(pr, candidates)
+        + weights.cocitation * _normalized(cocited, candidates)
+        + weights.coupling * _normalized(coupled, candidates)
+    )
+    score[~candidates] = -np.inf
+    k = min(top_k, len(graph) - len(set(graph.seeds)))
+    best = np.argpartition(-score, k - 1)[:k]
+    best = best[np.argsort(-score[best], kind="stable")]
+    return [
+        GraphCandidate(
+            record=graph.records[i],
+            score=float(score[i]),
+            pagerank=float(pr[i]),
+            cocitations=int(cocited[i]),
+            coupling=int(coupled[i]),
+            depth=graph.depth[i],
+        )
+        for i in best
+    ]
+
+
+def _openalex_doi(record: PaperRecord) -> Optional[str]:
+    # arXiv papers are registered in OpenAlex under their DataCite DOI.
+    doi = normalize_doi(record.doi)
+    arxiv_id = normalize_arxiv_id(record.arxiv_id)
+    if not doi and arxiv_id:
+        doi = f"10.48550/arxiv.{arxiv_id}"
+    return doi
+
+
+def _provider_id(record: PaperRecord, provider: str) -> Optional[str]:
+    if record.source == provider:
+        return short_work_id(record.source_id) if provider == "openalex" else record.source_id
+    if provider == "semanticscholar":
+        doi = normalize_doi(record.doi)
+        if doi:
+            return f"DOI:{doi}"
+        arxiv_id = normalize_arxiv_id(record.arxiv_id)
+        return f"ARXIV:{arxiv_id}" if arxiv_id else None
+    # OpenAlex filters need a work id; harvest_citation_graph resolves other seeds through their DOI.
+    return None
+
+
+@dataclass(slots=True)
+class _Budget:
+    requests: int
+    deadline: float  # event loop time
+
+    def take(self) -> bool:
+        if self.requests <= 0:
+            return False
+        self.requests -= 1
+        return True
+
+    def remaining(self) -> float:
+        return self.deadline - asyncio.get_running_loop().time()
+
+
+async def _neighbors(
+    client: HttpClient,
+    provider: str,
+    paper_id: str,
+    edge: str,
+    limit: int,
+    mailto: Optional[str],
+    cache: Optional[SearchCache],
+    budget: _Budget,
+) -> Optional[List[PaperRecord]]:
+    """Neighbour list from the cache or the provider; None when the request budget is spent."""
+
+    key = SearchCache.make_key(provider, f"{edge}:{paper_id}", limit)
+    if cache is not None:
+        hit = await asyncio.to_thread(cache.get, provider, key)
+        if hit is not None:
+            # Reference lists hardly change; stale entries are as good as fresh ones here.
+            return hit.records
+    if not budget.take():
+        return None
+    if provider == "semanticscholar":
+        fetch = fetch_semantic_scholar_references if edge == "references" else fetch_semantic_scholar_citations
+        call = lambda: fetch(client, paper_id, limit=limit)
+    else:
+        fetch = fetch_openalex_references if edge == "references" else fetch_openalex_citations
+        call = lambda: fetch(client, paper_id, per_page=limit, mailto=mailto)
+    records = await coalesced(
+        key, lambda: guarded(provider, call, deadline=PROVIDER_DEADLINES.get(provider), breaker=get_breaker(provider)), label=provider
+    )
+    if cache is not None:
+        await asyncio.to_thread(cache.set, key, records)
+    return records
+
+
+async def harvest_citation_graph(
+    client: HttpClient,
+    seeds: Sequence[PaperRecord],
+    depth: int = 1,
+    direction: str = "both",
+    provider: str = GRAPH_PROVIDER,
+    max_papers: int = GRAPH_MAX_PAPERS,
+    per_paper: int = GRAPH_NEIGHBORS_PER_PAPER,
+    max_concurrency: int = GRAPH_CONCURRENCY,
+    mailto: Optional[str] = None,
+    cache: Optional[SearchCache] = None,
+    time_budget: float = GRAPH_TIME_BUDGET,
+    max_requests: int = GRAPH_MAX_REQUESTS,
+    max_frontier: int = GRAPH_MAX_FRONTIER,
+) -> CitationGraph:
+    """Expand seed papers breadth-first through their references and/or citing works.
+
+    Each level fetches the neighbours of every frontier paper with at most `max_concurrency`
+    requests in flight (through the provider's circuit breaker and deadline). Edges between
+    known papers are always recorded; new papers stop being added once the graph holds
+    `max_papers`. Only the `max_frontier` new papers with the most links into the graph are
+    expanded at the next level. The whole harvest gets `time_budget` seconds and
+    `max_requests` provider requests; whatever is fetched by then is kept and the reason is
+    left in `graph.truncated`. Failed fetches are counted in `graph.errors` and do not stop
+    the harvest.
+    """
+
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}")
+    if provider not in GRAPH_PROVIDERS:
+        raise ValueError(f"provider must be one of {GRAPH_PROVIDERS}")
+    edges = ("references", "citations") if direction == "both" else (direction,)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    budget = _Budget(max(0, max_requests), asyncio.get_running_loop().time() + time_budget)
+    graph = CitationGraph()
+    graph.seeds = sorted({graph.add_paper(seed, 0) for seed in seeds})
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    async def settle(coros) -> list:
+        # Like gather(return_exceptions=True), but calls still running when the time budget
+        # runs out are cancelled and come back as None.
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        if not tasks:
+            return []
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=max(0.0, budget.remaining()))
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending:
+            graph.truncate("time budget")
+            await asyncio.gather(*pending, return_exceptions=True)
+        return [None if task.cancelled() else task.exception() or task.result() for task in tasks]
+
+    work_ids: Dict[int, str] = {}  # seeds resolved to OpenAlex works (a library copy keeps its own source)
+    if provider == "openalex":
+        # Resolve seeds that are not OpenAlex works yet, so their ids can go into cites:/cited_by:
+        # filters. One request covers a batch of DOIs.
+        unresolved = [n for n in graph.seeds if graph.records[n].source != "openalex" and _openalex_doi(graph.records[n])]
+        batches = [unresolved[i:i + OPENALEX_BATCH_SIZE] for i in range(0, len(unresolved), OPENALEX_BATCH_SIZE)]
+        if len(batches) > budget.requests:
+            graph.truncate("request budget")
+        batches = batches[:budget.requests]
+        budget.requests -= len(batches)
+        resolved = await settle(
+            limited(fetch_many_openalex_by_doi(client, [_openalex_doi(graph.records[n]) for n in batch], mailto=mailto))
+            for batch in batches
+        )
+        for batch, works in zip(batches, resolved):
+            if isinstance(works, list):
+                for node, work in zip(batch, works):
+                    if work is not None:
+                        work_ids[node] = short_work_id(work.source_id)
+                        graph.records[node] = fuse_records([work, graph.records[node]])
+
+    frontier: List[int] = list(graph.seeds)
+    visited: Set[int] = set()
+    for level in range(depth):
+        if budget.remaining() <= 0:
+            graph.truncate("time budget")
+            break
+        jobs = []
+        for node in frontier:
+            visited.add(node)
+            paper_id = work_ids.get(node) or _provider_id(graph.records[node], provider)
+            if paper_id is None:
+                continue
+            for edge in edges:
+                jobs.append((node, edge, limited(_neighbors(client, provider, paper_id, edge, per_paper, mailto, cache, budget))))
+        outcomes = await settle(job for _, _, job in jobs)
+
+        links: Dict[int, int] = {}  # new paper -> edges to it found at this level
+        for (node, edge, _), outcome in zip(jobs, outcomes):
+            if outcome is None:
+                if budget.requests <= 0:
+                    graph.truncate("request budget")
+                continue
+            if isinstance(outcome, BaseException):
+                reason = describe_error(outcome)
+                logger.warning(f"citation graph {edge} fetch failed for {graph.records[node].title!r}: {reason}")
+                graph.errors[reason] = graph.errors.get(reason, 0) + 1
+                continue
+            for record in outcome:
+                neighbor = graph.find(record)
+                if neighbor is None:
+                    if len(graph) >= max_papers:
+                        continue
+                    neighbor = graph.add_paper(record, level + 1)
+                    links[neighbor] = 0
+                if neighbor in links:
+                    links[neighbor] += 1
+                if edge == "references":
+                    graph.add_edge(node, neighbor)
+                else:
+                    graph.add_edge(neighbor, node)
+        frontier = sorted(
+            (n for n in links if n not in visited),
+            key=lambda n: (-links[n], -(graph.records[n].citations_count or 0)),
+        )
+        if level + 1 < depth and len(frontier) > max_frontier:
+            graph.truncate("frontier cap")
+            frontier = frontier[:max(0, max_frontier)]
+    graph.requests = max(0, max_requests) - budget.requests
+    return graph
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .http import HttpClient
+from .retry import DEFAULT_RETRY_POLICY
+from .filters import SearchFilters
 from .types import Author, PaperRecord
 
 
 DOAJ_SEARCH_URL = "https://doaj.org/api/search/articles/"
+# DOAJ answers 400 for query strings it cannot parse; the default policy fails those fast.
+DOAJ_RETRY_POLICY = DEFAULT_RETRY_POLICY
 
 
-def _normalize_article(doc: Dict[str, Any]) -> Optional[PaperRecord]:
+def _normalize_article(doc: Dict[str, Any], include_raw: bool = False) -> Optional[PaperRecord]:
     bib = doc.get("bibjson", {})
     title = bib.get("title") or ""
     abstract = bib.get("abstract") or ""
@@ -59,24 +63,63 @@ def _normalize_article(doc: Dict[str, Any]) -> Optional[PaperRecord]:
         doi=doi,
         url=html_url or pdf_url,
         open_access_pdf_url=pdf_url,
-        raw=doc,
+        publication_type="article",
+        raw=doc if include_raw else {},
     )
     return record
 
 
-async def search_doaj(client: HttpClient, query: str, page: int = 1, page_size: int = 50, sort: Optional[str] = None) -> List[PaperRecord]:
+def _filtered_query(query: str, filters: Optional[SearchFilters]) -> Optional[str]:
+    """Append filter clauses to the DOAJ (Elasticsearch query-string) search; None if nothing can match."""
+
+    if filters is None:
+        return query
+    # DOAJ only indexes open access journal articles, so open_access needs no clause.
+    if filters.types and "article" not in filters.types:
+        return None
+    clauses = [f"({query})"]
+    if filters.year_from is not None or filters.year_to is not None:
+        low = filters.year_from if filters.year_from is not None else "*"
+        high = filters.year_to if filters.year_to is not None else "*"
+        clauses.append(f"bibjson.year:[{low} TO {high}]")
+    if filters.has_abstract:
+        clauses.append("_exists_:bibjson.abstract")
+    return " AND ".join(clauses) if len(clauses) > 1 else query
+
+
+async def search_doaj_page(client: HttpClient, query: str, page: int = 1, page_size: int = 50, sort: Optional[str] = None, include_raw: bool = False, filters: Optional[SearchFilters] = None) -> Tuple[List[PaperRecord], Optional[int]]:
+    """Fetch one page; returns (records, next_page). next_page is None at the end.
+
+    The end is judged from DOAJ's `total` (or the raw result count), not from the records:
+    titleless results are dropped, so a full page can yield fewer than page_size records.
+    """
+
+    query = _filtered_query(query, filters)
+    if query is None:
+        return [], None
     # DOAJ API path style: /api/search/articles/{search_query}
     # Query string supports page, pageSize, sort
     url = DOAJ_SEARCH_URL + query
     params: Dict[str, Any] = {"page": page, "pageSize": page_size}
     if sort:
         params["sort"] = sort
-    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"})
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=DOAJ_RETRY_POLICY)
+    items = data.get("results", []) or []
     results: List[PaperRecord] = []
-    for item in data.get("results", []) or []:
-        rec = _normalize_article(item)
+    for item in items:
+        rec = _normalize_article(item, include_raw)
         if rec:
             results.append(rec)
+    total = data.get("total")
+    if isinstance(total, int):
+        exhausted = page * page_size >= total
+    else:
+        exhausted = len(items) < page_size
+    return results, (None if exhausted or not items else page + 1)
+
+
+async def search_doaj(client: HttpClient, query: str, page: int = 1, page_size: int = 50, sort: Optional[str] = None, include_raw: bool = False, filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
+    results, _ = await search_doaj_page(client, query, page=page, page_size=page_size, sort=sort, include_raw=include_raw, filters=filters)
     return results
 
 
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+from .types import PaperRecord
+
+
+# Canonical publication types; each provider module maps these onto its own vocabulary.
+PUBLICATION_TYPES: Tuple[str, ...] = ("article", "preprint", "review", "conference", "book")
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Provider-agnostic constraints for a search.
+
+    Provider modules translate these into native query parameters so the API does the
+    filtering; `matches` is the post-filter fallback for whatever a provider cannot express.
+    An empty `types` tuple means any type; year bounds are inclusive.
+    """
+
+    open_access: bool = False
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    types: Tuple[str, ...] = ()
+    has_abstract: bool = False
+
+    def __post_init__(self) -> None:
+        unknown = [t for t in self.types if t not in PUBLICATION_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown publication types: {', '.join(unknown)}")
+        if self.year_from is not None and self.year_to is not None and self.year_from > self.year_to:
+            raise ValueError("year_from must not be after year_to")
+
+    @property
+    def is_empty(self) -> bool:
+        return self == SearchFilters()
+
+    def with_options(self, **changes) -> "SearchFilters":
+        return replace(self, **changes)
+
+    def cache_key(self) -> Dict[str, Any]:
+        """Only the constraints that are set, so unfiltered searches keep their old cache keys."""
+
+        key: Dict[str, Any] = {}
+        if self.open_access:
+            key["oa"] = True
+        if self.year_from is not None:
+            key["from"] = self.year_from
+        if self.year_to is not None:
+            key["to"] = self.year_to
+        if self.types:
+            key["types"] = sorted(self.types)
+        if self.has_abstract:
+            key["abstract"] = True
+        return key
+
+    def matches(self, record: PaperRecord) -> bool:
+        if self.open_access and not record.open_access_pdf_url:
+            return False
+        if self.year_from is not None or self.year_to is not None:
+            if record.year is None:
+                return False
+            if self.year_from is not None and record.year < self.year_from:
+                return False
+            if self.year_to is not None and record.year > self.year_to:
+                return False
+        if self.types and record.publication_type not in self.types:
+            return False
+        if self.has_abstract and not record.abstract:
+            return False
+        return True
+
+    def native_types(self, mapping: Dict[str, Optional[str]]) -> Optional[Tuple[str, ...]]:
+        """Translate `types` through a provider mapping (canonical -> native, None if unsupported).
+
+        Returns () when no type constraint applies and None when the provider carries none of
+        the requested types, i.e. the request would be wasted.
+        """
+
+        if not self.types:
+            return ()
+        native = tuple(mapping[t] for t in self.types if mapping.get(t))
+        return native or None
+
+
+def combine_filters(filters: Optional[SearchFilters], open_access_only: bool = False) -> Optional[SearchFilters]:
+    """Fold the legacy open_access_only flag into a filter spec; None when nothing applies."""
+
+    if open_access_only:
+        filters = (filters or SearchFilters()).with_options(open_access=True)
+    if filters is None or filters.is_empty:
+        return None
+    return filters
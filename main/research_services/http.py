@@ -1,77 +1,342 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import importlib.util
+import ipaddress
 import os
-from typing import Any, Dict, Optional
+import socket
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, TypeVar
 
 import httpx
 
+from .metrics import record_http_attempt, record_http_retry, record_parse_failure
+from .ratelimit import get_limiter, parse_retry_after
+from .retry import DEFAULT_RETRY_POLICY, RetryEvent, RetryPolicy
+
 
 DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
-DEFAULT_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
-DEFAULT_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+# HTTP/2 and brotli need optional packages (`h2`, `brotli`); fall back quietly without them.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None or importlib.util.find_spec("brotlicffi") is not None
+DEFAULT_HTTP2 = HTTP2_AVAILABLE and os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+T = TypeVar("T")
+
+try:
+    import orjson
+
+    def loads_json(data: bytes) -> Any:
+        """Decode JSON straight from bytes (orjson when installed; no intermediate str)."""
+        return orjson.loads(data)
+except ImportError:  # pragma: no cover - optional speedup
+    import json as _json
+
+    def loads_json(data: bytes) -> Any:
+        """Decode JSON straight from bytes (orjson when installed; no intermediate str)."""
+        return _json.loads(data)
+
+
+def _accept_encoding() -> str:
+    return "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+
+class UnsafeUrlError(ValueError):
+    """A public-only request (or one of its redirects) pointed at a private, loopback or link-local address."""
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return not (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast or ip.is_unspecified)
+
+
+async def _check_public_destination(request: httpx.Request) -> None:
+    """Request hook: refuse public_only requests to internal hosts. Runs again for every redirect."""
+
+    if not request.extensions.get("public_only"):
+        return
+    host = request.url.host
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return  # Unresolvable: the connection attempt fails on its own.
+        addresses = [info[4][0] for info in infos]
+    if request.url.scheme not in ("http", "https") or not all(_is_public_address(a) for a in addresses):
+        raise UnsafeUrlError(f"refusing to fetch {request.url}: not a public http(s) address")
 
 
 class HttpClient:
-    """Lightweight async HTTP client with retry + exponential backoff.
+    """Lightweight async HTTP client with per-host rate limiting and policy-driven retries.
 
-    Designed to keep dependencies minimal and stay framework-agnostic.
+    Designed to keep dependencies minimal and stay framework-agnostic. Prefer
+    `get_shared_client()` over constructing one per call so connections are reused.
     """
 
-    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
-        self._client = httpx.AsyncClient(timeout=timeout, follow_redirects=True)
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        limits: Optional[httpx.Limits] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    ):
+        if limits is None:
+            limits = httpx.Limits(
+                max_connections=DEFAULT_MAX_CONNECTIONS,
+                max_keepalive_connections=DEFAULT_MAX_KEEPALIVE,
+                keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+            )
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=limits,
+            http2=DEFAULT_HTTP2 if http2 is None else (http2 and HTTP2_AVAILABLE),
+            headers={"Accept-Encoding": _accept_encoding()},
+            transport=transport,
+            event_hooks={"request": [_check_public_destination]},
+        )
+        self.retry_policy = retry_policy
+        self._shared = False
+
+    @property
+    def is_shared(self) -> bool:
+        return self._shared
 
     async def aclose(self) -> None:
+        # Shared clients outlive their callers; close them with close_shared_client().
+        if self._shared:
+            return
         await self._client.aclose()
 
-    async def get_json(
+    async def _request(
         self,
+        method: str,
         url: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
-        retries: int = DEFAULT_RETRIES,
-        backoff_base: float = DEFAULT_BACKOFF_BASE,
-    ) -> Dict[str, Any]:
+        json: Any = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        stream: bool = False,
+        public_only: bool = False,
+    ) -> httpx.Response:
+        """Send a request with per-host rate limiting, Retry-After handling and policy-driven retries.
+
+        The policy's `max_elapsed` is the total budget for this call, including queueing for the
+        rate limiter and sleeping between attempts. With stream=True the body is not read and the
+        caller must close the returned response. With public_only=True, the URL and every redirect
+        must resolve to public addresses, else UnsafeUrlError (for URLs supplied by users).
+        """
+
+        policy = retry_policy or self.retry_policy
+        limiter = get_limiter(url)
+        expires_at = time.monotonic() + policy.max_elapsed if policy.max_elapsed else None
         attempt = 0
         while True:
+            if limiter is not None:
+                await limiter.acquire(expires_at)
+            retry_after: Optional[float] = None
+            resp: Optional[httpx.Response] = None
+            started = time.monotonic()
             try:
-                resp = await self._client.get(url, params=params, headers=headers)
+                request = self._client.build_request(
+                    method, url, params=params, headers=headers, json=json, extensions={"public_only": True} if public_only else None
+                )
+                try:
+                    resp = await self._client.send(request, stream=stream)
+                except httpx.HTTPError as exc:
+                    record_http_attempt(url, time.monotonic() - started, None, timed_out=isinstance(exc, httpx.TimeoutException))
+                    raise
+                record_http_attempt(url, time.monotonic() - started, resp.status_code)
+                if resp.status_code in (429, 503):
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if retry_after is not None and limiter is not None:
+                        limiter.block_for(retry_after)
                 resp.raise_for_status()
-                return resp.json()
-            except httpx.HTTPError:
-                if attempt >= retries:
+                return resp
+            except httpx.HTTPError as exc:
+                if stream and resp is not None:
+                    await resp.aclose()
+                status = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else None
+                delay = retry_after if retry_after is not None else policy.backoff(attempt)
+                event = RetryEvent(method=method, url=url, attempt=attempt, error=exc, delay=delay, status_code=status)
+                out_of_budget = expires_at is not None and time.monotonic() + delay > expires_at
+                if attempt >= policy.max_retries or out_of_budget or not policy.is_retryable(method, exc):
+                    policy.notify_giveup(event)
                     raise
-                await asyncio.sleep(backoff_base * (2 ** attempt))
+                policy.notify_retry(event)
+                record_http_retry(url, status, exc)
+                if retry_after is None or limiter is None:
+                    # With a limiter the host is already blocked until Retry-After elapses.
+                    await asyncio.sleep(delay)
                 attempt += 1
 
+    @staticmethod
+    def _decode(url: str, resp: httpx.Response) -> Any:
+        try:
+            return loads_json(resp.content)
+        except ValueError:
+            record_parse_failure(url)
+            raise
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Dict[str, Any]:
+        resp = await self._request("GET", url, params=params, headers=headers, retry_policy=retry_policy)
+        return self._decode(url, resp)
+
+    async def post_json(
+        self,
+        url: str,
+        json: Any,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> Any:
+        resp = await self._request("POST", url, params=params, headers=headers, json=json, retry_policy=retry_policy)
+        return self._decode(url, resp)
+
     async def get_text(
         self,
         url: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
-        retries: int = DEFAULT_RETRIES,
-        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        retry_policy: Optional[RetryPolicy] = None,
     ) -> str:
-        attempt = 0
-        while True:
-            try:
-                resp = await self._client.get(url, params=params, headers=headers)
-                resp.raise_for_status()
-                return resp.text
-            except httpx.HTTPError:
-                if attempt >= retries:
-                    raise
-                await asyncio.sleep(backoff_base * (2 ** attempt))
-                attempt += 1
+        resp = await self._request("GET", url, params=params, headers=headers, retry_policy=retry_policy)
+        return resp.text
+
+    async def stream_bytes(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        chunk_size: Optional[int] = None,
+        public_only: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """GET and yield the decoded body in chunks as it arrives.
 
+        Chunks are passed on as received unless `chunk_size` asks for re-chunking. Retries apply
+        until the response headers are accepted; once bytes are flowing, errors propagate.
+        """
 
-async def with_client(coro_func, *args, **kwargs):
-    """Helper to use HttpClient without manual lifecycle management."""
+        resp = await self._request(
+            "GET", url, params=params, headers=headers, retry_policy=retry_policy, stream=True, public_only=public_only
+        )
+        try:
+            async for chunk in resp.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await resp.aclose()
 
-    client = HttpClient()
-    try:
-        return await coro_func(client, *args, **kwargs)
-    finally:
-        await client.aclose()
 
+# httpx connection pools are bound to the event loop that created them, so "shared" means
+# one client per loop. Entries disappear together with their loop.
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpClient]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_client() -> HttpClient:
+    """Return the pooled HttpClient for the running event loop, creating it on first use."""
+
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None:
+        client = HttpClient()
+        client._shared = True
+        _shared_clients[loop] = client
+    return client
+
+
+async def close_shared_client() -> None:
+    """Close the running loop's pooled client (e.g. on worker shutdown)."""
+
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client._client.aclose()
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="research-services-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_in_background(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the process-wide research loop and block until it finishes.
+
+    Sync callers (Django views, management commands) use this instead of async_to_sync so
+    that every request reuses the same loop and therefore the same connection pool.
+    """
+
+    async def go() -> T:
+        return await coro
+
+    return asyncio.run_coroutine_threadsafe(go(), _get_background_loop()).result()
+
+
+def schedule_in_background(coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+    """Start a coroutine on the process-wide research loop without waiting for it.
+
+    Unlike a task on the caller's loop, it survives callers that run under asyncio.run or
+    async_to_sync and close their loop as soon as they return.
+    """
+
+    async def go() -> T:
+        return await coro
+
+    return asyncio.run_coroutine_threadsafe(go(), _get_background_loop())
+
+
+def run_sync(coro_func, *args, **kwargs):
+    """Call coro_func(shared_client, *args, **kwargs) on the process-wide loop."""
+
+    async def go():
+        return await coro_func(get_shared_client(), *args, **kwargs)
+
+    return run_in_background(go())
+
+
+async def run_async(coro_func, *args, **kwargs):
+    """Await coro_func(shared_client, *args, **kwargs) on the process-wide loop from another loop.
+
+    For async callers on short-lived loops (agent runs under async_to_sync): the call shares
+    the background loop's connection pool, in-flight requests and provider concurrency limits
+    with every other caller instead of getting a private set. Cancelling the caller cancels it.
+    """
+
+    async def go():
+        return await coro_func(get_shared_client(), *args, **kwargs)
+
+    if asyncio.get_running_loop() is _background_loop:
+        return await go()
+    return await asyncio.wrap_future(schedule_in_background(go()))
+
+
+async def with_client(coro_func, *args, **kwargs):
+    """Helper to use HttpClient without manual lifecycle management."""
 
+    return await coro_func(get_shared_client(), *args, **kwargs)
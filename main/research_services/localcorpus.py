@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .filters import SearchFilters
+from .http import HttpClient, loads_json
+from .merge import identity_keys
+from .openalex import work_to_record
+from .types import Author, PaperRecord, asdict_record, record_from_dict
+from .tokens import STOPWORDS
+
+
+DEFAULT_LOCAL_CORPUS_PATH = os.getenv(
+    "LOCAL_CORPUS_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "forgelore", "corpus.sqlite3"),
+)
+INGEST_BATCH_SIZE = 5000
+# The any-word fallback ranks only this many matches, so a query of common words does not
+# compute bm25 over most of the corpus.
+OR_CANDIDATES = int(os.getenv("LOCAL_CORPUS_OR_CANDIDATES", "2000"))
+# SQLite caps bound parameters per statement; key lookups are split into groups of this size.
+_KEY_GROUP = 500
+# Stored beside title/abstract; those two live in their own columns for the FTS index.
+_DATA_FIELDS = (
+    "source", "source_id", "authors", "published_date", "venue", "doi", "arxiv_id", "url",
+    "open_access_pdf_url", "fields_of_study", "topics", "citations_count", "references_count",
+)
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def arxiv_snapshot_record(item: Dict[str, Any]) -> Optional[PaperRecord]:
+    """One line of the arXiv OAI metadata snapshot (arxiv-metadata-oai-snapshot.json)."""
+
+    arxiv_id = item.get("id")
+    title = " ".join((item.get("title") or "").split())
+    if not arxiv_id or not title:
+        return None
+    published = None
+    versions = item.get("versions") or []
+    if versions and versions[0].get("created"):
+        try:
+            published = parsedate_to_datetime(versions[0]["created"]).date().isoformat()
+        except (TypeError, ValueError):
+            published = None
+    published = published or item.get("update_date")
+    authors = [
+        Author(name=" ".join(p for p in (parts[1], parts[0]) if p))
+        for parts in (item.get("authors_parsed") or [])
+        if parts and parts[0]
+    ]
+    return PaperRecord(
+        source="arxiv",
+        source_id=arxiv_id,
+        title=title,
+        abstract=" ".join((item.get("abstract") or "").split()),
+        authors=authors,
+        year=int(published[:4]) if published else None,
+        published_date=published,
+        venue=item.get("journal-ref") or "arXiv",
+        publication_type="preprint",
+        doi=item.get("doi") or None,
+        arxiv_id=arxiv_id,
+        url=f"https://arxiv.org/abs/{arxiv_id}",
+        open_access_pdf_url=f"https://arxiv.org/pdf/{arxiv_id}",
+        fields_of_study=(item.get("categories") or "").split(),
+    )
+
+
+# Snapshot format -> line parser.
+DUMP_FORMATS: Dict[str, Callable[[Dict[str, Any]], Optional[PaperRecord]]] = {
+    "openalex": work_to_record,
+    "arxiv": arxiv_snapshot_record,
+}
+
+
+def iter_dump_lines(path: str) -> Iterator[bytes]:
+    """Stream lines from a (optionally gzip-compressed) JSONL file without loading it."""
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as fh:
+        for line in fh:
+            if line.strip():
+                yield line
+
+
+def record_key(record: PaperRecord) -> str:
+    """Identity used to replace a paper on re-ingest: DOI, else arXiv id, else source:id."""
+
+    for key in identity_keys(record):
+        if not key.startswith("title:"):
+            return key
+    return f"{record.source}:{record.source_id}"
+
+
+@dataclass
+class IngestReport:
+    lines: int = 0
+    stored: int = 0
+    skipped: int = 0  # unparseable lines or records without a title
+
+
+class LocalCorpus:
+    """Paper metadata on disk (SQLite) with an FTS5 index over title and abstract.
+
+    Each paper is one row: title, abstract and the filterable fields in columns, everything
+    else as a compressed JSON blob. The FTS table is external-content, so text is stored once.
+    Writes go through one locked connection; searches use a read connection per thread, which
+    WAL lets run alongside each other and alongside an ingest.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCAL_CORPUS_PATH) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()  # guards the list only; never held while querying
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " id INTEGER PRIMARY KEY,"
+            " key TEXT NOT NULL UNIQUE,"
+            " title TEXT NOT NULL,"
+            " abstract TEXT NOT NULL,"
+            " year INTEGER,"
+            " open_access INTEGER NOT NULL,"
+            " publication_type TEXT,"
+            " data BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+            "title, abstract, content='papers', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can shut it from another thread.
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._lock:
+            self._conn.close()
+
+    # ---- ingest ------------------------------------------------------------
+
+    def _row(self, record: PaperRecord) -> Tuple:
+        data = zlib.compress(json.dumps(asdict_record(record, fields=_DATA_FIELDS), separators=(",", ":")).encode("utf-8"))
+        return (
+            record_key(record),
+            record.title,
+            record.abstract or "",
+            record.year,
+            int(bool(record.open_access_pdf_url)),
+            record.publication_type,
+            data,
+        )
+
+    def add_records(self, records: Iterable[PaperRecord]) -> int:
+        """Insert or replace a batch of records in one transaction; returns how many were written."""
+
+        rows = {row[0]: row for row in map(self._row, records)}  # last copy of a key in the batch wins
+        if not rows:
+            return 0
+        keys = list(rows)
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                for start in range(0, len(keys), _KEY_GROUP):
+                    group = keys[start:start + _KEY_GROUP]
+                    marks = ",".join("?" * len(group))
+                    # External-content FTS needs the old text to delete a replaced row's terms.
+                    conn.execute(
+                        "INSERT INTO papers_fts (papers_fts, rowid, title, abstract) "
+                        f"SELECT 'delete', id, title, abstract FROM papers WHERE key IN ({marks})",
+                        group,
+                    )
+                    conn.executemany(
+                        "INSERT INTO papers (key, title, abstract, year, open_access, publication_type, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                        "title = excluded.title, abstract = excluded.abstract, year = excluded.year, "
+                        "open_access = excluded.open_access, publication_type = excluded.publication_type, data = excluded.data",
+                        [rows[k] for k in group],
+                    )
+                    conn.execute(
+                        f"INSERT INTO papers_fts (rowid, title, abstract) SELECT id, title, abstract FROM papers WHERE key IN ({marks})",
+                        group,
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def ingest(
+        self,
+        lines: Iterable[bytes],
+        fmt: str,
+        batch_size: int = INGEST_BATCH_SIZE,
+        progress: Optional[Callable[[IngestReport], None]] = None,
+    ) -> IngestReport:
+        """Parse JSONL lines of a snapshot format and store them `batch_size` at a time.
+
+        Memory stays bounded by one batch, so dumps of any size can be streamed through.
+        """
+
+        parse = DUMP_FORMATS[fmt]
+        report = IngestReport()
+        batch: List[PaperRecord] = []
+        for line in lines:
+            report.lines += 1
+            try:
+                record = parse(loads_json(line))
+            except (ValueError, TypeError, AttributeError):
+                record = None
+            if record is None:
+                report.skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                report.stored += self.add_records(batch)
+                batch = []
+                if progress:
+                    progress(report)
+        report.stored += self.add_records(batch)
+        if progress:
+            progress(report)
+        return report
+
+    def optimize(self) -> None:
+        """Merge FTS segments after a bulk load (slow once, faster queries afterwards)."""
+
+        with self._lock:
+            self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('optimize')")
+
+    # ---- search ------------------------------------------------------------
+
+    @staticmethod
+    def _match(query: str, operator: str) -> str:
+        words = [w for w in _WORD.findall(query.lower()) if w not in STOPWORDS]
+        return f" {operator} ".join(f'"{w}"' for w in words)
+
+    @staticmethod
+    def _filter_sql(filters: Optional[SearchFilters]) -> Tuple[str, List[Any]]:
+        if filters is None:
+            return "", []
+        clauses: List[str] = []
+        params: List[Any] = []
+        if filters.open_access:
+            clauses.append("p.open_access = 1")
+        if filters.year_from is not None:
+            clauses.append("p.year >= ?")
+            params.append(filters.year_from)
+        if filters.year_to is not None:
+            clauses.append("p.year <= ?")
+            params.append(filters.year_to)
+        if filters.types:
+            clauses.append(f"p.publication_type IN ({','.join('?' * len(filters.types))})")
+            params.extend(filters.types)
+        if filters.has_abstract:
+            clauses.append("p.abstract != ''")
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def search(self, query: str, limit: int = 20, filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
+        """bm25-ranked papers matching every query word, or any word if none match all of them.
+
+        The any-word fallback ranks the first OR_CANDIDATES matching papers only.
+        """
+
+        where, params = self._filter_sql(filters)
+        expression = self._match(query, "AND")
+        if not expression:
+            return []
+        conn = self._reader()
+        select = (
+            "SELECT p.title, p.abstract, p.year, p.publication_type, p.data FROM papers_fts "
+            "JOIN papers p ON p.id = papers_fts.rowid WHERE papers_fts MATCH ?"
+        )
+        rows = conn.execute(
+            f"{select}{where} ORDER BY bm25(papers_fts, 5.0, 1.0) LIMIT ?",
+            [expression, *params, limit],
+        ).fetchall()
+        any_word = self._match(query, "OR")
+        if not rows and any_word != expression:
+            # Matches come back in rowid order, so a rowid bound (which FTS5 applies while
+            # scanning, unlike an IN list) keeps the first OR_CANDIDATES of them.
+            cutoff = conn.execute(
+                "SELECT MAX(rowid) FROM (SELECT papers_fts.rowid AS rowid FROM papers_fts "
+                f"JOIN papers p ON p.id = papers_fts.rowid WHERE papers_fts MATCH ?{where} LIMIT ?)",
+                [any_word, *params, OR_CANDIDATES],
+            ).fetchone()[0]
+            if cutoff is not None:
+                rows = conn.execute(
+                    f"{select} AND papers_fts.rowid <= ?{where} ORDER BY bm25(papers_fts, 5.0, 1.0) LIMIT ?",
+                    [any_word, cutoff, *params, limit],
+                ).fetchall()
+        records: List[PaperRecord] = []
+        for title, abstract, year, publication_type, data in rows:
+            fields = json.loads(zlib.decompress(data))
+            fields.update(title=title, abstract=abstract, year=year, publication_type=publication_type)
+            record = record_from_dict(fields)
+            # Keep where the metadata came from in source_id; the provider name is "local".
+            record.source_id = f"{record.source}:{record.source_id}"
+            record.source = "local"
+            records.append(record)
+        return records
+
+
+_corpus: Optional[LocalCorpus] = None
+_corpus_lock = threading.Lock()
+
+
+def get_local_corpus(path: str = DEFAULT_LOCAL_CORPUS_PATH) -> Optional[LocalCorpus]:
+    """The process-wide corpus, or None when nothing has been ingested at `path`."""
+
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None or _corpus.path != path:
+            if not os.path.exists(path):
+                return None
+            _corpus = LocalCorpus(path)
+        return _corpus
+
+
+async def search_local(
+    client: Optional[HttpClient],
+    query: str,
+    limit: int = 20,
+    filters: Optional[SearchFilters] = None,
+    corpus: Optional[LocalCorpus] = None,
+) -> List[PaperRecord]:
+    """Provider-shaped search over the local corpus (client is unused; kept for a uniform signature)."""
+
+    corpus = corpus or get_local_corpus()
+    if corpus is None:
+        return []
+    return await asyncio.to_thread(corpus.search, query, limit, filters)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .types import Author, PaperRecord
+
+
+# Higher priority sources win ties when choosing identity/bibliographic fields. Library records
+# (papers already in the local database) come first so a fused hit keeps its local id; the
+# offline bulk corpus is a possibly stale snapshot, so any live provider's copy wins over it.
+SOURCE_PRIORITY: Dict[str, int] = {"library": -1, "openalex": 0, "semanticscholar": 1, "doaj": 2, "arxiv": 3, "local": 4}
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)", re.IGNORECASE)
+_ARXIV_DOI = re.compile(r"^10\.48550/arxiv\.(.+)$", re.IGNORECASE)
+_ARXIV_VERSION = re.compile(r"v\d+$", re.IGNORECASE)
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    if not doi:
+        return None
+    value = _DOI_PREFIX.sub("", doi.strip()).lower()
+    return value or None
+
+
+def normalize_arxiv_id(arxiv_id: Optional[str]) -> Optional[str]:
+    if not arxiv_id:
+        return None
+    value = arxiv_id.strip().lower()
+    if value.startswith("arxiv:"):
+        value = value[len("arxiv:"):]
+    value = value.rsplit("/abs/", 1)[-1]
+    value = _ARXIV_VERSION.sub("", value)
+    return value or None
+
+
+def title_fingerprint(title: str, year: Optional[int]) -> Optional[str]:
+    folded = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii").lower()
+    tokens = _NON_ALNUM.sub(" ", folded).split()
+    if len(tokens) < 3:
+        # Very short titles ("Introduction", "Editorial") collide too easily.
+        return None
+    return f"{' '.join(tokens)}|{year or ''}"
+
+
+def _identifiers(record: PaperRecord) -> Tuple[Optional[str], Optional[str]]:
+    """(normalized DOI, version-less arXiv ID); an arXiv-minted DOI counts as the arXiv ID."""
+
+    doi = normalize_doi(record.doi)
+    arxiv_id = normalize_arxiv_id(record.arxiv_id)
+    if doi:
+        m = _ARXIV_DOI.match(doi)
+        if m:
+            doi = None
+            arxiv_id = arxiv_id or normalize_arxiv_id(m.group(1))
+    return doi, arxiv_id
+
+
+def identity_keys(record: PaperRecord) -> List[str]:
+    """Keys under which two copies of the same paper meet: DOI, arXiv id and title fingerprint."""
+
+    keys: List[str] = []
+    doi, arxiv_id = _identifiers(record)
+    if doi:
+        keys.append(f"doi:{doi}")
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    fp = title_fingerprint(record.title, record.year)
+    if fp:
+        keys.append(f"title:{fp}")
+    return keys
+
+
+class _DisjointSet:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def fuse_records(members: List[PaperRecord]) -> PaperRecord:
+    """One record from copies of the same paper: the highest-priority source, gaps filled from the rest."""
+
+    ordered = sorted(members, key=lambda r: SOURCE_PRIORITY.get(r.source, len(SOURCE_PRIORITY)))
+    primary = ordered[0]
+
+    def first(attr: str):
+        for r in ordered:
+            value = getattr(r, attr)
+            if value:
+                return value
+        return None
+
+    def largest(attr: str) -> Optional[int]:
+        values = [getattr(r, attr) for r in ordered if getattr(r, attr) is not None]
+        return max(values) if values else None
+
+    authors: List[Author] = max((r.authors for r in ordered), key=len, default=[])
+    fields_of_study: List[str] = []
+    topics: List[str] = []
+    for r in ordered:
+        fields_of_study.extend(f for f in r.fields_of_study if f not in fields_of_study)
+        topics.extend(t for t in r.topics if t not in topics)
+
+    return PaperRecord(
+        source=primary.source,
+        source_id=primary.source_id,
+        title=first("title") or "",
+        abstract=max((r.abstract or "" for r in ordered), key=len),
+        authors=list(authors),
+        year=first("year"),
+        published_date=first("published_date"),
+        venue=first("venue"),
+        publication_type=first("publication_type"),
+        doi=first("doi"),
+        arxiv_id=first("arxiv_id"),
+        url=first("url"),
+        open_access_pdf_url=first("open_access_pdf_url"),
+        fields_of_study=fields_of_study,
+        topics=topics,
+        citations_count=largest("citations_count"),
+        references_count=largest("references_count"),
+        raw=primary.raw,
+        sources=sorted({s for r in ordered for s in (r.sources or [r.source])}, key=lambda s: SOURCE_PRIORITY.get(s, len(SOURCE_PRIORITY))),
+    )
+
+
+def cluster_records(grouped: Dict[str, Iterable[PaperRecord]]) -> List[List[Tuple[str, int, PaperRecord]]]:
+    """Group records that describe the same work, keeping each one's (provider, rank position).
+
+    Records are linked when they share a normalized DOI, a version-less arXiv ID, or a
+    title/year fingerprint; a title match is ignored when the two sides already carry different
+    DOIs or different arXiv IDs. Linking uses a hash index per key plus union-find, so the cost is
+    linear in the number of records. Clusters come out ordered by their best rank position
+    across providers.
+    """
+
+    members: List[Tuple[str, int, PaperRecord]] = []
+    rank: List[Tuple[int, int]] = []
+    for provider_index, (provider, items) in enumerate(grouped.items()):
+        for position, record in enumerate(items or []):
+            members.append((provider, position, record))
+            rank.append((position, provider_index))
+
+    sets = _DisjointSet(len(members))
+    # DOIs and arXiv IDs held by each cluster (by root), so a title match cannot fuse works
+    # that carry different identifiers, directly or through a chain of title matches.
+    identifiers: Dict[int, Tuple[Set[str], Set[str]]] = {}
+    for i, (_, _, record) in enumerate(members):
+        doi, arxiv_id = _identifiers(record)
+        identifiers[i] = ({doi} if doi else set(), {arxiv_id} if arxiv_id else set())
+
+    def conflicting(a: int, b: int) -> bool:
+        (dois_a, arxiv_a), (dois_b, arxiv_b) = identifiers[a], identifiers[b]
+        return bool(dois_a and dois_b and dois_a.isdisjoint(dois_b)) or bool(arxiv_a and arxiv_b and arxiv_a.isdisjoint(arxiv_b))
+
+    seen: Dict[str, int] = {}
+    for i, (_, _, record) in enumerate(members):
+        for key in identity_keys(record):
+            j = seen.setdefault(key, i)
+            ri, rj = sets.find(i), sets.find(j)
+            if ri == rj or (key.startswith("title:") and conflicting(ri, rj)):
+                continue
+            sets.union(ri, rj)
+            root, other = min(ri, rj), max(ri, rj)
+            identifiers[root][0].update(identifiers[other][0])
+            identifiers[root][1].update(identifiers[other][1])
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(members)):
+        clusters.setdefault(sets.find(i), []).append(i)
+
+    ordered_clusters = sorted(clusters.values(), key=lambda idxs: min(rank[i] for i in idxs))
+    return [[members[i] for i in idxs] for idxs in ordered_clusters]
+
+
+def fuse_cluster(cluster: List[Tuple[str, int, PaperRecord]]) -> PaperRecord:
+    return fuse_records([record for _, _, record in cluster])
+
+
+def merge_records(grouped: Dict[str, Iterable[PaperRecord]]) -> List[PaperRecord]:
+    """Cluster records that describe the same work and fuse each cluster into one record.
+
+    See cluster_records for how duplicates are found. Output is ordered by each cluster's best
+    rank position across providers, so the top hits of every provider surface first.
+    """
+
+    return [fuse_cluster(cluster) for cluster in cluster_records(grouped)]
+
+
+def drop_seen(records: Iterable[PaperRecord], seen: Set[str]) -> List[PaperRecord]:
+    """Records none of whose identity keys are in `seen`, adding the kept records' keys to it.
+
+    For results that arrive provider by provider (search_all_stream): pass the same `seen` to
+    every batch and each work is shown once, by the first provider that returned it.
+    """
+
+    kept: List[PaperRecord] = []
+    for record in records:
+        keys = identity_keys(record)
+        if any(key in seen for key in keys):
+            continue
+        seen.update(keys)
+        kept.append(record)
+    return kept
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import bisect
+import contextvars
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+METRICS_ENABLED = os.getenv("RESEARCH_METRICS_ENABLED", "true").lower() == "true"
+# Seconds; covers cache hits through arXiv's slowest pages.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics: `le` buckets plus _sum and _count)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts with a final +Inf slot, sum)
+        self._values: Dict[Labels, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(labels)
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines: List[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """Named counters and histograms, rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labels=labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels=labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """The process-wide registry the research services record into."""
+
+    return _registry
+
+
+HTTP_REQUESTS = _registry.counter("research_http_requests_total", "HTTP attempts by host and outcome (status code, timeout or error).", ("host", "outcome"))
+HTTP_LATENCY = _registry.histogram("research_http_request_seconds", "Latency of single HTTP attempts.", ("host",))
+HTTP_RETRIES = _registry.counter("research_http_retries_total", "Retried HTTP attempts by host and reason.", ("host", "reason"))
+HTTP_RATE_LIMITED = _registry.counter("research_http_rate_limited_total", "HTTP 429 responses by host.", ("host",))
+HTTP_PARSE_FAILURES = _registry.counter("research_http_parse_failures_total", "Response bodies that failed to parse (JSON or XML).", ("host",))
+PROVIDER_SEARCHES = _registry.counter("research_provider_searches_total", "search_all provider calls by outcome.", ("provider", "outcome"))
+PROVIDER_LATENCY = _registry.histogram("research_provider_search_seconds", "search_all provider call latency, including retries and cache hits.", ("provider",))
+PROVIDER_RECORDS = _registry.counter("research_provider_records_total", "Records returned by each provider.", ("provider",))
+PROVIDER_REQUESTS_ISSUED = _registry.counter("research_provider_requests_issued_total", "Provider requests that went out (not served by an identical one in flight).", ("provider",))
+PROVIDER_REQUESTS_COALESCED = _registry.counter("research_provider_requests_coalesced_total", "Provider requests served by an identical request already in flight.", ("provider",))
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).hostname or "unknown"
+
+
+@dataclass
+class CallStats:
+    """HTTP activity attributed to one provider call (see `track_calls`)."""
+
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    timeouts: int = 0
+
+
+@dataclass
+class ProviderDiagnostics:
+    """How one provider call in a search_all went; see GroupedResults.diagnostics."""
+
+    outcome: str  # ok | timeout | circuit_open | rate_limited | http_error | transport_error | parse_error | error
+    seconds: float
+    records: int = 0
+    requests: int = 0  # 0 for cache hits and calls coalesced onto another caller's request
+    retries: int = 0
+    rate_limited: int = 0
+    error: Optional[str] = None
+
+
+_call_stats: contextvars.ContextVar[Optional[CallStats]] = contextvars.ContextVar("research_call_stats", default=None)
+
+
+def track_calls(stats: Optional[CallStats]) -> contextvars.Token:
+    """Attribute HTTP activity in the current context (and tasks it starts) to `stats`; None stops attributing."""
+
+    return _call_stats.set(stats)
+
+
+def untrack_calls(token: contextvars.Token) -> None:
+    _call_stats.reset(token)
+
+
+def record_http_attempt(url: str, seconds: float, status: Optional[int], timed_out: bool = False) -> None:
+    if not METRICS_ENABLED:
+        return
+    host = host_of(url)
+    outcome = str(status) if status is not None else ("timeout" if timed_out else "error")
+    HTTP_REQUESTS.inc(host, outcome)
+    HTTP_LATENCY.observe(seconds, host)
+    if status == 429:
+        HTTP_RATE_LIMITED.inc(host)
+    stats = _call_stats.get()
+    if stats is not None:
+        stats.requests += 1
+        stats.rate_limited += status == 429
+        stats.timeouts += timed_out
+
+
+def record_http_retry(url: str, status: Optional[int], error: BaseException) -> None:
+    if not METRICS_ENABLED:
+        return
+    HTTP_RETRIES.inc(host_of(url), str(status) if status is not None else type(error).__name__)
+    stats = _call_stats.get()
+    if stats is not None:
+        stats.retries += 1
+
+
+def record_parse_failure(url: str) -> None:
+    if METRICS_ENABLED:
+        HTTP_PARSE_FAILURES.inc(host_of(url))
+
+
+def record_provider_call(provider: str, outcome: str, seconds: float, records: int) -> None:
+    if not METRICS_ENABLED:
+        return
+    PROVIDER_SEARCHES.inc(provider, outcome)
+    PROVIDER_LATENCY.observe(seconds, provider)
+    if records:
+        PROVIDER_RECORDS.inc(provider, amount=records)
+
+
+def record_coalescing(provider: str, coalesced: bool) -> None:
+    if METRICS_ENABLED:
+        (PROVIDER_REQUESTS_COALESCED if coalesced else PROVIDER_REQUESTS_ISSUED).inc(provider)
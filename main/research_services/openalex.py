@@ -1,15 +1,37 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
 
 from .http import HttpClient
+from .retry import DEFAULT_RETRY_POLICY
+from .filters import SearchFilters
+from .merge import normalize_doi
 from .types import Author, PaperRecord
 
 
 OPENALEX_BASE = "https://api.openalex.org"
+OPENALEX_RETRY_POLICY = DEFAULT_RETRY_POLICY
+# Only the top-level fields work_to_record reads; skips referenced_works, related_works, concepts, etc.
+OPENALEX_SELECT = (
+    "id,doi,title,display_name,type,publication_year,publication_date,primary_location,open_access,"
+    "authorships,abstract_inverted_index,topics,ids,cited_by_count,referenced_works_count"
+)
+# OpenAlex allows at most 50 OR-ed values in a single filter.
+OPENALEX_BATCH_SIZE = 50
+# Canonical publication type -> OpenAlex `type` values (OR-ed); OpenAlex has no conference type.
+OPENALEX_TYPES: Dict[str, Optional[str]] = {
+    "article": "article",
+    "preprint": "preprint",
+    "review": "review",
+    "conference": None,
+    "book": "book|book-chapter",
+}
+_TYPE_FROM_OPENALEX = {"article": "article", "preprint": "preprint", "review": "review", "book": "book", "book-chapter": "book"}
 
 
-def _to_record(work: Dict[str, Any]) -> Optional[PaperRecord]:
+def work_to_record(work: Dict[str, Any], include_raw: bool = False) -> Optional[PaperRecord]:
     title = work.get("title") or work.get("display_name") or ""
     if not title:
         return None
@@ -61,35 +83,176 @@ def _to_record(work: Dict[str, Any]) -> Optional[PaperRecord]:
         abstract=abstract,
         authors=authors,
         year=year,
+        published_date=work.get("publication_date"),
         venue=venue,
         doi=doi,
         url=url,
         open_access_pdf_url=pdf_url,
         topics=topics,
-        raw=work,
+        publication_type=_TYPE_FROM_OPENALEX.get(work.get("type") or ""),
+        citations_count=work.get("cited_by_count"),
+        references_count=work.get("referenced_works_count"),
+        raw=work if include_raw else {},
     )
 
 
-async def search_openalex(client: HttpClient, query: str, per_page: int = 25, page: int = 1, mailto: Optional[str] = None) -> List[PaperRecord]:
+def _filter_param(filters: Optional[SearchFilters]) -> Optional[str]:
+    """Translate filters into an OpenAlex `filter=` value ("" for none, None if nothing can match)."""
+
+    if filters is None:
+        return ""
+    types = filters.native_types(OPENALEX_TYPES)
+    if types is None:
+        return None
+    parts: List[str] = []
+    if filters.open_access:
+        parts.append("is_oa:true")
+    if filters.year_from is not None and filters.year_to is not None:
+        parts.append(f"publication_year:{filters.year_from}-{filters.year_to}")
+    elif filters.year_from is not None:
+        parts.append(f"publication_year:>{filters.year_from - 1}")
+    elif filters.year_to is not None:
+        parts.append(f"publication_year:<{filters.year_to + 1}")
+    if types:
+        parts.append("type:" + "|".join(types))
+    if filters.has_abstract:
+        parts.append("has_abstract:true")
+    return ",".join(parts)
+
+
+async def search_openalex(client: HttpClient, query: str, per_page: int = 25, page: int = 1, mailto: Optional[str] = None, include_raw: bool = False, filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
     url = f"{OPENALEX_BASE}/works"
+    native_filter = _filter_param(filters)
+    if native_filter is None:
+        return []
     params: Dict[str, Any] = {"search": query, "per_page": per_page, "page": page}
+    if native_filter:
+        params["filter"] = native_filter
     if mailto:
         params["mailto"] = mailto
-    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"})
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
     results: List[PaperRecord] = []
     for work in data.get("results", []) or []:
-        rec = _to_record(work)
+        rec = work_to_record(work, include_raw)
         if rec:
             results.append(rec)
     return results
 
 
-async def fetch_openalex_by_id(client: HttpClient, work_id: str, mailto: Optional[str] = None) -> Optional[PaperRecord]:
+async def search_openalex_page(client: HttpClient, query: str, per_page: int = 200, cursor: str = "*", mailto: Optional[str] = None, include_raw: bool = False, filters: Optional[SearchFilters] = None) -> Tuple[List[PaperRecord], Optional[str]]:
+    """Fetch one cursor page; returns (records, next_cursor). next_cursor is None at the end."""
+
+    url = f"{OPENALEX_BASE}/works"
+    native_filter = _filter_param(filters)
+    if native_filter is None:
+        return [], None
+    params: Dict[str, Any] = {"search": query, "per_page": per_page, "cursor": cursor}
+    if native_filter:
+        params["filter"] = native_filter
+    if mailto:
+        params["mailto"] = mailto
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
+    works = data.get("results", []) or []
+    results: List[PaperRecord] = []
+    for work in works:
+        rec = work_to_record(work, include_raw)
+        if rec:
+            results.append(rec)
+    next_cursor = (data.get("meta") or {}).get("next_cursor")
+    return results, (next_cursor if works else None)
+
+
+async def fetch_openalex_by_id(client: HttpClient, work_id: str, mailto: Optional[str] = None, include_raw: bool = False) -> Optional[PaperRecord]:
     url = f"{OPENALEX_BASE}/works/{work_id}"
     params: Dict[str, Any] = {}
     if mailto:
         params["mailto"] = mailto
-    work = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"})
-    return _to_record(work)
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    try:
+        work = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            return None
+        raise
+    return work_to_record(work, include_raw)
+
+
+async def _fetch_linked(client: HttpClient, filter_name: str, work_id: str, per_page: int, mailto: Optional[str], include_raw: bool) -> List[PaperRecord]:
+    url = f"{OPENALEX_BASE}/works"
+    params: Dict[str, Any] = {"filter": f"{filter_name}:{short_work_id(work_id)}", "per_page": per_page, "sort": "cited_by_count:desc"}
+    if mailto:
+        params["mailto"] = mailto
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
+    results: List[PaperRecord] = []
+    for work in data.get("results", []) or []:
+        rec = work_to_record(work, include_raw)
+        if rec:
+            results.append(rec)
+    return results
+
+
+async def fetch_openalex_references(client: HttpClient, work_id: str, per_page: int = 100, mailto: Optional[str] = None, include_raw: bool = False) -> List[PaperRecord]:
+    """Works cited by `work_id` (most cited first)."""
+
+    return await _fetch_linked(client, "cited_by", work_id, per_page, mailto, include_raw)
+
+
+async def fetch_openalex_citations(client: HttpClient, work_id: str, per_page: int = 100, mailto: Optional[str] = None, include_raw: bool = False) -> List[PaperRecord]:
+    """Works citing `work_id` (most cited first)."""
+
+    return await _fetch_linked(client, "cites", work_id, per_page, mailto, include_raw)
+
+
+def short_work_id(work_id: str) -> str:
+    # "https://openalex.org/W2741809807" -> "W2741809807"
+    return work_id.rstrip("/").rsplit("/", 1)[-1].upper()
+
+
+async def fetch_many_openalex(client: HttpClient, work_ids: Sequence[str], mailto: Optional[str] = None, include_raw: bool = False) -> List[Optional[PaperRecord]]:
+    """Fetch up to OPENALEX_BATCH_SIZE works with one pipe-separated filter; results follow input order."""
+
+    if not work_ids:
+        return []
+    url = f"{OPENALEX_BASE}/works"
+    params: Dict[str, Any] = {
+        "filter": "openalex:" + "|".join(short_work_id(w) for w in work_ids),
+        "per_page": len(work_ids),
+    }
+    if mailto:
+        params["mailto"] = mailto
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
+    by_id: Dict[str, PaperRecord] = {}
+    for work in data.get("results", []) or []:
+        rec = work_to_record(work, include_raw)
+        if rec:
+            by_id[short_work_id(rec.source_id)] = rec
+    return [by_id.get(short_work_id(w)) for w in work_ids]
 
 
+async def fetch_many_openalex_by_doi(client: HttpClient, dois: Sequence[str], mailto: Optional[str] = None, include_raw: bool = False) -> List[Optional[PaperRecord]]:
+    """Resolve up to OPENALEX_BATCH_SIZE DOIs to works with one request; results follow input order."""
+
+    if not dois:
+        return []
+    url = f"{OPENALEX_BASE}/works"
+    params: Dict[str, Any] = {"filter": "doi:" + "|".join(normalize_doi(d) or d for d in dois), "per_page": len(dois)}
+    if mailto:
+        params["mailto"] = mailto
+    if not include_raw:
+        params["select"] = OPENALEX_SELECT
+    data = await client.get_json(url, params=params, headers={"User-Agent": "ForgeLore/0.1"}, retry_policy=OPENALEX_RETRY_POLICY)
+    by_doi: Dict[str, PaperRecord] = {}
+    for work in data.get("results", []) or []:
+        rec = work_to_record(work, include_raw)
+        if rec and normalize_doi(rec.doi):
+            by_doi[normalize_doi(rec.doi)] = rec
+    return [by_doi.get(normalize_doi(d) or "") for d in dois]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from .http import HttpClient
+from .types import PaperRecord
+from .arxiv import search_arxiv_page
+from .filters import SearchFilters
+from .doaj import search_doaj_page
+from .openalex import search_openalex_page
+
+
+Token = TypeVar("Token")
+PageFetch = Callable[[Token], Awaitable[Tuple[List[PaperRecord], Optional[Token]]]]
+
+
+class _Budget:
+    def __init__(self, max_records: Optional[int], deadline: Optional[float]) -> None:
+        self.max_records = max_records
+        self.expires_at = time.monotonic() + deadline if deadline else None
+        self.emitted = 0
+
+    def remaining_time(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def wants_more(self, already_buffered: int = 0) -> bool:
+        if self.max_records is not None and self.emitted + already_buffered >= self.max_records:
+            return False
+        remaining = self.remaining_time()
+        return remaining is None or remaining > 0
+
+
+async def _paginate(
+    fetch_page: PageFetch,
+    first: Token,
+    max_records: Optional[int],
+    deadline: Optional[float],
+) -> AsyncIterator[PaperRecord]:
+    """Yield records page by page while the next page is already being fetched.
+
+    At most two pages are held at once (the one being consumed and the one in flight), so
+    memory stays flat however deep the harvest goes. Stops at the end of results, after
+    `max_records` records, or once `deadline` seconds have elapsed.
+    """
+
+    budget = _Budget(max_records, deadline)
+    pending: Optional[asyncio.Task] = asyncio.ensure_future(fetch_page(first))
+    try:
+        while pending is not None:
+            try:
+                records, next_token = await asyncio.wait_for(asyncio.shield(pending), budget.remaining_time())
+            except asyncio.TimeoutError:
+                return
+            pending = None
+            # Page fetchers decide where results end; a page can be empty after parsing and still have a successor.
+            if next_token is not None and budget.wants_more(len(records)):
+                pending = asyncio.ensure_future(fetch_page(next_token))
+            for record in records:
+                if not budget.wants_more():
+                    return
+                yield record
+                budget.emitted += 1
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def iter_openalex(
+    client: HttpClient,
+    query: str,
+    per_page: int = 200,
+    cursor: str = "*",
+    max_records: Optional[int] = None,
+    deadline: Optional[float] = None,
+    mailto: Optional[str] = None,
+    filters: Optional[SearchFilters] = None,
+) -> AsyncIterator[PaperRecord]:
+    """Stream OpenAlex works using cursor paging (no 10k offset ceiling)."""
+
+    async def fetch(token: str):
+        return await search_openalex_page(client, query=query, per_page=per_page, cursor=token, mailto=mailto, filters=filters)
+
+    async for record in _paginate(fetch, cursor, max_records, deadline):
+        yield record
+
+
+async def iter_arxiv(
+    client: HttpClient,
+    query: str,
+    page_size: int = 100,
+    start: int = 0,
+    max_records: Optional[int] = None,
+    deadline: Optional[float] = None,
+    filters: Optional[SearchFilters] = None,
+) -> AsyncIterator[PaperRecord]:
+    """Stream arXiv results using start/max_results offset paging."""
+
+    async def fetch(offset: int):
+        return await search_arxiv_page(client, query=query, start=offset, max_results=page_size, filters=filters)
+
+    async for record in _paginate(fetch, start, max_records, deadline):
+        yield record
+
+
+async def iter_doaj(
+    client: HttpClient,
+    query: str,
+    page_size: int = 100,
+    page: int = 1,
+    max_records: Optional[int] = None,
+    deadline: Optional[float] = None,
+    filters: Optional[SearchFilters] = None,
+) -> AsyncIterator[PaperRecord]:
+    """Stream DOAJ articles using page/pageSize paging."""
+
+    async def fetch(page_number: int):
+        return await search_doaj_page(client, query=query, page=page_number, page_size=page_size, filters=filters)
+
+    async for record in _paginate(fetch, page, max_records, deadline):
+        yield record
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, Optional
+
+from .http import HttpClient
+from .retry import DEFAULT_RETRY_POLICY
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PDF_STORE_PATH = os.getenv(
+    "PDF_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "forgelore", "pdfs"),
+)
+DEFAULT_PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(50 * 1024 * 1024)))
+DEFAULT_DOWNLOAD_CONCURRENCY = int(os.getenv("PDF_DOWNLOAD_CONCURRENCY", "4"))
+
+PDF_HEADERS = {"User-Agent": "ForgeLore/0.1", "Accept": "application/pdf"}
+# Publisher PDF links are often slow; give them longer than API calls.
+PDF_RETRY_POLICY = DEFAULT_RETRY_POLICY.with_options(max_retries=2, max_elapsed=120.0)
+
+
+class NotAPdfError(ValueError):
+    """The URL answered with something other than a PDF (typically an HTML landing page)."""
+
+
+class PdfStore:
+    """Content-addressed PDF storage: each file lives at <root>/<aa>/<bb>/<sha256>.pdf.
+
+    Identical PDFs reached through different URLs are stored once.
+    """
+
+    def __init__(self, root: str = DEFAULT_PDF_STORE_PATH) -> None:
+        self.root = root
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], f"{sha256}.pdf")
+
+    def has(self, sha256: str) -> bool:
+        return bool(sha256) and os.path.exists(self.path_for(sha256))
+
+    def _tempfile(self):
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.root, prefix=".incoming-", suffix=".pdf", delete=False)
+
+    def commit(self, temp_path: str, sha256: str) -> str:
+        """Move a finished download into place, dropping it if the content is already stored."""
+
+        final = self.path_for(sha256)
+        if os.path.exists(final):
+            os.unlink(temp_path)
+            return final
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(temp_path, final)
+        return final
+
+    def put_bytes(self, data: bytes) -> str:
+        sha256 = hashlib.sha256(data).hexdigest()
+        if not self.has(sha256):
+            with self._tempfile() as fh:
+                fh.write(data)
+            self.commit(fh.name, sha256)
+        return sha256
+
+
+async def download_pdf(
+    client: HttpClient,
+    url: str,
+    store: PdfStore,
+    max_bytes: int = DEFAULT_PDF_MAX_BYTES,
+) -> str:
+    """Stream one PDF into the store, hashing as it arrives, and return its SHA-256.
+
+    PDF links can come from users, so the URL and any redirect must point at a public host
+    (UnsafeUrlError otherwise).
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+    fh = store._tempfile()
+    try:
+        with fh:
+            async for chunk in client.stream_bytes(url, headers=PDF_HEADERS, retry_policy=PDF_RETRY_POLICY, public_only=True):
+                if size == 0 and not chunk.lstrip()[:5].startswith(b"%PDF"):
+                    raise NotAPdfError(f"{url} did not return a PDF")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"{url} exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                fh.write(chunk)
+        if size == 0:
+            raise NotAPdfError(f"{url} returned an empty body")
+        sha256 = digest.hexdigest()
+        store.commit(fh.name, sha256)
+        return sha256
+    except BaseException:
+        if os.path.exists(fh.name):
+            os.unlink(fh.name)
+        raise
+
+
+async def download_pdfs(
+    client: HttpClient,
+    urls: Iterable[str],
+    store: Optional[PdfStore] = None,
+    max_concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+    max_bytes: int = DEFAULT_PDF_MAX_BYTES,
+) -> Dict[str, Optional[str]]:
+    """Download many PDFs with at most `max_concurrency` in flight.
+
+    Returns url -> SHA-256, or None where the download failed. Each distinct URL is fetched once.
+    """
+
+    store = store or PdfStore()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    unique = list(dict.fromkeys(u for u in urls if u))
+
+    async def one(url: str) -> Optional[str]:
+        async with semaphore:
+            try:
+                return await download_pdf(client, url, store, max_bytes=max_bytes)
+            except Exception as exc:
+                logger.warning(f"PDF download failed for {url}: {exc}")
+                return None
+
+    hashes = await asyncio.gather(*(one(url) for url in unique))
+    return dict(zip(unique, hashes))
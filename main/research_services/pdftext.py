@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Documents longer than this are split into page ranges that extract in parallel.
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+
+def _page_count(path: str) -> int:
+    from pypdf import PdfReader
+
+    try:
+        return len(PdfReader(path).pages)
+    except Exception as exc:
+        logger.warning(f"Could not open PDF {path}: {exc}")
+        return 0
+
+
+def _extract_range(path: str, start: int, stop: int) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages: List[str] = []
+    for index in range(start, min(stop, len(reader.pages))):
+        try:
+            pages.append(reader.pages[index].extract_text() or "")
+        except Exception:
+            # One unreadable page should not lose the rest of the document.
+            continue
+    return "\n\n".join(p for p in pages if p)
+
+
+def _pool(max_workers: int) -> Executor:
+    # spawn, not fork: callers run inside Django with live threads (the research loop, DB connections).
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def extract_texts(
+    paths: Sequence[str],
+    max_workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+) -> Dict[str, str]:
+    """Extract text from many PDFs on a process pool; returns path -> text ("" on failure).
+
+    Page counts are read first, then every document is cut into ranges of `pages_per_task`
+    pages so one long book does not serialize the whole batch. max_workers=0 runs in-process.
+    """
+
+    unique = list(dict.fromkeys(paths))
+    if not unique:
+        return {}
+    workers = DEFAULT_EXTRACT_WORKERS if max_workers is None else max_workers
+    step = max(1, pages_per_task)
+
+    if workers <= 0:
+        counts = {p: _page_count(p) for p in unique}
+        return {p: _extract_range(p, 0, n) if n else "" for p, n in counts.items()}
+
+    with _pool(workers) as pool:
+        counts = dict(zip(unique, pool.map(_page_count, unique)))
+        ranges: Dict[str, List[Tuple[int, Future]]] = {}
+        for path, count in counts.items():
+            ranges[path] = [(start, pool.submit(_extract_range, path, start, start + step)) for start in range(0, count, step)]
+
+        texts: Dict[str, str] = {}
+        for path, futures in ranges.items():
+            parts: List[str] = []
+            for start, future in futures:
+                try:
+                    parts.append(future.result())
+                except Exception as exc:
+                    logger.warning(f"PDF text extraction failed for {path} pages {start}+: {exc}")
+            texts[path] = "\n\n".join(p for p in parts if p)
+    return texts
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from .http import HttpClient
+from .types import PaperRecord
+from .filters import SearchFilters
+from .ratelimit import RATE_POLICIES, RatePolicy, register_rate_policy, waiting_locally
+from .arxiv import ARXIV_BATCH_SIZE, fetch_many_arxiv, search_arxiv
+from .doaj import search_doaj
+from .semanticscholar import S2_BATCH_SIZE, fetch_many_semantic_scholar, search_semantic_scholar
+from .openalex import OPENALEX_BATCH_SIZE, fetch_many_openalex, search_openalex
+from .localcorpus import get_local_corpus, search_local
+
+
+T = TypeVar("T")
+
+# (client, query, limit, filters, mailto) -> records
+SearchCall = Callable[[HttpClient, str, int, Optional[SearchFilters], Optional[str]], Awaitable[List[PaperRecord]]]
+# (client, provider ids, mailto) -> records aligned with the ids, None where not found
+FetchCall = Callable[[HttpClient, Sequence[str], Optional[str]], Awaitable[List[Optional[PaperRecord]]]]
+
+
+@dataclass(frozen=True)
+class Provider:
+    """Everything search_all and fetch_many need to know about one literature source.
+
+    `max_concurrency` caps this provider's searches in flight per event loop, across all
+    concurrent search_all calls; extra calls queue. `rate_policy`, if given, is installed for
+    `host` on registration. `available` is checked per search (e.g. the local corpus only exists
+    once something was ingested).
+    """
+
+    name: str
+    search: SearchCall
+    fetch: Optional[FetchCall] = None
+    batch_size: int = 1
+    max_concurrency: Optional[int] = None
+    host: Optional[str] = None
+    rate_policy: Optional[RatePolicy] = None
+    available: Optional[Callable[[], bool]] = None
+
+    def is_available(self) -> bool:
+        return self.available is None or self.available()
+
+
+_registry: Dict[str, Provider] = {}
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[int, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def register_provider(provider: Provider) -> None:
+    """Add or replace a provider; registration order is the order results are reported in."""
+
+    if provider.host and provider.rate_policy is not None:
+        register_rate_policy(provider.host, provider.rate_policy)
+    with _lock:
+        _registry[provider.name] = provider
+
+
+def unregister_provider(name: str) -> None:
+    with _lock:
+        _registry.pop(name, None)
+
+
+def get_provider(name: str) -> Provider:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown provider {name!r}; registered: {', '.join(_registry)}") from None
+
+
+def provider_names() -> List[str]:
+    return list(_registry)
+
+
+def resolve_providers(names: Optional[Iterable[str]] = None) -> List[Provider]:
+    """The requested providers in registry order (all of them when `names` is None), skipping unavailable ones.
+
+    Unknown names raise ValueError rather than silently searching fewer sources.
+    """
+
+    if names is None:
+        selected = list(_registry.values())
+    else:
+        wanted = set(names)
+        for name in wanted:
+            get_provider(name)
+        selected = [p for p in _registry.values() if p.name in wanted]
+    return [p for p in selected if p.is_available()]
+
+
+async def limited(provider: Provider, call: Callable[[], Awaitable[T]]) -> T:
+    """Run `call` under the provider's concurrency limit (directly when it has none)."""
+
+    if not provider.max_concurrency:
+        return await call()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _semaphores.setdefault(loop, {})
+        entry = per_loop.get(provider.name)
+        if entry is None or entry[0] != provider.max_concurrency:
+            entry = (provider.max_concurrency, asyncio.Semaphore(provider.max_concurrency))
+            per_loop[provider.name] = entry
+    semaphore = entry[1]
+    with waiting_locally():
+        await semaphore.acquire()
+    try:
+        return await call()
+    finally:
+        semaphore.release()
+
+
+def _local_available() -> bool:
+    return get_local_corpus() is not None
+
+
+# Module-level names are looked up at call time, so tests can patch the provider functions here.
+register_provider(Provider(
+    name="local",
+    search=lambda c, q, n, f, m: search_local(c, query=q, limit=n, filters=f, corpus=get_local_corpus()),
+    max_concurrency=4,
+    available=_local_available,
+))
+register_provider(Provider(
+    name="arxiv",
+    search=lambda c, q, n, f, m: search_arxiv(c, query=q, max_results=n, filters=f),
+    fetch=lambda c, ids, m: fetch_many_arxiv(c, ids),
+    batch_size=ARXIV_BATCH_SIZE,
+    max_concurrency=2,
+    host="export.arxiv.org",
+    rate_policy=RATE_POLICIES.get("export.arxiv.org"),
+))
+register_provider(Provider(
+    name="doaj",
+    search=lambda c, q, n, f, m: search_doaj(c, query=q, page=1, page_size=n, filters=f),
+    max_concurrency=8,
+    host="doaj.org",
+    rate_policy=RATE_POLICIES.get("doaj.org"),
+))
+register_provider(Provider(
+    name="semanticscholar",
+    search=lambda c, q, n, f, m: search_semantic_scholar(c, query=q, limit=n, filters=f),
+    fetch=lambda c, ids, m: fetch_many_semantic_scholar(c, ids),
+    batch_size=S2_BATCH_SIZE,
+    max_concurrency=4,
+    host="api.semanticscholar.org",
+    rate_policy=RATE_POLICIES.get("api.semanticscholar.org"),
+))
+register_provider(Provider(
+    name="openalex",
+    search=lambda c, q, n, f, m: search_openalex(c, query=q, per_page=n, page=1, mailto=m, filters=f),
+    fetch=lambda c, ids, m: fetch_many_openalex(c, ids, mailto=m),
+    batch_size=OPENALEX_BATCH_SIZE,
+    max_concurrency=8,
+    host="api.openalex.org",
+    rate_policy=RATE_POLICIES.get("api.openalex.org"),
+))
+
+# Providers that answer in well under a second without an API key; the interactive search page
+# uses only these, agents search everything.
+FAST_PROVIDERS: Tuple[str, ...] = tuple(
+    name.strip() for name in os.getenv("SEARCH_FAST_PROVIDERS", "local,openalex,doaj").split(",") if name.strip()
+)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import datetime
+import heapq
+import math
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .types import PaperRecord
+from .merge import cluster_records, fuse_cluster
+
+
+# Standard RRF damping constant; larger values flatten the gap between top and lower ranks.
+RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+# Citation counts are log-scaled and saturate here, so one blockbuster does not drown relevance.
+CITATION_SATURATION = 1000
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    """Optional multiplicative boosts applied on top of the fused RRF score.
+
+    Each boost is a value in [0, 1] scaled by its weight, so with weights of 0.2 a paper can gain
+    at most 20% per signal; all zero (the default) is plain reciprocal rank fusion.
+    """
+
+    citations: float = 0.0
+    recency: float = 0.0
+    open_access: float = 0.0
+    recency_half_life: float = 5.0  # years until the recency boost halves
+
+    def boost(self, citations: Optional[int], year: Optional[int], has_pdf: bool, current_year: int) -> float:
+        factor = 1.0
+        if self.citations and citations:
+            factor += self.citations * min(1.0, math.log1p(citations) / math.log1p(CITATION_SATURATION))
+        if self.recency and year:
+            age = max(0, current_year - year)
+            factor += self.recency * 0.5 ** (age / self.recency_half_life)
+        if self.open_access and has_pdf:
+            factor += self.open_access
+        return factor
+
+
+DEFAULT_WEIGHTS = RankingWeights()
+
+
+def _score(cluster: List[Tuple[str, int, PaperRecord]], k: int, weights: RankingWeights, current_year: int) -> float:
+    # A provider that lists the same work twice only counts its best position.
+    best: Dict[str, int] = {}
+    for provider, position, _ in cluster:
+        best[provider] = min(position, best.get(provider, position))
+    rrf = sum(1.0 / (k + position + 1) for position in best.values())
+    # Boost signals mirror what fusion keeps: the largest citation count and any open PDF.
+    records = [record for _, _, record in cluster]
+    citations = max((r.citations_count or 0 for r in records), default=0)
+    year = next((r.year for r in records if r.year), None)
+    has_pdf = any(r.open_access_pdf_url for r in records)
+    return rrf * weights.boost(citations, year, has_pdf, current_year)
+
+
+def rank_records(
+    grouped: Dict[str, Iterable[PaperRecord]],
+    top_k: Optional[int] = 10,
+    weights: RankingWeights = DEFAULT_WEIGHTS,
+    k: int = RRF_K,
+    predicate: Optional[Callable[[PaperRecord], bool]] = None,
+) -> List[PaperRecord]:
+    """Fuse per-provider rankings with reciprocal rank fusion and return the global top-k.
+
+    Duplicates across providers are clustered first so agreement between providers adds up.
+    Clusters are scored cheaply from their members, then popped off a heap best-first; only
+    popped clusters are fused, and those failing `predicate` (e.g. a post-filter) are skipped
+    without costing a slot. top_k=None ranks everything.
+    """
+
+    current_year = datetime.date.today().year
+    heap: List[Tuple[float, int, List[Tuple[str, int, PaperRecord]]]] = []
+    for index, cluster in enumerate(cluster_records(grouped)):
+        heap.append((-_score(cluster, k, weights, current_year), index, cluster))
+
+    limit = len(heap) if top_k is None else max(0, top_k)
+    if predicate is None and limit < len(heap):
+        return [fuse_cluster(cluster) for _, _, cluster in heapq.nsmallest(limit, heap)]
+
+    heapq.heapify(heap)
+    ranked: List[PaperRecord] = []
+    while heap and len(ranked) < limit:
+        _, _, cluster = heapq.heappop(heap)
+        record = fuse_cluster(cluster)
+        if predicate is None or predicate(record):
+            ranked.append(record)
+    return ranked
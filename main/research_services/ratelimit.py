@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import email.utils
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Dict, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """Token-bucket policy for one host: `rate` requests per second with bursts up to `burst`."""
+
+    rate: float
+    burst: int = 1
+    max_retry_after: float = 60.0  # Never sleep longer than this for a single Retry-After
+
+
+# Published provider limits. Semantic Scholar is far stricter without an API key.
+RATE_POLICIES: Dict[str, RatePolicy] = {
+    "export.arxiv.org": RatePolicy(rate=1 / 3, burst=1),
+    "api.semanticscholar.org": (
+        RatePolicy(rate=1.0, burst=1) if os.getenv("SEMANTIC_SCHOLAR_API_KEY") else RatePolicy(rate=1 / 3, burst=1)
+    ),
+    "api.openalex.org": RatePolicy(rate=10.0, burst=10),
+    "doaj.org": RatePolicy(rate=2.0, burst=5),
+}
+
+
+def register_rate_policy(host: str, policy: RatePolicy) -> None:
+    RATE_POLICIES[host] = policy
+
+
+class LocalQueueTimeout(asyncio.TimeoutError):
+    """Gave up waiting for this process's own rate limit or concurrency cap, not for the provider."""
+
+
+class QueueClock:
+    """Elapsed time for one provider call, paused while it waits in a local queue.
+
+    Provider deadlines run on this clock (see resilience.guarded), so time spent behind our own
+    token buckets and semaphores is not held against the provider.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.monotonic()
+        self._paused = 0.0
+        self._waiting = 0
+        self._waiting_since = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self) -> None:
+        with self._lock:
+            if self._waiting == 0:
+                self._waiting_since = time.monotonic()
+            self._waiting += 1
+
+    def resume(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+            if self._waiting == 0:
+                self._paused += time.monotonic() - self._waiting_since
+
+    def elapsed(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            paused = self._paused + (now - self._waiting_since if self._waiting else 0.0)
+            return now - self._started - paused
+
+
+_queue_clock: contextvars.ContextVar[Optional[QueueClock]] = contextvars.ContextVar("queue_clock", default=None)
+
+
+def start_on_queue_clock(coro: Awaitable[T]) -> "Tuple[asyncio.Task[T], QueueClock]":
+    """Start `coro` as a task whose local waits (see waiting_locally) pause the returned clock."""
+
+    clock = QueueClock()
+    token = _queue_clock.set(clock)
+    try:
+        task = asyncio.ensure_future(coro)
+    finally:
+        _queue_clock.reset(token)
+    return task, clock
+
+
+@contextmanager
+def waiting_locally() -> Iterator[None]:
+    """Mark a wait on a local limiter, pausing the current provider call's deadline clock."""
+
+    clock = _queue_clock.get()
+    if clock is None:
+        yield
+        return
+    clock.pause()
+    try:
+        yield
+    finally:
+        clock.resume()
+
+
+class TokenBucket:
+    """Token bucket shared by every event loop and thread in the process.
+
+    Each waiter reserves the next free slot under a thread lock and then sleeps until it on its
+    own loop, so waiters are served in FIFO order and bursts queue instead of failing. Agent runs
+    (async_to_sync, one loop per run) and the background research loop draw on the same budget.
+    """
+
+    def __init__(self, policy: RatePolicy) -> None:
+        self.policy = policy
+        self._tokens = float(policy.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.policy.burst), self._tokens + (now - self._updated) * self.policy.rate)
+        self._updated = now
+
+    def _reserve(self, deadline: Optional[float]) -> float:
+        """Take a token, possibly one not yet refilled, and return the monotonic time it is due."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            due = max(now, self._blocked_until)
+            if self._tokens < 1.0:
+                due = max(due, now + (1.0 - self._tokens) / self.policy.rate)
+            if deadline is not None and due > deadline:
+                raise LocalQueueTimeout("rate limit wait exceeds request deadline")
+            self._tokens -= 1.0
+            return due
+
+    def _refund(self) -> None:
+        with self._lock:
+            self._tokens += 1.0
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """Wait for a token. Raises LocalQueueTimeout if it cannot be had before `deadline` (monotonic)."""
+
+        with waiting_locally():
+            await self._wait(deadline)
+
+    async def _wait(self, deadline: Optional[float]) -> None:
+        due = self._reserve(deadline)
+        try:
+            while True:
+                wait = due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                # A Retry-After that arrived while this waiter slept pushes it back too.
+                with self._lock:
+                    due = self._blocked_until
+                if due <= time.monotonic():
+                    return
+                if deadline is not None and due > deadline:
+                    raise LocalQueueTimeout("rate limit wait exceeds request deadline")
+        except BaseException:
+            self._refund()
+            raise
+
+    def block_for(self, seconds: float) -> None:
+        """Pause the whole host (e.g. after a 429 with Retry-After)."""
+
+        seconds = min(max(0.0, seconds), self.policy.max_retry_after)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+# One bucket per host for the whole process, whichever loop or thread the request comes from.
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url: str) -> Optional[TokenBucket]:
+    host = urlsplit(url).hostname or ""
+    policy = RATE_POLICIES.get(host)
+    if policy is None:
+        return None
+    with _limiters_lock:
+        bucket = _limiters.get(host)
+        if bucket is None or bucket.policy is not policy:
+            bucket = TokenBucket(policy)
+            _limiters[host] = bucket
+        return bucket
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds from now."""
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def jittered_backoff(attempt: int, base: float, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from .metrics import ProviderDiagnostics
+from .ratelimit import LocalQueueTimeout, QueueClock, start_on_queue_clock
+
+
+T = TypeVar("T")
+
+DEFAULT_PROVIDER_DEADLINE = float(os.getenv("SEARCH_PROVIDER_DEADLINE_SECONDS", "10"))
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+DEFAULT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# arXiv is throttled to one request every three seconds, so it needs more headroom.
+PROVIDER_DEADLINES: Dict[str, float] = {
+    "arxiv": DEFAULT_PROVIDER_DEADLINE * 2,
+    "doaj": DEFAULT_PROVIDER_DEADLINE,
+    "semanticscholar": DEFAULT_PROVIDER_DEADLINE,
+    "openalex": DEFAULT_PROVIDER_DEADLINE,
+}
+
+# Providers that get a duplicate request when the first one is slower than this many seconds.
+# Empty by default: hedging doubles the load on a provider, so opt in per deployment.
+HEDGE_AFTER: Dict[str, float] = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-provider breaker: closed -> open after repeated failures -> half-open probes -> closed.
+
+    While open, calls fail immediately. After `reset_timeout` seconds up to `half_open_max`
+    trial calls are let through; one success closes the circuit, one failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        half_open_max: int = 1,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, half_open_max)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        # Shared by the background loop and the per-call loops agent tools run in.
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trials = 0
+            if self._trials >= self.half_open_max:
+                return False
+            self._trials += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trials = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trials = 0
+
+    def release(self) -> None:
+        """Give back a half-open trial slot whose call was cancelled before it finished."""
+
+        with self._lock:
+            self._trials = max(0, self._trials - 1)
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider, creating it on first use."""
+
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[provider] = breaker
+        return breaker
+
+
+def reset_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+    """Run `call`, and start one duplicate if it has not finished after `hedge_after` seconds.
+
+    The first attempt to succeed wins and the other is cancelled. If both fail, the first
+    attempt's error is raised.
+    """
+
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return tasks[0].result()
+        tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        raise tasks[0].exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def guarded(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    deadline: Optional[float] = None,
+    hedge_after: Optional[float] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> T:
+    """Call a provider through its circuit breaker, with an optional deadline and hedging.
+
+    Raises CircuitOpenError without calling out while the breaker is open, and
+    asyncio.TimeoutError when the deadline passes. Both count as failures for the breaker. The
+    deadline clock stops while the call waits behind this process's own concurrency caps and
+    rate limits, and a LocalQueueTimeout from those leaves the breaker alone: neither says
+    anything about the provider.
+    """
+
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit is open")
+    try:
+        task, clock = start_on_queue_clock(hedged(call, hedge_after) if hedge_after else call())
+        result = await _within_deadline(task, clock, deadline)
+    except (asyncio.CancelledError, LocalQueueTimeout):
+        if breaker is not None:
+            breaker.release()
+        raise
+    except Exception as exc:
+        if breaker is not None:
+            if _is_provider_fault(exc):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+    if breaker is not None:
+        breaker.record_success()
+    return result
+
+
+async def _within_deadline(task: "asyncio.Task[T]", clock: QueueClock, deadline: Optional[float]) -> T:
+    """Await `task`, cancelling it once `clock` (which skips local queueing) passes `deadline`."""
+
+    try:
+        while deadline:
+            remaining = deadline - clock.elapsed()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, _ = await asyncio.wait({task}, timeout=remaining)
+            if done:
+                break
+        return await task
+    finally:
+        task.cancel()
+
+
+def _is_provider_fault(error: BaseException) -> bool:
+    # A 400 for a malformed query says nothing about the provider's health.
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status in (408, 429)
+    return True
+
+
+class GroupedResults(dict):
+    """search_all's return value: a plain source -> records dict plus per-provider errors.
+
+    Providers that failed, timed out or were skipped by an open breaker map to an empty list
+    and have a short reason in `errors`; `partial` is True when any provider is missing.
+    `diagnostics` holds per-provider outcome, latency, record count and HTTP activity.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.errors: Dict[str, str] = {}
+        self.diagnostics: Dict[str, ProviderDiagnostics] = {}
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.errors)
+
+
+def error_outcome(error: BaseException) -> str:
+    """Metric label for why a provider call failed."""
+
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, LocalQueueTimeout):
+        return "queue_timeout"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, httpx.HTTPStatusError):
+        return "rate_limited" if error.response.status_code == 429 else "http_error"
+    if isinstance(error, httpx.TransportError):
+        return "transport_error"
+    # Malformed JSON (ValueError), malformed XML (ParseError is a SyntaxError) or a missing field.
+    if isinstance(error, (ValueError, SyntaxError, KeyError, TypeError)):
+        return "parse_error"
+    return "error"
+
+
+def describe_error(error: BaseException) -> str:
+    if isinstance(error, CircuitOpenError):
+        return "circuit open"
+    if isinstance(error, LocalQueueTimeout):
+        return "local rate limit queue"
+    if isinstance(error, asyncio.TimeoutError):
+        return "deadline exceeded"
+    return type(error).__name__
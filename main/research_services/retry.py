@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field, replace
+from typing import Callable, FrozenSet, List, Optional, Tuple, Type
+
+import httpx
+
+from .ratelimit import jittered_backoff
+
+
+DEFAULT_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+DEFAULT_DEADLINE = float(os.getenv("HTTP_REQUEST_DEADLINE_SECONDS", "60"))
+
+RETRYABLE_STATUSES: FrozenSet[int] = frozenset({408, 425, 429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass(frozen=True)
+class RetryEvent:
+    """Passed to RetryPolicy hooks for every retry and for the final give-up."""
+
+    method: str
+    url: str
+    attempt: int
+    error: BaseException
+    delay: float = 0.0
+    status_code: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Decides which failures are worth retrying and how long to wait between attempts.
+
+    Client errors (400/401/403/404/...) are permanent and fail on the first attempt.
+    Transport errors, timeouts and the statuses in `retry_statuses` are retried with
+    full-jitter exponential backoff while `max_elapsed` seconds remain in the budget.
+    Non-idempotent methods are only retried when `retry_non_idempotent` is set.
+    """
+
+    max_retries: int = DEFAULT_RETRIES
+    backoff_base: float = DEFAULT_BACKOFF_BASE
+    backoff_cap: float = 30.0
+    max_elapsed: Optional[float] = DEFAULT_DEADLINE
+    retry_statuses: FrozenSet[int] = RETRYABLE_STATUSES
+    retry_exceptions: Tuple[Type[BaseException], ...] = (httpx.TransportError,)
+    retry_non_idempotent: bool = False
+    on_retry: Tuple[Callable[[RetryEvent], None], ...] = field(default_factory=tuple)
+    on_giveup: Tuple[Callable[[RetryEvent], None], ...] = field(default_factory=tuple)
+
+    def with_options(self, **changes) -> "RetryPolicy":
+        return replace(self, **changes)
+
+    def is_retryable(self, method: str, error: BaseException) -> bool:
+        if method.upper() not in IDEMPOTENT_METHODS and not self.retry_non_idempotent:
+            return False
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.retry_statuses
+        return isinstance(error, self.retry_exceptions)
+
+    def backoff(self, attempt: int) -> float:
+        return jittered_backoff(attempt, self.backoff_base, self.backoff_cap)
+
+    def notify_retry(self, event: RetryEvent) -> None:
+        for hook in self.on_retry:
+            hook(event)
+
+    def notify_giveup(self, event: RetryEvent) -> None:
+        for hook in self.on_giveup:
+            hook(event)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
 
 from .http import HttpClient
+from .retry import DEFAULT_RETRY_POLICY
+from .filters import SearchFilters
 from .types import Author, PaperRecord
 
 
 S2_BASE = "https://api.semanticscholar.org/graph/v1"
 S2_DEFAULT_FIELDS = (
     "title,abstract,venue,year,authors,externalIds,url,isOpenAccess,openAccessPdf,"
-    "citationCount,referenceCount,fieldsOfStudy"
+    "citationCount,referenceCount,fieldsOfStudy,publicationTypes"
 )
+# Result lists request exactly what _to_record maps (no embeddings, tldr, etc.), which is
+# already the default set; kept separate so the two can diverge.
+S2_SEARCH_FIELDS = S2_DEFAULT_FIELDS
+S2_RETRY_POLICY = DEFAULT_RETRY_POLICY
+# /paper/batch is a read-only POST, so retrying it is safe.
+S2_BATCH_RETRY_POLICY = DEFAULT_RETRY_POLICY.with_options(retry_non_idempotent=True)
+S2_BATCH_SIZE = 500
+# Canonical publication type -> S2 `publicationTypes` values; S2 has no preprint type.
+S2_TYPES: Dict[str, Optional[str]] = {
+    "article": "JournalArticle",
+    "preprint": None,
+    "review": "Review",
+    "conference": "Conference",
+    "book": "Book,BookSection",
+}
+_TYPE_FROM_S2 = {"Review": "review", "JournalArticle": "article", "Conference": "conference", "Book": "book", "BookSection": "book"}
 
 
 def _headers() -> Dict[str, str]:
@@ -22,7 +42,7 @@ def _headers() -> Dict[str, str]:
     return headers
 
 
-def _to_record(p: Dict[str, Any]) -> Optional[PaperRecord]:
+def _to_record(p: Dict[str, Any], include_raw: bool = False) -> Optional[PaperRecord]:
     title = p.get("title") or ""
     if not title:
         return None
@@ -42,6 +62,8 @@ def _to_record(p: Dict[str, Any]) -> Optional[PaperRecord]:
     fields = p.get("fieldsOfStudy") or []
     citations = p.get("citationCount")
     references = p.get("referenceCount")
+    # S2 lists several types (e.g. Review + JournalArticle); the first known one is the most specific.
+    publication_type = next((_TYPE_FROM_S2[t] for t in (p.get("publicationTypes") or []) if t in _TYPE_FROM_S2), None)
 
     authors_raw = p.get("authors") or []
     authors: List[Author] = []
@@ -62,31 +84,97 @@ def _to_record(p: Dict[str, Any]) -> Optional[PaperRecord]:
         arxiv_id=arxiv_id,
         url=url,
         open_access_pdf_url=open_pdf if is_oa else None,
+        publication_type=publication_type,
         fields_of_study=fields,
         citations_count=citations,
         references_count=references,
-        raw=p,
+        raw=p if include_raw else {},
     )
     return record
 
 
-async def search_semantic_scholar(client: HttpClient, query: str, limit: int = 20, fields: str = S2_DEFAULT_FIELDS) -> List[PaperRecord]:
+def _filter_params(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Translate filters into /paper/search params ({} for none, None if nothing can match)."""
+
+    if filters is None:
+        return {}
+    types = filters.native_types(S2_TYPES)
+    if types is None:
+        return None
+    params: Dict[str, Any] = {}
+    if filters.open_access:
+        params["openAccessPdf"] = ""
+    if filters.year_from is not None or filters.year_to is not None:
+        params["year"] = f"{filters.year_from or ''}-{filters.year_to or ''}"
+    if types:
+        params["publicationTypes"] = ",".join(types)
+    return params
+
+
+async def search_semantic_scholar(client: HttpClient, query: str, limit: int = 20, fields: str = S2_SEARCH_FIELDS, include_raw: bool = False, filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
     url = f"{S2_BASE}/paper/search"
-    params: Dict[str, Any] = {"query": query, "limit": limit, "fields": fields}
-    data = await client.get_json(url, params=params, headers=_headers())
+    native = _filter_params(filters)
+    if native is None:
+        return []
+    params: Dict[str, Any] = {"query": query, "limit": limit, "fields": fields, **native}
+    data = await client.get_json(url, params=params, headers=_headers(), retry_policy=S2_RETRY_POLICY)
     papers = data.get("data") or []
     results: List[PaperRecord] = []
     for p in papers:
-        rec = _to_record(p)
+        rec = _to_record(p, include_raw)
         if rec:
             results.append(rec)
     return results
 
 
-async def fetch_semantic_scholar_by_id(client: HttpClient, paper_id: str, fields: str = S2_DEFAULT_FIELDS) -> Optional[PaperRecord]:
+async def fetch_semantic_scholar_by_id(client: HttpClient, paper_id: str, fields: str = S2_DEFAULT_FIELDS, include_raw: bool = False) -> Optional[PaperRecord]:
     url = f"{S2_BASE}/paper/{paper_id}"
     params: Dict[str, Any] = {"fields": fields}
-    p = await client.get_json(url, params=params, headers=_headers())
-    return _to_record(p)
+    try:
+        p = await client.get_json(url, params=params, headers=_headers(), retry_policy=S2_RETRY_POLICY)
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            return None
+        raise
+    return _to_record(p, include_raw)
+
+
+async def _fetch_linked(client: HttpClient, paper_id: str, edge: str, key: str, limit: int, fields: str, include_raw: bool) -> List[PaperRecord]:
+    url = f"{S2_BASE}/paper/{paper_id}/{edge}"
+    try:
+        data = await client.get_json(url, params={"fields": fields, "limit": limit}, headers=_headers(), retry_policy=S2_RETRY_POLICY)
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            return []
+        raise
+    results: List[PaperRecord] = []
+    for item in data.get("data") or []:
+        rec = _to_record(item.get(key) or {}, include_raw)
+        if rec:
+            results.append(rec)
+    return results
+
+
+async def fetch_semantic_scholar_references(client: HttpClient, paper_id: str, limit: int = 100, fields: str = S2_SEARCH_FIELDS, include_raw: bool = False) -> List[PaperRecord]:
+    """Papers cited by `paper_id` (an S2 id or a prefixed external id such as "DOI:10.1/x")."""
+
+    return await _fetch_linked(client, paper_id, "references", "citedPaper", limit, fields, include_raw)
+
+
+async def fetch_semantic_scholar_citations(client: HttpClient, paper_id: str, limit: int = 100, fields: str = S2_SEARCH_FIELDS, include_raw: bool = False) -> List[PaperRecord]:
+    """Papers citing `paper_id`."""
+
+    return await _fetch_linked(client, paper_id, "citations", "citingPaper", limit, fields, include_raw)
+
+
+async def fetch_many_semantic_scholar(client: HttpClient, paper_ids: Sequence[str], fields: str = S2_DEFAULT_FIELDS, include_raw: bool = False) -> List[Optional[PaperRecord]]:
+    """Fetch up to S2_BATCH_SIZE papers via POST /paper/batch; results follow input order.
 
+    Ids may be S2 paper ids or prefixed external ids such as "DOI:10.1/x" or "ARXIV:2101.00001".
+    """
 
+    if not paper_ids:
+        return []
+    url = f"{S2_BASE}/paper/batch"
+    data = await client.post_json(url, json={"ids": list(paper_ids)}, params={"fields": fields}, headers=_headers(), retry_policy=S2_BATCH_RETRY_POLICY)
+    return [_to_record(p, include_raw) if p else None for p in (data or [])]
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# host -> (fixture file, results key in the JSON body, query param holding the page size)
+_JSON_FIXTURES: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "api.openalex.org": ("openalex_works.json", "results", ("per_page", "per-page")),
+    "api.semanticscholar.org": ("semanticscholar_search.json", "data", ("limit",)),
+    "doaj.org": ("doaj_articles.json", "results", ("pageSize",)),
+}
+_ARXIV_HOST = "export.arxiv.org"
+_ARXIV_FIXTURE = "arxiv_query.xml"
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Log-normal response latency described by its median and 99th percentile (seconds)."""
+
+    median: float = 0.0
+    p99: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        # z(0.99) ~= 2.326, so sigma puts p99 where it was asked for.
+        sigma = math.log(max(self.p99, self.median) / self.median) / 2.326
+        return rng.lognormvariate(math.log(self.median), sigma)
+
+
+@dataclass(frozen=True)
+class ProviderProfile:
+    """How one simulated provider behaves.
+
+    `error_rate` is the chance of a 503 per request. The first `burst_length` requests of every
+    window of `burst_every` get a 429 with a Retry-After of `retry_after` seconds, mimicking a
+    quota window that has just closed.
+    """
+
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    error_rate: float = 0.0
+    burst_every: int = 0
+    burst_length: int = 0
+    retry_after: float = 1.0
+
+
+class SimulatedTransport(httpx.AsyncBaseTransport):
+    """Offline stand-in for the provider APIs, for tests and benchmarks.
+
+    Pass it to HttpClient(transport=...). Search requests to arXiv, OpenAlex, Semantic Scholar
+    and DOAJ are answered from the recorded fixtures (truncated to the requested page size);
+    anything else gets a 404. Behaviour is deterministic for a given seed.
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, ProviderProfile]] = None,
+        default_profile: ProviderProfile = ProviderProfile(),
+        seed: int = 0,
+    ) -> None:
+        self.profiles = profiles or {}
+        self.default_profile = default_profile
+        self._rng = random.Random(seed)
+        self._counts: Dict[str, int] = {}
+        self.requests: List[httpx.Request] = []
+        self._json = {host: _load_json(name) for host, (name, _, _) in _JSON_FIXTURES.items()}
+        self._arxiv_head, self._arxiv_entries = _load_arxiv()
+
+    def profile_for(self, host: str) -> ProviderProfile:
+        return self.profiles.get(host, self.default_profile)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        host = request.url.host
+        profile = self.profile_for(host)
+        count = self._counts.get(host, 0)
+        self._counts[host] = count + 1
+
+        delay = profile.latency.sample(self._rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if profile.burst_every and count % profile.burst_every < profile.burst_length:
+            return httpx.Response(429, headers={"Retry-After": f"{profile.retry_after:g}"}, request=request)
+        if profile.error_rate and self._rng.random() < profile.error_rate:
+            return httpx.Response(503, request=request)
+
+        if host == _ARXIV_HOST:
+            limit = _int_param(request, ("max_results",), len(self._arxiv_entries))
+            body = self._arxiv_head + "".join(self._arxiv_entries[:limit]) + "</feed>\n"
+            return httpx.Response(200, content=body.encode("utf-8"), headers={"Content-Type": "application/atom+xml"}, request=request)
+        if host in self._json:
+            _, key, size_params = _JSON_FIXTURES[host]
+            data = self._json[host]
+            limit = _int_param(request, size_params, len(data[key]))
+            body = dict(data, **{key: data[key][:limit]})
+            return httpx.Response(200, content=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}, request=request)
+        return httpx.Response(404, request=request)
+
+
+def _load_json(name: str) -> Dict[str, Any]:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as fh:
+        return json.load(fh)
+
+
+def _load_arxiv() -> Tuple[str, List[str]]:
+    with open(os.path.join(FIXTURES_DIR, _ARXIV_FIXTURE), encoding="utf-8") as fh:
+        feed = fh.read()
+    entries = re.findall(r"\s*<entry>.*?</entry>\n", feed, flags=re.S)
+    head = feed[: feed.index("<entry>")].rstrip(" ")
+    return head, entries
+
+
+def _int_param(request: httpx.Request, names: Tuple[str, ...], default: int) -> int:
+    for name in names:
+        value = request.url.params.get(name)
+        if value is not None:
+            try:
+                return max(0, int(value))
+            except ValueError:
+                break
+    return default
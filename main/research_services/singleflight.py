@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .metrics import record_coalescing
+
+
+T = TypeVar("T")
+
+COALESCE_REQUESTS = os.getenv("SEARCH_COALESCE_REQUESTS", "true").lower() == "true"
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers asking for the same key.
+
+    The first caller for a key starts the call as a task; callers arriving while it runs
+    await the same task and get the same result or exception. Each waiter is shielded, so a
+    cancelled caller does not cancel the request for the others. Calls are tracked per event
+    loop (a task cannot be awaited from another loop). `issued`/`coalesced` count, per label,
+    how many calls went out and how many were served by one already in flight; with
+    `export_metrics` labelled calls are also counted in the Prometheus registry.
+    """
+
+    def __init__(self, export_metrics: bool = False) -> None:
+        self.export_metrics = export_metrics
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.issued: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    def _count(self, counter: Dict[str, int], label: str) -> None:
+        with self._lock:
+            counter[label] = counter.get(label, 0) + 1
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]], label: Optional[str] = None) -> T:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is None:
+            task = loop.create_task(call())
+            inflight[key] = task
+
+            def forget(done: asyncio.Task) -> None:
+                if inflight.get(key) is done:
+                    del inflight[key]
+                if not done.cancelled():
+                    done.exception()  # retrieved here so an unawaited failure is not logged as lost
+
+            task.add_done_callback(forget)
+            shared = False
+            self._count(self.issued, label or key)
+        else:
+            shared = True
+            self._count(self.coalesced, label or key)
+        if self.export_metrics and label:
+            record_coalescing(label, shared)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """{label: {"issued": n, "coalesced": m, "ratio": m / (n + m)}}."""
+
+        with self._lock:
+            labels = set(self.issued) | set(self.coalesced)
+            out = {}
+            for label in sorted(labels):
+                issued, coalesced = self.issued.get(label, 0), self.coalesced.get(label, 0)
+                out[label] = {"issued": issued, "coalesced": coalesced, "ratio": coalesced / (issued + coalesced)}
+            return out
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.issued.clear()
+            self.coalesced.clear()
+
+
+_default = SingleFlight(export_metrics=True)
+
+
+def get_singleflight() -> SingleFlight:
+    """The process-wide SingleFlight used for provider requests."""
+
+    return _default
+
+
+async def coalesced(key: str, call: Callable[[], Awaitable[T]], label: Optional[str] = None) -> T:
+    """Run `call` through the default SingleFlight (or directly when SEARCH_COALESCE_REQUESTS=false)."""
+
+    if not COALESCE_REQUESTS:
+        if label:
+            record_coalescing(label, False)
+        return await call()
+    return await _default.do(key, call, label)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+
+# Shared by the vector embedder, passage BM25 and the local corpus query builder, so a word
+# dropped by one of them is dropped by all.
+TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were we with which "
+    "our these those their not can also than then there been into such using used".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of `text` without stopwords and single characters."""
+
+    return [t for t in TOKEN.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 1]
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Author:
     """Represents a paper author with optional identifiers."""
 
@@ -13,12 +13,13 @@ class Author:
     affiliation: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PaperRecord:
     """Unified paper record across sources.
 
     The intent is to map different provider responses (arXiv, DOAJ, Semantic Scholar, OpenAlex)
-    into a common structure so downstream logic can be provider-agnostic.
+    into a common structure so downstream logic can be provider-agnostic. Slotted to keep
+    per-record memory small; `raw` stays empty unless a provider call asks for include_raw.
     """
 
     # Core identity
@@ -32,6 +33,7 @@ class PaperRecord:
     year: Optional[int] = None
     published_date: Optional[str] = None  # ISO date string if available
     venue: Optional[str] = None  # Journal, conference, or repository
+    publication_type: Optional[str] = None  # One of filters.PUBLICATION_TYPES when known
 
     # Identifiers and links
     doi: Optional[str] = None
@@ -44,33 +46,59 @@ class PaperRecord:
     topics: List[str] = field(default_factory=list)
     citations_count: Optional[int] = None
     references_count: Optional[int] = None
-    raw: Dict = field(default_factory=dict)  # Provider-specific payload for debugging
+    raw: Dict = field(default_factory=dict)  # Provider-specific payload for debugging (opt-in)
+    sources: List[str] = field(default_factory=list)  # Providers fused into this record (merge mode)
 
 
-def asdict_record(record: PaperRecord) -> Dict:
-    """Convert PaperRecord to a plain dict suitable for JSON serialization."""
+RECORD_FIELDS = tuple(f.name for f in fields(PaperRecord))
+
+
+def _author_dict(author: Author) -> Dict[str, Any]:
+    return {"name": author.name, "orcid": author.orcid, "affiliation": author.affiliation}
 
-    return {
-        "source": record.source,
-        "source_id": record.source_id,
-        "title": record.title,
-        "abstract": record.abstract,
-        "authors": [
-            {"name": a.name, "orcid": a.orcid, "affiliation": a.affiliation}
-            for a in record.authors
-        ],
-        "year": record.year,
-        "published_date": record.published_date,
-        "venue": record.venue,
-        "doi": record.doi,
-        "arxiv_id": record.arxiv_id,
-        "url": record.url,
-        "open_access_pdf_url": record.open_access_pdf_url,
-        "fields_of_study": record.fields_of_study,
-        "topics": record.topics,
-        "citations_count": record.citations_count,
-        "references_count": record.references_count,
-        "raw": record.raw,
-    }
 
+def asdict_record(record: PaperRecord, fields: Optional[Iterable[str]] = None) -> Dict:
+    """Convert PaperRecord to a plain dict suitable for JSON serialization.
 
+    Pass `fields` to project only the keys a caller needs (unknown names are ignored); nothing
+    else is read or copied.
+    """
+
+    out: Dict[str, Any] = {}
+    for name in (RECORD_FIELDS if fields is None else fields):
+        if name not in RECORD_FIELDS:
+            continue
+        value = getattr(record, name)
+        if name == "authors":
+            value = [_author_dict(a) for a in value]
+        out[name] = value
+    return out
+
+
+def record_from_dict(data: Dict) -> PaperRecord:
+    """Inverse of asdict_record; tolerant of missing keys."""
+
+    return PaperRecord(
+        source=data.get("source", ""),
+        source_id=data.get("source_id", ""),
+        title=data.get("title", ""),
+        abstract=data.get("abstract") or "",
+        authors=[
+            Author(name=a.get("name", ""), orcid=a.get("orcid"), affiliation=a.get("affiliation"))
+            for a in (data.get("authors") or [])
+        ],
+        year=data.get("year"),
+        published_date=data.get("published_date"),
+        venue=data.get("venue"),
+        publication_type=data.get("publication_type"),
+        doi=data.get("doi"),
+        arxiv_id=data.get("arxiv_id"),
+        url=data.get("url"),
+        open_access_pdf_url=data.get("open_access_pdf_url"),
+        fields_of_study=list(data.get("fields_of_study") or []),
+        topics=list(data.get("topics") or []),
+        citations_count=data.get("citations_count"),
+        references_count=data.get("references_count"),
+        raw=data.get("raw") or {},
+        sources=list(data.get("sources") or []),
+    )
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock; single-writer deployments only
+    fcntl = None
+
+from .tokens import tokenize
+
+
+DEFAULT_VECTOR_INDEX_PATH = os.getenv(
+    "VECTOR_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "forgelore", "vectors"),
+)
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "512"))
+# Below this many live rows an exact scan is already a few milliseconds; IVF only pays off above it.
+IVF_MIN_ROWS = int(os.getenv("VECTOR_IVF_MIN_ROWS", "50000"))
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+# Rows scored per matrix product during an exact scan; bounds the temporary score matrix.
+SEARCH_BLOCK_ROWS = 65536
+
+
+class HashingEmbedder:
+    """Embed text as signed feature hashes of word unigrams and bigrams (no model, no training).
+
+    Weights are sublinear term frequencies and vectors are L2-normalized, so a dot product is
+    the cosine similarity. Good at "same topic, overlapping vocabulary", which is what
+    finding a known paper or a related note needs.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = VECTOR_DIM) -> None:
+        self.dim = dim
+
+    def features(self, text: str) -> Counter:
+        tokens = tokenize(text)
+        feats = Counter(tokens)
+        feats.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat, tf in self.features(text).items():
+                h = zlib.crc32(feat.encode("utf-8"))
+                out[row, h % self.dim] += (1.0 + math.log(tf)) * (1.0 if h & 0x80000000 else -1.0)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+class VectorIndex:
+    """Append-only float32 vector store on disk with exact or IVF cosine top-k search.
+
+    Layout under `root`:
+      meta.json       dim and embedder name
+      vectors.f32     row-major float32 matrix, memory-mapped for search
+      keys.txt        one "<kind>:<id>\\t<digest>" line per row; "-<kind>:<id>" marks a deletion
+      ivf.npy         IVF centroids (optional, see build_ivf)
+      ivf.i32         IVF list of each row
+
+    Updating a key appends a new row and the old one stops being live; compact() rewrites the
+    files without dead rows. Rows are written before their keys, so a reader never sees a key
+    without its vector. Writers in different processes (every web worker indexes its own saves)
+    take an exclusive flock on `.lock`, so row N of vectors.f32 always belongs to line N of
+    keys.txt; readers do not lock and pick up appended rows on their next search.
+    """
+
+    def __init__(self, root: str = DEFAULT_VECTOR_INDEX_PATH, embedder: Optional[HashingEmbedder] = None) -> None:
+        self.root = root
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._lock = threading.RLock()
+        self._write_depth = 0
+        os.makedirs(root, exist_ok=True)
+        meta_path = self._path("meta.json")
+        meta = {"dim": self.dim, "embedder": self.embedder.name}
+        if os.path.exists(meta_path):
+            with open(meta_path) as fh:
+                stored = json.load(fh)
+            if stored != meta:
+                raise ValueError(f"Vector index at {root} was built with {stored}, not {meta}; rebuild it")
+        else:
+            with open(meta_path, "w") as fh:
+                json.dump(meta, fh)
+        self._reset_state()
+
+    # ---- files -------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the cross-process writer lock (re-entrant within this instance; call under self._lock).
+
+        Another process may have appended since our last look, so state is refreshed inside the
+        lock, and rows a crashed writer left without keys are cut off before appending.
+        """
+
+        if self._write_depth:
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+            return
+        with open(self._path(".lock"), "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._write_depth = 1
+            try:
+                ivf_path = self._path("ivf.npy")
+                self._centroids = np.load(ivf_path) if os.path.exists(ivf_path) else None
+                self._lists = None
+                self._refresh()
+                self._truncate(self._path("vectors.f32"), len(self._keys) * self.dim * 4)
+                self._truncate(self._path("ivf.i32"), len(self._keys) * 4)
+                yield
+            finally:
+                self._write_depth = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _truncate(path: str, size: int) -> None:
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _reset_state(self) -> None:
+        self._keys: List[str] = []
+        self._kinds: List[str] = []
+        self._kind_codes = np.zeros(0, dtype=np.int16)
+        self._live = np.zeros(0, dtype=bool)
+        self._latest: Dict[str, int] = {}
+        self._digests: Dict[str, str] = {}
+        self._keys_offset = 0
+        self._keys_file: Optional[Tuple[int, int]] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[List[np.ndarray]] = None
+        if os.path.exists(self._path("ivf.npy")):
+            self._centroids = np.load(self._path("ivf.npy"))
+
+    def _refresh(self) -> None:
+        """Read key lines appended since the last refresh (by this or another process)."""
+
+        path = self._path("keys.txt")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        # clear()/compact() in another process replaces the files; start over from the new ones.
+        file_id = (stat.st_dev, stat.st_ino) if stat else None
+        if file_id != self._keys_file or (stat and stat.st_size < self._keys_offset):
+            if self._keys:
+                self._reset_state()
+            self._keys_file = file_id
+        if stat is None or stat.st_size == self._keys_offset:
+            return
+        with open(path, "rb") as fh:
+            fh.seek(self._keys_offset)
+            chunk = fh.read()
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        self._keys_offset += len(complete)
+        lines = complete.decode("utf-8").splitlines()
+        start = len(self._keys)
+        codes = np.empty(len(lines), dtype=np.int16)
+        live = np.ones(len(lines), dtype=bool)
+        for i, line in enumerate(lines):
+            row = start + i
+            key, _, digest = line.partition("\t")
+            deleted = key.startswith("-")
+            key = key.lstrip("-")
+            kind = key.split(":", 1)[0]
+            if kind not in self._kinds:
+                self._kinds.append(kind)
+            codes[i] = self._kinds.index(kind)
+            previous = self._latest.get(key)
+            if previous is not None:
+                if previous >= start:
+                    live[previous - start] = False
+                else:
+                    self._live[previous] = False
+            self._keys.append(key)
+            if deleted:
+                live[i] = False
+                self._latest.pop(key, None)
+                self._digests.pop(key, None)
+            else:
+                self._latest[key] = row
+                self._digests[key] = digest
+        self._kind_codes = np.concatenate([self._kind_codes, codes])
+        self._live = np.concatenate([self._live, live])
+        self._matrix = None
+        self._lists = None
+
+    def _vectors(self) -> np.ndarray:
+        if self._matrix is None:
+            rows = len(self._keys)
+            if rows == 0:
+                self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._matrix
+
+    def _assignments(self) -> np.ndarray:
+        path = self._path("ivf.i32")
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=np.int32)
+        return np.fromfile(path, dtype=np.int32, count=len(self._keys))
+
+    # ---- writes ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._latest)
+
+    def digest(self, key: str) -> Optional[str]:
+        """Digest stored with the live row for `key`, so callers can skip re-embedding unchanged text."""
+
+        with self._lock:
+            self._refresh()
+            return self._digests.get(key)
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray, digests: Optional[Sequence[str]] = None) -> None:
+        """Append (or replace) vectors for keys of the form "<kind>:<id>"."""
+
+        if not len(keys):
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(keys), self.dim)
+        digests = digests or [""] * len(keys)
+        with self._lock, self._writing():
+            with open(self._path("vectors.f32"), "ab") as fh:
+                vectors.tofile(fh)
+            if self._centroids is not None:
+                with open(self._path("ivf.i32"), "ab") as fh:
+                    np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32).tofile(fh)
+            self._append_keys(f"{k}\t{d}" for k, d in zip(keys, digests))
+
+    def add_texts(self, keys: Sequence[str], texts: Sequence[str], digests: Optional[Sequence[str]] = None) -> None:
+        self.add(keys, self.embedder.embed(texts), digests)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        with self._lock, self._writing():
+            gone = [k for k in keys if k in self._latest]
+            if gone:
+                self.add([f"-{k}" for k in gone], np.zeros((len(gone), self.dim), dtype=np.float32))
+
+    def _append_keys(self, lines: Iterable[str]) -> None:
+        with open(self._path("keys.txt"), "a", encoding="utf-8") as fh:
+            fh.write("".join(f"{line}\n" for line in lines))
+        self._refresh()
+
+    def clear(self) -> None:
+        with self._lock, self._writing():
+            for name in ("vectors.f32", "keys.txt", "ivf.npy", "ivf.i32"):
+                if os.path.exists(self._path(name)):
+                    os.unlink(self._path(name))
+            self._reset_state()
+
+    def compact(self) -> None:
+        """Rewrite the index with live rows only (drops replaced and deleted rows)."""
+
+        with self._lock, self._writing():
+            rows = np.flatnonzero(self._live)
+            keys = [self._keys[i] for i in rows]
+            digests = [self._digests[k] for k in keys]
+            vectors = np.array(self._vectors()[rows])
+            had_ivf = self._centroids is not None
+            self.clear()
+            self.add(keys, vectors, digests)
+            if had_ivf:
+                self.build_ivf()
+
+    # ---- IVF ---------------------------------------------------------------
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, sample: int = 100_000, seed: int = 0) -> int:
+        """Partition live rows into `nlist` clusters (spherical k-means) for approximate search.
+
+        Defaults to about sqrt(rows) lists. Rows added later are assigned to their nearest
+        centroid as they are appended. Returns the number of lists.
+        """
+
+        with self._lock, self._writing():
+            live_rows = np.flatnonzero(self._live)
+            if not len(live_rows):
+                return 0
+            matrix = self._vectors()
+            nlist = max(1, min(nlist or int(math.sqrt(len(live_rows))), len(live_rows)))
+            rng = np.random.default_rng(seed)
+            train = matrix[np.sort(rng.choice(live_rows, size=min(sample, len(live_rows)), replace=False))]
+            centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(train @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = train[labels == c]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        norm = np.linalg.norm(centroid)
+                        centroids[c] = centroid / norm if norm else centroid
+            labels = np.empty(len(self._keys), dtype=np.int32)
+            for start in range(0, len(self._keys), SEARCH_BLOCK_ROWS):
+                block = matrix[start:start + SEARCH_BLOCK_ROWS]
+                labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            np.save(self._path("ivf.npy"), centroids)
+            labels.tofile(self._path("ivf.i32"))
+            self._centroids = centroids
+            self._lists = None
+            return nlist
+
+    def _ivf_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            labels = self._assignments()
+            order = np.argsort(labels, kind="stable")
+            bounds = np.searchsorted(labels[order], np.arange(len(self._centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self._centroids))]
+        return self._lists
+
+    # ---- search ------------------------------------------------------------
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        kinds: Optional[Iterable[str]] = None,
+        nprobe: Optional[int] = IVF_NPROBE,
+    ) -> List[List[Tuple[str, float]]]:
+        """Cosine top-k for a batch of query vectors; returns [(key, score), ...] per query.
+
+        Scans every live row in blocks (one matrix product per block) unless IVF centroids
+        exist, in which case only the `nprobe` nearest lists are scored. Pass nprobe=None to
+        force an exact scan. `kinds` restricts results to keys with those prefixes.
+        """
+
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            self._refresh()
+            matrix = self._vectors()
+            mask = self._live.copy()
+            if kinds is not None:
+                codes = [self._kinds.index(kind) for kind in kinds if kind in self._kinds]
+                mask &= np.isin(self._kind_codes, codes)
+            use_ivf = nprobe is not None and self._centroids is not None
+            lists = self._ivf_lists() if use_ivf else None
+            keys = self._keys
+
+        if not len(matrix) or k <= 0:
+            return [[] for _ in queries]
+        if use_ivf:
+            probes = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :nprobe]
+            results = []
+            for query, probe in zip(queries, probes):
+                rows = np.concatenate([lists[c] for c in probe])
+                rows = np.sort(rows[mask[rows]])
+                scores = matrix[rows] @ query
+                top = _top_k(scores, k)
+                results.append([(keys[rows[i]], float(scores[i])) for i in top])
+            return results
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(matrix), SEARCH_BLOCK_ROWS):
+            block_mask = mask[start:start + SEARCH_BLOCK_ROWS]
+            if not block_mask.any():
+                continue
+            scores = queries @ matrix[start:start + SEARCH_BLOCK_ROWS].T
+            scores[:, ~block_mask] = -np.inf
+            rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores, kind="stable")
+            results.append([(keys[rows[i]], float(scores[i])) for i in order if np.isfinite(scores[i])])
+        return results
+
+    def search_text(self, text: str, k: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        return self.search(self.embedder.embed([text]), k=k, kinds=kinds)[0]
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,83 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Literature, Note, Paper
+from .utils import fulltext
+from .utils.library_index import LIBRARY_INDEX_ON_SAVE, LITERATURE, NOTE, index_objects, remove_objects
+from .utils.passages import rebuild_passages
+
+
+logger = logging.getLogger(__name__)
+
+# Fields that feed the vector index (see utils.library_index.*_document).
+_INDEXED_FIELDS = {Literature: {"title", "abstract", "tags"}, Note: {"title", "body"}}
+_KINDS = {Literature: LITERATURE, Note: NOTE}
+_FULLTEXT_KINDS = {Literature: "literature", Note: "note", Paper: "paper"}
+_FULLTEXT_FIELDS = {
+    Literature: {"title", "authors", "journal_or_publisher", "doi", "arxiv_id", "tags", "abstract", "full_text"},
+    Note: {"title", "body"},
+    Paper: {"title", "abstract", "content_raw"},
+}
+
+
+@receiver(post_save, sender=Literature)
+def index_literature_passages(sender, instance: Literature, created: bool, update_fields=None, **kwargs):
+    """Keep LiteraturePassage rows in sync with full_text (no-op when the text is unchanged)."""
+
+    if update_fields is not None and "full_text" not in update_fields:
+        return
+    if created and not instance.full_text:
+        return
+    rebuild_passages(instance)
+
+
+def _on_commit(action, description: str) -> None:
+    def run():
+        try:
+            action()
+        except Exception as exc:
+            logger.warning(f"Library vector index update failed for {description}: {exc}")
+
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=Literature)
+@receiver(post_save, sender=Note)
+def index_library_vectors(sender, instance, update_fields=None, **kwargs):
+    """Embed the title/abstract (or note body) into the library vector index after commit."""
+
+    if not LIBRARY_INDEX_ON_SAVE:
+        return
+    if update_fields is not None and not _INDEXED_FIELDS[sender] & set(update_fields):
+        return
+    _on_commit(lambda: index_objects(_KINDS[sender], [instance]), f"{_KINDS[sender]} {instance.pk}")
+
+
+@receiver(post_delete, sender=Literature)
+@receiver(post_delete, sender=Note)
+def remove_library_vectors(sender, instance, **kwargs):
+    if not LIBRARY_INDEX_ON_SAVE:
+        return
+    pk = instance.pk
+    _on_commit(lambda: remove_objects(_KINDS[sender], [pk]), f"{_KINDS[sender]} {pk}")
+
+
+@receiver(post_save, sender=Literature)
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=Paper)
+def index_fulltext(sender, instance, update_fields=None, **kwargs):
+    """Mirror the row into the full-text table inside the same transaction."""
+
+    if update_fields is not None and not _FULLTEXT_FIELDS[sender] & set(update_fields):
+        return
+    fulltext.index_objects(_FULLTEXT_KINDS[sender], [instance])
+
+
+@receiver(post_delete, sender=Literature)
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=Paper)
+def remove_fulltext(sender, instance, **kwargs):
+    fulltext.remove_objects(_FULLTEXT_KINDS[sender], [instance.pk])
@@ -1,2 +1,10 @@
 # Make this directory a Python package so Django discovers test modules here.
+import atexit
+import os
+import shutil
+import tempfile
 
+# Views and agent tools use the process-wide search cache; keep test runs out of the developer's one.
+_cache_dir = tempfile.mkdtemp(prefix="forgelore-tests-")
+os.environ["SEARCH_CACHE_PATH"] = os.path.join(_cache_dir, "search_cache.sqlite3")
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
@@ -0,0 +1,344 @@
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from pydantic import BaseModel
+
+from agents_sdk.initial_research_agents import utilities
+from agents_sdk.initial_research_agents.tool_cache import tool_cache_scope
+from agents_sdk.response_cache import AgentCachePolicy, CachedRunner, RunnerCachePolicy, response_cache_scope
+from agents_sdk.initial_research_agents.tools import (
+    LinkLiteratureInput,
+    LiteratureReadRequest,
+    PassageSearchRequest,
+    LibrarySearchInput,
+    SimilarLiteratureInput,
+    _find_similar_literature_sync,
+    _link_literature_sync,
+    _search_library_sync,
+    _read_literature_sync,
+    _search_literature_passages_sync,
+)
+from main.models import Citation, Literature, LiteraturePassage, Note, Paper, Project
+from main.research_services import PaperRecord, SearchFilters
+from main.research_services.cache import MemoryCacheBackend
+from main.research_services.vectors import VectorIndex
+from main.utils.fulltext import matching_ids, rebuild_fulltext_index, search_fulltext
+from main.utils.library_index import library_search, rebuild_library_index, set_library_index
+from main.utils.passages import chunk_text
+
+
+def _paragraphs(topic: str, count: int) -> str:
+    return "\n\n".join(f"Section {i} discusses {topic} in some detail with filler words." * 8 for i in range(count))
+
+
+class PassageRetrievalTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="reader", password="pw")
+        self.project = Project.objects.create(owner=user, name="P", abstract="")
+        self.paper = Paper.objects.create(project=self.project, title="P")
+        text = _paragraphs("background material", 6) + "\n\nThe phonon lifetime measurement yields 42 ps at 4 K.\n\n" + _paragraphs("closing remarks", 6)
+        self.lit = Literature.objects.create(title="Phonons", abstract="About phonons.", full_text=text)
+        Citation.objects.create(paper=self.paper, literature=self.lit, order=1)
+
+    def test_chunks_are_built_on_save_and_rebuilt_when_text_changes(self):
+        first = list(LiteraturePassage.objects.filter(literature=self.lit).values_list("id", flat=True))
+        self.assertGreater(len(first), 3)
+        self.lit.title = "Renamed"
+        self.lit.save()
+        self.assertEqual(first, list(LiteraturePassage.objects.filter(literature=self.lit).values_list("id", flat=True)))
+        self.lit.full_text = "Short replacement text."
+        self.lit.save()
+        self.assertEqual(LiteraturePassage.objects.filter(literature=self.lit).count(), 1)
+
+    def test_read_with_query_returns_relevant_passage_within_budget(self):
+        result = _read_literature_sync(LiteratureReadRequest(literature_id=self.lit.id, max_chars=1500, query="phonon lifetime"))
+        self.assertIn("42 ps", result.content)
+        self.assertLessEqual(len(result.content), 1500)
+        plain = _read_literature_sync(LiteratureReadRequest(literature_id=self.lit.id, max_chars=1500))
+        self.assertNotIn("42 ps", plain.content)
+
+    def test_read_with_query_builds_missing_passages_and_falls_back_to_the_opening(self):
+        # Rows written with .update() (or before passages existed) have no passages.
+        Literature.objects.filter(pk=self.lit.pk).update(full_text=_paragraphs("intro", 2) + "\n\nThe phonon lifetime is 42 ps.")
+        LiteraturePassage.objects.filter(literature=self.lit).delete()
+        result = _read_literature_sync(LiteratureReadRequest(literature_id=self.lit.id, max_chars=4000, query="phonon lifetime"))
+        self.assertIn("42 ps", result.content)
+        self.assertTrue(LiteraturePassage.objects.filter(literature=self.lit).exists())
+
+        unmatched = _read_literature_sync(LiteratureReadRequest(literature_id=self.lit.id, max_chars=300, query="superconducting qubits"))
+        self.assertIn("Section 0 discusses intro", unmatched.content)
+
+    def test_rebuild_passages_command_backfills(self):
+        Literature.objects.filter(pk=self.lit.pk).update(full_text="Backfilled text about magnons.")
+        call_command("rebuild_passages", stdout=StringIO())
+        self.assertEqual(
+            list(LiteraturePassage.objects.filter(literature=self.lit).values_list("text", flat=True)), ["Backfilled text about magnons."]
+        )
+
+    def test_project_passage_search(self):
+        other = Literature.objects.create(title="Other", full_text=_paragraphs("unrelated optics", 3))
+        Citation.objects.create(paper=self.paper, literature=other, order=2)
+        hits = _search_literature_passages_sync(PassageSearchRequest(project_id=self.project.id, query="phonon lifetime", max_chars=2000))
+        self.assertEqual(hits[0].literature_id, self.lit.id)
+        self.assertEqual(hits[0].title, "Phonons")
+
+    def test_chunk_spans_cover_text(self):
+        text = "word " * 1000
+        spans = chunk_text(text, size=300, overlap=50)
+        self.assertEqual(spans[0][0], 0)
+        self.assertEqual(spans[-1][1], len(text))
+        self.assertTrue(all(b[0] < a[1] for a, b in zip(spans, spans[1:])))
+
+
+class LibraryIndexTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        set_library_index(VectorIndex(tmp.name))
+        self.addCleanup(set_library_index, None)
+        user = get_user_model().objects.create_user(username="lib", password="pw")
+        self.project = Project.objects.create(owner=user, name="P", abstract="")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.graphene = Literature.objects.create(title="Phonon transport in graphene nanoribbons", abstract="Thermal conductivity of graphene.", doi="10.1/g")
+            self.protein = Literature.objects.create(title="Protein folding kinetics", abstract="Folding rates of small proteins.")
+            self.note = Note.objects.create(project=self.project, title="Idea", body="Measure graphene thermal conductivity with phonons.")
+
+    def test_saves_are_indexed_and_found(self):
+        items = _find_similar_literature_sync(SimilarLiteratureInput(query="graphene phonon thermal conductivity", project_id=self.project.id, k=3))
+        self.assertEqual({(i.kind, i.id) for i in items[:2]}, {("literature", self.graphene.id), ("note", self.note.id)})
+        similar = _find_similar_literature_sync(SimilarLiteratureInput(literature_id=self.graphene.id, k=2))
+        self.assertNotIn(self.graphene.id, [i.id for i in similar])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.protein.delete()
+        self.assertEqual(library_search("protein folding kinetics", 5), [])
+
+    def test_library_search_returns_records_and_rebuild_is_idempotent(self):
+        records = library_search("phonon transport in graphene", 5)
+        self.assertEqual([(r.source, r.source_id, r.doi) for r in records], [("library", str(self.graphene.id), "10.1/g")])
+        self.assertEqual(rebuild_library_index(), 3)
+        self.assertEqual(library_search("phonon transport in graphene", 5)[0].title, self.graphene.title)
+
+
+ATTENTION_ABSTRACT = (
+    "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks that "
+    "include an encoder and a decoder. The best performing models also connect the encoder and decoder through an "
+    "attention mechanism. We propose a new simple network architecture, the Transformer, based solely on attention "
+    "mechanisms, dispensing with recurrence and convolutions entirely. Experiments on two machine translation tasks show "
+    "these models to be superior in quality while being more parallelizable and requiring significantly less time to "
+    "train. Our model achieves 28.4 BLEU on the WMT 2014 English-to-German translation task, improving over the existing "
+    "best results, including ensembles, by over 2 BLEU. On the WMT 2014 English-to-French translation task, our model "
+    "establishes a new single-model state-of-the-art BLEU score of 41.8 after training for 3.5 days on eight GPUs, a small "
+    "fraction of the training costs of the best models from the literature. We show that the Transformer generalizes well "
+    "to other tasks by applying it successfully to English constituency parsing both with large and limited training data."
+)
+
+
+class LibraryPrestageTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        set_library_index(VectorIndex(tmp.name))
+        self.addCleanup(set_library_index, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            # Realistic length: a full abstract and no open access link.
+            self.attention = Literature.objects.create(title="Attention Is All You Need", abstract=ATTENTION_ABSTRACT, year=2017)
+            Literature.objects.create(title="Protein folding kinetics", abstract="Folding rates of small proteins. " * 20)
+
+    def test_title_and_topical_queries_find_a_full_length_abstract(self):
+        oa = SearchFilters(open_access=True)
+        for query in ("attention is all you need", "transformer attention machine translation"):
+            self.assertEqual([r.source_id for r in library_search(query, 5, oa)], [str(self.attention.id)], query)
+        self.assertEqual(library_search("quantum error correction surface code", 5), [])
+        self.assertEqual(library_search("attention is all you need", 5, SearchFilters(year_to=2010)), [])
+
+
+class FullTextIndexTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="ft", password="pw")
+        self.project = Project.objects.create(owner=self.user, name="Mine", abstract="")
+        other = Project.objects.create(owner=get_user_model().objects.create_user(username="other", password="pw"), name="Theirs")
+        self.lit = Literature.objects.create(title="Superconducting qubits", abstract="Coherence of transmon devices.", doi="10.5555/xyz", tags="quantum")
+        self.note = Note.objects.create(project=self.project, title="Plan", body="Compare transmon coherence with fluxonium.")
+        self.hidden = Note.objects.create(project=other, title="Secret", body="Transmon notes from someone else.")
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertEqual(matching_ids("literature", "transmon"), [self.lit.id])
+        self.assertEqual(matching_ids("literature", "10.5555/xyz"), [self.lit.id])
+        self.lit.full_text = "Measurements of fluxonium relaxation."
+        self.lit.save(update_fields=["full_text"])
+        self.assertEqual(matching_ids("literature", "fluxonium"), [self.lit.id])
+        self.assertEqual(matching_ids("literature", 'fluxon "OR" NEAR('), [])
+        self.note.delete()
+        self.assertEqual({(h.kind, h.id) for h in search_fulltext("fluxonium")}, {("literature", self.lit.id)})
+        self.assertEqual(rebuild_fulltext_index(), 2)  # the literature row and the remaining note
+        self.assertEqual(matching_ids("note", "transmon"), [self.hidden.id])
+
+    def test_admin_view_and_tool_use_the_index(self):
+        admin = get_user_model().objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:main_literature_changelist"), {"q": "transmon coherence"})
+        self.assertContains(response, "Superconducting qubits")
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("library_search"), {"q": "transmon"})
+        self.assertContains(response, "<mark>transmon</mark>", html=False)
+        self.assertContains(response, "Plan")
+        self.assertNotContains(response, "Secret")
+
+        hits = _search_library_sync(LibrarySearchInput(query="coherence", project_id=self.project.id))
+        self.assertEqual({(h.kind, h.id) for h in hits}, {("literature", self.lit.id), ("note", self.note.id)})
+        self.assertNotIn("\x02", hits[0].snippet)
+
+    def test_admin_search_still_matches_relation_fields(self):
+        admin = get_user_model().objects.create_superuser(username="admin", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:main_note_changelist"), {"q": "theirs"})
+        self.assertContains(response, "Secret")
+        self.assertNotContains(response, "Plan")
+        response = self.client.get(reverse("admin:main_note_changelist"), {"q": "fluxonium"})
+        self.assertContains(response, "Plan")
+        self.assertNotContains(response, "Secret")
+
+
+class ToolCacheTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="agent", password="pw")
+        self.project = Project.objects.create(owner=user, name="Cached", abstract="")
+        self.other = Project.objects.create(owner=user, name="Other", abstract="")
+
+    def test_reads_are_cached_per_project_until_a_write(self):
+        async def run():
+            with tool_cache_scope() as cache:
+                first = await utilities.list_literature(self.project.id)
+                await utilities.list_literature(self.project.id)
+                await utilities.list_literature(self.other.id)
+                await utilities.get_paper(self.project.id)
+                await sync_to_async(_link_literature_sync)(LinkLiteratureInput(project_id=self.project.id, title="Linked", doi="10.1/linked"))
+                after = await utilities.list_literature(self.project.id)
+                await utilities.list_literature(self.other.id)
+                await utilities.get_paper(self.project.id)
+            outside = await utilities.list_literature(self.project.id)
+            return first, after, outside, cache.stats()
+
+        first, after, outside, stats = async_to_sync(run)()
+        self.assertEqual(first, [])
+        self.assertEqual([m.title for m in after], ["Linked"])
+        self.assertEqual(len(outside), 1)
+        self.assertEqual((stats.hits, stats.misses, stats.invalidations), (2, 5, 1))
+        self.assertEqual(stats.by_tool["get_paper"], {"hits": 0, "misses": 2})
+
+
+class LiteratureSearchStreamTests(TestCase):
+    def test_stream_shows_each_work_once(self):
+        user = get_user_model().objects.create_user(username="searcher", password="pw")
+        self.client.force_login(user)
+
+        def provider(source):
+            async def search(client, *args, **kwargs):
+                return [
+                    PaperRecord(source=source, source_id="1", title=f"Graphene phonons ({source})", doi="10.1/graphene"),
+                    PaperRecord(source=source, source_id="2", title=f"Only in {source}"),
+                ]
+            return search
+
+        with patch("main.research_services.providers.search_openalex", provider("openalex")), \
+                patch("main.research_services.providers.search_doaj", provider("doaj")):
+            response = self.client.get(reverse("literature_search_stream"), {"q": "graphene", "providers": "openalex,doaj"})
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(body.count("Graphene phonons"), 1)
+        self.assertIn("Only in openalex", body)
+        self.assertIn("Only in doaj", body)
+
+
+class _Answer(BaseModel):
+    text: str
+
+
+class _FakeRunner:
+    def __init__(self, tools=()):
+        self.calls = 0
+        self.tools = tools
+
+    async def run(self, agent, input, **kwargs):
+        self.calls += 1
+        items = [SimpleNamespace(type="tool_call_item", raw_item=SimpleNamespace(name=t)) for t in self.tools]
+        return SimpleNamespace(final_output=_Answer(text=f"{input} #{self.calls}"), new_items=items)
+
+
+def _agent(name, instructions="Answer briefly."):
+    return SimpleNamespace(name=name, instructions=instructions, model="gpt-test", model_settings=None, output_type=_Answer, tools=[])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="agent", password="pw")
+        self.project = Project.objects.create(owner=user, name="Cached", abstract="")
+        self.paper = Paper.objects.create(project=self.project, title="Cached", abstract="")
+        self.policy = RunnerCachePolicy(agents={
+            "formalizer": AgentCachePolicy(ttl=60),
+            "drafter": AgentCachePolicy(depends_on=("paper",)),
+        })
+
+    def _run(self, runner, agent, input="ask", **kwargs):
+        async def go():
+            with response_cache_scope(self.project.id):
+                return await runner.run(agent, input, **kwargs)
+
+        return async_to_sync(go)()
+
+    def test_repeated_run_is_served_from_cache(self):
+        inner = _FakeRunner(tools=["list_literature"])
+        runner = CachedRunner(inner, self.policy, backend=MemoryCacheBackend())
+        first = self._run(runner, _agent("formalizer"), max_turns=5)
+        second = self._run(runner, _agent("formalizer"), max_turns=5)
+        self.assertEqual(second.final_output, first.final_output)
+        self.assertTrue(second.cached)
+        self.assertEqual((inner.calls, runner.hits, runner.misses), (1, 1, 1))
+        # Different input, instructions or run options are different keys.
+        self._run(runner, _agent("formalizer"), input="other ask", max_turns=5)
+        self._run(runner, _agent("formalizer", instructions="Answer at length."), max_turns=5)
+        self._run(runner, _agent("formalizer"), max_turns=6)
+        self.assertEqual(inner.calls, 4)
+
+    def test_project_state_change_misses(self):
+        inner = _FakeRunner()
+        runner = CachedRunner(inner, self.policy, backend=MemoryCacheBackend())
+        self._run(runner, _agent("drafter"))
+        self._run(runner, _agent("drafter"))
+        self.paper.abstract = "Now with an abstract."
+        self.paper.save()
+        self._run(runner, _agent("drafter"))
+        self.assertEqual(inner.calls, 2)
+
+    def test_runs_with_writes_and_unlisted_agents_are_not_cached(self):
+        inner = _FakeRunner(tools=["list_literature", "link_literature"])
+        backend = MemoryCacheBackend()
+        runner = CachedRunner(inner, self.policy, backend=backend)
+        self._run(runner, _agent("formalizer"))
+        self._run(runner, _agent("formalizer"))
+        self._run(runner, _agent("project_assistant"))
+        self._run(runner, _agent("project_assistant"))
+        self.assertEqual(inner.calls, 4)
+        self.assertEqual(runner.hits, 0)
+
+    def test_expired_entries_are_refreshed(self):
+        inner = _FakeRunner()
+        runner = CachedRunner(inner, self.policy, backend=MemoryCacheBackend())
+        with patch("agents_sdk.response_cache.time.time", return_value=1000.0):
+            self._run(runner, _agent("formalizer"))
+        with patch("agents_sdk.response_cache.time.time", return_value=1030.0):
+            self._run(runner, _agent("formalizer"))
+        with patch("agents_sdk.response_cache.time.time", return_value=1100.0):
+            result = self._run(runner, _agent("formalizer"))
+        self.assertEqual(inner.calls, 2)
+        self.assertEqual(result.final_output.text, "ask #2")
@@ -0,0 +1,1351 @@
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+
+from django.test import SimpleTestCase, TestCase
+
+from main.research_services import (
+    PaperRecord,
+    SearchCache,
+    SqliteCacheBackend,
+    MemoryCacheBackend,
+    get_default_cache,
+    merge_records,
+    drop_seen,
+    search_all,
+    search_all_stream,
+    get_shared_client,
+    close_shared_client,
+    run_sync,
+    HttpClient,
+    RatePolicy,
+    register_rate_policy,
+    RetryPolicy,
+    fetch_many,
+    iter_openalex,
+    iter_arxiv,
+    iter_doaj,
+    search_arxiv_stream,
+    search_openalex,
+    search_semantic_scholar,
+    asdict_record,
+    CircuitBreaker,
+    CircuitOpenError,
+    LocalQueueTimeout,
+    SearchFilters,
+    RankingWeights,
+    rank_records,
+)
+from main.research_services import aggregate
+from main.research_services import cache as cache_module
+from main.research_services import arxiv as arxiv_module
+from main.research_services.ratelimit import RATE_POLICIES, TokenBucket, get_limiter, parse_retry_after
+from main.research_services.resilience import guarded, hedged, reset_breakers
+from main.research_services.simulator import ProviderProfile, SimulatedTransport
+from main.research_services.pdfstore import PdfStore
+from main.research_services.pdftext import extract_texts
+from main.research_services.vectors import HashingEmbedder, VectorIndex
+from main.research_services.singleflight import SingleFlight, get_singleflight
+from main.research_services.metrics import get_registry
+from main.research_services.providers import Provider, get_provider, register_provider, unregister_provider
+from main.research_services.localcorpus import LocalCorpus, iter_dump_lines
+from main.research_services.citations import CitationGraph, harvest_citation_graph, rank_candidates
+from main.models import Literature
+from main.utils.pdf_harvest import harvest_in_background, harvest_literature
+
+
+def _record(source: str, title: str, **kwargs) -> PaperRecord:
+    return PaperRecord(source=source, source_id=f"{source}:{title}", title=title, **kwargs)
+
+
+class _FakeProviders:
+    """Patches the provider search functions used by search_all and counts calls."""
+
+    def __init__(self, results=None, delays=None):
+        self.delays = delays or {}
+        self.calls = {"arxiv": 0, "doaj": 0, "semanticscholar": 0, "openalex": 0}
+        self.results = results or {
+            "arxiv": [_record("arxiv", "A", open_access_pdf_url="https://arxiv.org/pdf/1")],
+            "doaj": [_record("doaj", "D")],
+            "semanticscholar": [_record("semanticscholar", "S")],
+            "openalex": [_record("openalex", "O")],
+        }
+        self._patches = []
+
+    def _fake(self, provider):
+        async def go(client, *args, **kwargs):
+            self.calls[provider] += 1
+            await asyncio.sleep(self.delays.get(provider, 0))
+            return list(self.results[provider])
+        return go
+
+    def __enter__(self):
+        base = "main.research_services.providers."
+        for provider, name in (
+            ("arxiv", "search_arxiv"),
+            ("doaj", "search_doaj"),
+            ("semanticscholar", "search_semantic_scholar"),
+            ("openalex", "search_openalex"),
+        ):
+            p = patch(base + name, self._fake(provider))
+            p.start()
+            self._patches.append(p)
+        return self
+
+    def __exit__(self, *exc):
+        for p in self._patches:
+            p.stop()
+
+
+class SearchCacheTests(SimpleTestCase):
+    def test_sqlite_backend_roundtrip_and_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SqliteCacheBackend(os.path.join(tmp, "cache.sqlite3"))
+            cache = SearchCache(backend=backend, max_entries=2, evict_every=1)
+            for i, q in enumerate(["one", "two", "three"]):
+                cache.set(SearchCache.make_key("arxiv", q, 5), [_record("arxiv", q, year=2000 + i)])
+            self.assertIsNone(cache.get("arxiv", SearchCache.make_key("arxiv", "one", 5)))
+            hit = cache.get("arxiv", SearchCache.make_key("arxiv", "  THREE ", 5))
+            self.assertTrue(hit.fresh)
+            self.assertEqual(hit.records[0].title, "three")
+            self.assertEqual(hit.records[0].year, 2002)
+            backend.close()
+
+    def test_default_cache_closes_the_old_backend_when_the_path_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = get_default_cache(os.path.join(tmp, "a.sqlite3"))
+            second = get_default_cache(os.path.join(tmp, "b.sqlite3"))
+            self.assertIsNot(first, second)
+            with self.assertRaises(sqlite3.ProgrammingError):
+                first.backend.get("k")
+            second.backend.close()
+        cache_module._default_cache = None
+
+    def test_search_all_serves_cached_results(self):
+        cache = SearchCache(backend=MemoryCacheBackend())
+
+        async def go():
+            with _FakeProviders() as fake:
+                first = await search_all(None, query="Quantum", limit_per_source=3, cache=cache)
+                second = await search_all(None, query="quantum ", limit_per_source=3, cache=cache)
+            return fake, first, second
+
+        fake, first, second = asyncio.run(go())
+        self.assertEqual(fake.calls, {"arxiv": 1, "doaj": 1, "semanticscholar": 1, "openalex": 1})
+        self.assertEqual([r.title for r in second["arxiv"]], [r.title for r in first["arxiv"]])
+
+    def test_stale_entries_are_served_and_refreshed(self):
+        cache = SearchCache(backend=MemoryCacheBackend(), ttls={}, default_ttl=10, stale_ttl=100)
+        key = SearchCache.make_key("arxiv", "q", 3)
+        cache.backend.set(key, b'[{"source": "arxiv", "source_id": "old", "title": "Old"}]', time.time() - 50)
+
+        with _FakeProviders() as fake:
+            result = asyncio.run(search_all(None, query="q", limit_per_source=3, cache=cache))
+            # The refresh outlives the caller's loop (asyncio.run has closed it by now).
+            for future in list(aggregate._refresh_tasks):
+                future.result(timeout=5)
+        self.assertEqual(result["arxiv"][0].title, "Old")
+        self.assertEqual(fake.calls["arxiv"], 1)
+        self.assertTrue(cache.get("arxiv", key).fresh)
+
+
+class MergeRecordsTests(SimpleTestCase):
+    def test_drop_seen_keeps_the_first_copy_across_batches(self):
+        seen = set()
+        first = drop_seen([_record("openalex", "Graphene", doi="10.1/G"), _record("openalex", "Phonons in thin films", year=2020)], seen)
+        second = drop_seen([
+            _record("doaj", "Graphene (journal version)", doi="https://doi.org/10.1/g"),
+            _record("doaj", "Phonons in Thin Films", year=2020),
+            _record("doaj", "Phonons in thin films", year=2021),
+        ], seen)
+        self.assertEqual([r.title for r in first], ["Graphene", "Phonons in thin films"])
+        self.assertEqual([(r.title, r.year) for r in second], [("Phonons in thin films", 2021)])
+
+    def test_title_match_does_not_fuse_records_with_different_dois(self):
+        merged = merge_records({
+            "openalex": [_record("openalex", "Deep Learning: A Survey", doi="10.1/aaa", year=2020)],
+            "doaj": [
+                _record("doaj", "Deep learning - a survey", doi="10.2/bbb", year=2020),
+                # No DOI: may join one of them, but must not chain the two together.
+                _record("doaj", "Deep learning, a survey", year=2020),
+            ],
+            "arxiv": [_record("arxiv", "Deep Learning: A Survey", arxiv_id="2001.00001", doi="10.48550/arXiv.2001.00001", year=2020)],
+        })
+        self.assertEqual(sorted(r.doi or "" for r in merged), ["10.1/aaa", "10.2/bbb"])
+
+    def test_clusters_by_doi_arxiv_and_title(self):
+        grouped = {
+            "arxiv": [
+                _record("arxiv", "Attention Is All You Need", arxiv_id="1706.03762v5", year=2017,
+                        open_access_pdf_url="https://arxiv.org/pdf/1706.03762v5"),
+            ],
+            "semanticscholar": [
+                _record("semanticscholar", "Attention is All you Need", arxiv_id="1706.03762", year=2017,
+                        doi="10.5555/3295222", citations_count=90000, abstract="Longer abstract text."),
+            ],
+            "openalex": [
+                _record("openalex", "Attention is all you need", doi="https://doi.org/10.5555/3295222",
+                        year=2017, citations_count=80000),
+                _record("openalex", "Unrelated Work On Graphs", year=2020),
+            ],
+        }
+        merged = merge_records(grouped)
+        self.assertEqual(len(merged), 2)
+        top = merged[0]
+        self.assertEqual(top.source, "openalex")
+        self.assertEqual(top.sources, ["openalex", "semanticscholar", "arxiv"])
+        self.assertEqual(top.citations_count, 90000)
+        self.assertEqual(top.abstract, "Longer abstract text.")
+        self.assertEqual(top.open_access_pdf_url, "https://arxiv.org/pdf/1706.03762v5")
+
+    def test_short_titles_do_not_collide(self):
+        grouped = {"doaj": [_record("doaj", "Editorial", year=2020)], "openalex": [_record("openalex", "Editorial", year=2020)]}
+        self.assertEqual(len(merge_records(grouped)), 2)
+
+
+class SearchAllStreamTests(SimpleTestCase):
+    def test_yields_in_completion_order(self):
+        async def go():
+            delays = {"arxiv": 0.06, "doaj": 0.0, "semanticscholar": 0.04, "openalex": 0.02}
+            with _FakeProviders(delays=delays):
+                return [provider async for provider, _ in search_all_stream(None, query="q", open_access_only=True)]
+
+        self.assertEqual(asyncio.run(go()), ["doaj", "openalex", "semanticscholar", "arxiv"])
+
+
+class SharedClientTests(SimpleTestCase):
+    def test_one_pooled_client_per_loop(self):
+        async def go():
+            client = get_shared_client()
+            await client.aclose()  # no-op for shared clients
+            return client, get_shared_client()
+
+        first, again = asyncio.run(go())
+        self.assertIs(first, again)
+        self.assertTrue(first.is_shared)
+        other, _ = asyncio.run(go())
+        self.assertIsNot(first, other)
+
+    def test_close_shared_client_closes_the_loops_pool(self):
+        async def go():
+            client = get_shared_client()
+            await close_shared_client()
+            fresh = get_shared_client()
+            await close_shared_client()
+            return client, fresh
+
+        closed, fresh = asyncio.run(go())
+        self.assertTrue(closed._client.is_closed)
+        self.assertIsNot(closed, fresh)
+
+    def test_run_sync_reuses_background_client(self):
+        async def which(client):
+            return client
+
+        self.assertIs(run_sync(which), run_sync(which))
+
+
+class RateLimitTests(SimpleTestCase):
+    def test_token_bucket_spaces_requests(self):
+        async def go():
+            bucket = TokenBucket(RatePolicy(rate=20.0, burst=1))
+            started = time.monotonic()
+            for _ in range(3):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(go()), 0.09)
+
+    def test_host_budget_is_shared_across_event_loops(self):
+        register_rate_policy("shared-budget.test", RatePolicy(rate=20.0, burst=1))
+        self.addCleanup(RATE_POLICIES.pop, "shared-budget.test")
+        granted = []
+
+        async def take():
+            await get_limiter("https://shared-budget.test/x").acquire()
+            granted.append(time.monotonic())
+
+        # Like concurrent agent runs: each thread has its own asyncio.run loop.
+        threads = [threading.Thread(target=lambda: asyncio.run(take())) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        granted.sort()
+        self.assertGreaterEqual(granted[-1] - granted[0], 0.14)
+
+    def test_retry_after_is_honoured(self):
+        register_rate_policy("ratelimited.test", RatePolicy(rate=100.0, burst=5))
+        seen = []
+
+        def handler(request):
+            seen.append(time.monotonic())
+            if len(seen) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0.2"})
+            return httpx.Response(200, json={"ok": True})
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await client.get_json("https://ratelimited.test/x")
+            finally:
+                await client.aclose()
+
+        self.assertEqual(asyncio.run(go()), {"ok": True})
+        self.assertGreaterEqual(seen[1] - seen[0], 0.18)
+
+    def test_parse_retry_after_http_date(self):
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class RetryPolicyTests(SimpleTestCase):
+    def _run(self, statuses, policy):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(statuses[min(len(calls), len(statuses)) - 1], json={"n": len(calls)})
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler), retry_policy=policy)
+            try:
+                return await client.get_json("https://retry.test/x")
+            finally:
+                await client.aclose()
+
+        return calls, go
+
+    def test_permanent_errors_fail_fast(self):
+        gave_up = []
+        policy = RetryPolicy(max_retries=3, backoff_base=0, on_giveup=(gave_up.append,))
+        calls, go = self._run([404], policy)
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(go())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(gave_up[0].status_code, 404)
+
+    def test_transient_errors_are_retried(self):
+        retried = []
+        policy = RetryPolicy(max_retries=3, backoff_base=0, on_retry=(retried.append,))
+        calls, go = self._run([502, 500, 200], policy)
+        self.assertEqual(asyncio.run(go()), {"n": 3})
+        self.assertEqual([e.status_code for e in retried], [502, 500])
+
+    def test_elapsed_budget_stops_retries(self):
+        policy = RetryPolicy(max_retries=10, max_elapsed=0.01)
+        calls, go = self._run([503], policy)
+        with patch("main.research_services.retry.jittered_backoff", return_value=5.0):
+            with self.assertRaises(httpx.HTTPStatusError):
+                asyncio.run(go())
+        self.assertEqual(len(calls), 1)
+
+
+ARXIV_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>http://arxiv.org/abs/2101.00002v2</id>
+    <title>Second</title>
+    <summary>B</summary>
+    <published>2021-01-01T00:00:00Z</published>
+  </entry>
+  <entry>
+    <id>http://arxiv.org/abs/2101.00001v1</id>
+    <title>First</title>
+    <summary>A</summary>
+    <published>2021-01-01T00:00:00Z</published>
+  </entry>
+</feed>"""
+
+
+class FetchManyTests(SimpleTestCase):
+    def test_routes_batches_and_preserves_input_order(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            host = request.url.host
+            if host == "export.arxiv.org":
+                return httpx.Response(200, text=ARXIV_FEED)
+            if host == "api.semanticscholar.org":
+                ids = json.loads(request.content)["ids"]
+                return httpx.Response(200, json=[
+                    {"paperId": "s2-" + i, "title": f"Paper {i}"} if i != "missing" else None for i in ids
+                ])
+            if host == "api.openalex.org":
+                return httpx.Response(200, json={"results": [{"id": "https://openalex.org/W42", "title": "Work"}]})
+            return httpx.Response(404)
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await fetch_many(client, ["2101.00001", "W42", "10.1000/xyz", "arXiv:2101.00002v2", "missing"])
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            records = asyncio.run(go())
+        self.assertEqual([r.title if r else None for r in records], ["First", "Work", "Paper DOI:10.1000/xyz", "Second", None])
+        self.assertEqual(len(requests), 3)
+
+    def test_old_style_arxiv_ids_keep_their_archive(self):
+        feed = ARXIV_FEED.replace("2101.00001v1", "hep-th/9901001v1")
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=feed)))
+            try:
+                return await fetch_many(client, ["hep-th/9901001", "2101.00002"])
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            old, new = asyncio.run(go())
+        self.assertEqual((old.title, old.arxiv_id), ("First", "hep-th/9901001v1"))
+        self.assertEqual(new.title, "Second")
+
+    def test_fetch_by_id_closes_the_response_after_the_first_entry(self):
+        closed = []
+
+        class Body(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                head, tail = ARXIV_FEED.split("</entry>", 1)
+                yield (head + "</entry>").encode()
+                yield tail.encode()
+
+            async def aclose(self):
+                closed.append(True)
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=Body())))
+            try:
+                record = await arxiv_module.fetch_arxiv_by_id(client, "2101.00002")
+                return record, list(closed)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            record, closed_on_return = asyncio.run(go())
+        self.assertEqual(record.title, "Second")
+        self.assertEqual(closed_on_return, [True])
+
+
+class PagingTests(SimpleTestCase):
+    def _openalex_handler(self, pages, seen):
+        def handler(request):
+            cursor = request.url.params["cursor"]
+            seen.append(cursor)
+            index = int(cursor) if cursor != "*" else 0
+            works = [{"id": f"W{index}{i}", "title": f"Work {index}-{i}"} for i in range(pages[index])]
+            next_cursor = str(index + 1) if index + 1 < len(pages) else None
+            return httpx.Response(200, json={"meta": {"next_cursor": next_cursor}, "results": works})
+        return handler
+
+    def _collect(self, handler, **kwargs):
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return [r.title async for r in iter_openalex(client, "q", per_page=2, **kwargs)]
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            return asyncio.run(go())
+
+    def test_follows_cursor_until_exhausted(self):
+        seen = []
+        titles = self._collect(self._openalex_handler([2, 2, 1], seen))
+        self.assertEqual(len(titles), 5)
+        self.assertEqual(seen, ["*", "1", "2"])
+
+    def test_stops_at_max_records_without_overfetching(self):
+        seen = []
+        titles = self._collect(self._openalex_handler([2, 2, 2, 2], seen), max_records=3)
+        self.assertEqual(titles, ["Work 0-0", "Work 0-1", "Work 1-0"])
+        self.assertEqual(seen, ["*", "1"])
+
+    def test_doaj_pages_past_a_page_that_lost_titleless_results(self):
+        seen = []
+
+        def handler(request):
+            page = int(request.url.params["page"])
+            seen.append(page)
+            titles = {1: ["One", ""], 2: ["Three", "Four"]}[page]
+            return httpx.Response(200, json={"total": 4, "results": [{"id": t or "x", "bibjson": {"title": t}} for t in titles]})
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return [r.title async for r in iter_doaj(client, "q", page_size=2)]
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            titles = asyncio.run(go())
+        self.assertEqual(titles, ["One", "Three", "Four"])
+        self.assertEqual(seen, [1, 2])
+
+    def test_arxiv_pages_past_a_page_with_a_malformed_entry(self):
+        seen = []
+
+        def entry(n):
+            return f"<entry><id>http://arxiv.org/abs/2101.0000{n}v1</id><title>Paper {n}</title></entry>"
+
+        def handler(request):
+            start = int(request.url.params["start"])
+            seen.append(start)
+            body = "".join(entry(n) for n in range(start, min(start + 2, 3)))
+            return httpx.Response(200, text=(
+                '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+                f"<opensearch:totalResults>3</opensearch:totalResults>{body}</feed>"
+            ))
+
+        parse_entry = arxiv_module._parse_entry
+
+        def flaky(elem):
+            record = parse_entry(elem)
+            if record.title == "Paper 1":
+                raise ValueError("malformed")
+            return record
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return [r.title async for r in iter_arxiv(client, "q", page_size=2)]
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True), \
+                patch("main.research_services.arxiv._parse_entry", flaky):
+            titles = asyncio.run(go())
+        self.assertEqual(titles, ["Paper 0", "Paper 2"])
+        self.assertEqual(seen, [0, 2])
+
+
+class IncrementalParsingTests(SimpleTestCase):
+    def test_arxiv_records_are_emitted_before_the_body_completes(self):
+        head, tail = ARXIV_FEED.split("</entry>", 1)
+        events = []
+
+        class Body(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield (head + "</entry>").encode()
+                await asyncio.sleep(0.05)
+                events.append("tail sent")
+                yield tail.encode()
+
+        def handler(request):
+            return httpx.Response(200, stream=Body())
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                async for record in search_arxiv_stream(client, "q"):
+                    events.append(record.title)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            asyncio.run(go())
+        self.assertEqual(events, ["Second", "tail sent", "First"])
+
+
+class LeanRecordTests(SimpleTestCase):
+    def test_openalex_requests_only_mapped_fields_and_drops_raw(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.params.get("select"))
+            work = {"id": "https://openalex.org/W1", "display_name": "Lean", "cited_by_count": 7}
+            return httpx.Response(200, json={"results": [work]})
+
+        async def go(include_raw):
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await search_openalex(client, "q", include_raw=include_raw)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            lean = asyncio.run(go(False))[0]
+            full = asyncio.run(go(True))[0]
+        self.assertIn("abstract_inverted_index", seen[0])
+        self.assertIsNone(seen[1])
+        self.assertEqual(lean.raw, {})
+        self.assertEqual(lean.citations_count, 7)
+        self.assertEqual(full.raw["display_name"], "Lean")
+
+    def test_semantic_scholar_search_keeps_every_mapped_field(self):
+        paper = {"paperId": "p1", "title": "Counted", "citationCount": 3, "referenceCount": 12, "fieldsOfStudy": ["Physics"]}
+
+        def handler(request):
+            # Like S2: only the requested fields come back.
+            fields = request.url.params["fields"].split(",")
+            return httpx.Response(200, json={"data": [{k: v for k, v in paper.items() if k in fields or k == "paperId"}]})
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await search_semantic_scholar(client, "q")
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            record = asyncio.run(go())[0]
+        self.assertEqual((record.citations_count, record.references_count, record.fields_of_study), (3, 12, ["Physics"]))
+
+    def test_asdict_record_projects_requested_fields(self):
+        record = _record("arxiv", "Projected", abstract="text")
+        self.assertEqual(asdict_record(record, fields=["title", "abstract", "unknown"]), {"title": "Projected", "abstract": "text"})
+        self.assertFalse(hasattr(record, "__dict__"))
+
+
+class ResilienceTests(SimpleTestCase):
+    def tearDown(self):
+        reset_breakers()
+
+    def test_slow_provider_is_cut_off_and_marked_partial(self):
+        async def go():
+            return await search_all(None, "q", deadlines={"doaj": 0.05})
+
+        with _FakeProviders(delays={"doaj": 1.0}):
+            started = time.monotonic()
+            results = asyncio.run(go())
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(results.partial)
+        self.assertEqual(results.errors, {"doaj": "deadline exceeded"})
+        self.assertEqual(results["doaj"], [])
+        self.assertEqual(len(results["openalex"]), 1)
+
+    def test_waiting_on_the_local_rate_limit_is_not_held_against_the_provider(self):
+        register_rate_policy("queued.test", RatePolicy(rate=20.0, burst=1))
+        self.addCleanup(RATE_POLICIES.pop, "queued.test")
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        async def go(retry_policy):
+            client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True})))
+            try:
+                return await asyncio.gather(*(
+                    guarded("queued", lambda: client.get_json("https://queued.test/x", retry_policy=retry_policy), deadline=0.1, breaker=breaker)
+                    for _ in range(6)
+                ), return_exceptions=True)
+            finally:
+                await client.aclose()
+
+        # Six requests queue for ~0.25s behind a 20/s bucket, well past the 0.1s deadline.
+        self.assertEqual(asyncio.run(go(None)), [{"ok": True}] * 6)
+        # When the request budget runs out in the queue, that is a local timeout, not a provider failure.
+        results = asyncio.run(go(RetryPolicy(max_elapsed=0.08)))
+        self.assertTrue(any(isinstance(r, LocalQueueTimeout) for r in results))
+        self.assertTrue(breaker.allow())
+
+    def test_breaker_opens_then_probes_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        calls = []
+
+        async def failing():
+            calls.append("call")
+            raise httpx.ConnectError("down")
+
+        async def ok():
+            calls.append("probe")
+            return []
+
+        async def go():
+            for _ in range(3):
+                with self.assertRaises((httpx.ConnectError, CircuitOpenError)):
+                    await guarded("doaj", failing, breaker=breaker)
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            await asyncio.sleep(0.06)
+            await guarded("doaj", ok, breaker=breaker)
+
+        asyncio.run(go())
+        self.assertEqual(calls, ["call", "call", "probe"])
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_hedged_request_wins_over_slow_first_attempt(self):
+        delays = [1.0, 0.0]
+
+        async def call():
+            await asyncio.sleep(delays.pop(0))
+            return "done"
+
+        started = time.monotonic()
+        self.assertEqual(asyncio.run(hedged(call, 0.05)), "done")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class FilterPushdownTests(SimpleTestCase):
+    def tearDown(self):
+        reset_breakers()
+
+    def _capture(self, filters):
+        seen = {}
+
+        def handler(request):
+            host = request.url.host
+            seen[host] = request.url
+            if host == "export.arxiv.org":
+                return httpx.Response(200, text=ARXIV_FEED)
+            return httpx.Response(200, json={"results": [], "data": []})
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await search_all(client, "graph neural networks", filters=filters, breakers=False)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            results = asyncio.run(go())
+        return seen, results
+
+    def test_filters_become_native_query_parameters(self):
+        seen, _ = self._capture(SearchFilters(open_access=True, year_from=2019, year_to=2021, types=("article",)))
+        openalex = seen["api.openalex.org"].params["filter"]
+        self.assertEqual(openalex, "is_oa:true,publication_year:2019-2021,type:article")
+        s2 = seen["api.semanticscholar.org"].params
+        self.assertEqual((s2["year"], s2["publicationTypes"], s2["openAccessPdf"]), ("2019-2021", "JournalArticle", ""))
+        self.assertIn("bibjson.year:[2019 TO 2021]", seen["doaj.org"].path)
+        # arXiv only has preprints, so it is not asked at all.
+        self.assertNotIn("export.arxiv.org", seen)
+
+    def test_post_filter_only_catches_what_providers_cannot_express(self):
+        seen, results = self._capture(SearchFilters(has_abstract=True, year_to=2020))
+        self.assertIn("submittedDate:[199101010000 TO 202012312359]", seen["export.arxiv.org"].params["search_query"])
+        self.assertEqual(seen["api.openalex.org"].params["filter"], "publication_year:<2021,has_abstract:true")
+        # The mock ignores the date range; ARXIV_FEED entries are from 2021 and the fallback drops them.
+        self.assertEqual(results["arxiv"], [])
+
+    def test_matches(self):
+        filters = SearchFilters(open_access=True, year_to=2020, types=("preprint",))
+        self.assertTrue(filters.matches(_record("arxiv", "X", year=2019, publication_type="preprint", open_access_pdf_url="u")))
+        self.assertFalse(filters.matches(_record("arxiv", "X", year=2021, publication_type="preprint", open_access_pdf_url="u")))
+        self.assertFalse(filters.matches(_record("doaj", "X", year=2019, publication_type="article", open_access_pdf_url="u")))
+        with self.assertRaises(ValueError):
+            SearchFilters(types=("poster",))
+
+
+class SimulatorTests(SimpleTestCase):
+    def tearDown(self):
+        reset_breakers()
+
+    def test_serves_fixtures_truncated_to_page_size(self):
+        async def go():
+            client = HttpClient(transport=SimulatedTransport())
+            try:
+                return await search_all(client, "anything", limit_per_source=7)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            results = asyncio.run(go())
+        self.assertEqual({k: len(v) for k, v in results.items()}, {"arxiv": 7, "doaj": 7, "semanticscholar": 7, "openalex": 7})
+        self.assertFalse(results.partial)
+
+    def test_429_bursts_and_errors(self):
+        transport = SimulatedTransport(
+            profiles={
+                "api.openalex.org": ProviderProfile(burst_every=3, burst_length=2, retry_after=0.01),
+                "doaj.org": ProviderProfile(error_rate=1.0),
+            }
+        )
+        policy = RetryPolicy(max_retries=3, backoff_base=0.0)
+
+        async def go():
+            client = HttpClient(transport=transport, retry_policy=policy)
+            try:
+                return await search_all(client, "anything", limit_per_source=3, breakers=False)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            results = asyncio.run(go())
+        # Two 429s honoured via Retry-After, then the third attempt succeeds.
+        self.assertEqual([r.url.host for r in transport.requests].count("api.openalex.org"), 3)
+        self.assertEqual(len(results["openalex"]), 3)
+        self.assertEqual(results.errors, {"doaj": "HTTPStatusError"})
+
+
+class RankingTests(SimpleTestCase):
+    def test_rrf_rewards_agreement_between_providers(self):
+        shared = dict(doi="10.1/shared")
+        grouped = {
+            "openalex": [_record("openalex", "Alpha solo paper"), _record("openalex", "Shared result paper", **shared)],
+            "semanticscholar": [_record("semanticscholar", "Beta solo paper"), _record("semanticscholar", "Shared result paper", **shared)],
+        }
+        ranked = rank_records(grouped, top_k=2)
+        self.assertEqual(ranked[0].title, "Shared result paper")
+        self.assertEqual(ranked[0].sources, ["openalex", "semanticscholar"])
+        self.assertEqual(len(ranked), 2)
+
+    def test_boosts_and_predicate(self):
+        grouped = {
+            "openalex": [
+                _record("openalex", "Old uncited paper", year=1990),
+                _record("openalex", "Recent cited paper", year=2024, citations_count=900, open_access_pdf_url="u"),
+            ]
+        }
+        self.assertEqual(rank_records(grouped, top_k=1)[0].title, "Old uncited paper")
+        boosted = rank_records(grouped, top_k=1, weights=RankingWeights(citations=0.5, recency=0.5))
+        self.assertEqual(boosted[0].title, "Recent cited paper")
+        only_oa = rank_records(grouped, top_k=5, predicate=lambda r: bool(r.open_access_pdf_url))
+        self.assertEqual([r.title for r in only_oa], ["Recent cited paper"])
+
+    def test_search_all_returns_global_top_k(self):
+        async def go():
+            return await search_all(None, "q", top_k=2)
+
+        with _FakeProviders():
+            results = asyncio.run(go())
+        self.assertEqual(list(results), ["ranked"])
+        self.assertEqual(len(results["ranked"]), 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_identical_searches_share_provider_calls(self):
+        flights = get_singleflight()
+        flights.reset_stats()
+
+        async def go():
+            with _FakeProviders(delays={"arxiv": 0.05}) as fake:
+                results = await asyncio.gather(
+                    *(search_all(None, query=q, limit_per_source=3) for q in ("Same query", "same  query ", "same query", "other"))
+                )
+            return fake, results
+
+        fake, results = asyncio.run(go())
+        self.assertEqual(fake.calls["arxiv"], 2)
+        self.assertEqual([r.title for r in results[0]["arxiv"]], [r.title for r in results[2]["arxiv"]])
+        self.assertEqual(flights.stats()["arxiv"], {"issued": 2, "coalesced": 2, "ratio": 0.5})
+        flights.reset_stats()
+
+    def test_errors_are_shared_and_cancelled_waiters_do_not_cancel_the_call(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def slow_fail():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            raise RuntimeError("boom")
+
+        async def go():
+            first = asyncio.ensure_future(flights.do("k", slow_fail))
+            second = asyncio.ensure_future(flights.do("k", slow_fail))
+            await asyncio.sleep(0)
+            first.cancel()
+            with self.assertRaises(RuntimeError):
+                await second
+            self.assertTrue(first.cancelled())
+            with self.assertRaises(RuntimeError):
+                await flights.do("k", slow_fail)  # finished calls are not reused
+
+        asyncio.run(go())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flights.stats()["k"]["issued"], 2)
+
+
+def _append_rows(root, writer, count):
+    index = VectorIndex(root, HashingEmbedder(dim=16))
+    for i in range(count):
+        index.add([f"literature:{writer}-{i}"], np.full((1, 16), writer * 1000 + i, dtype=np.float32))
+
+
+class VectorIndexTests(SimpleTestCase):
+    TOPICS = ["graphene phonon transport", "protein folding kinetics", "galaxy cluster lensing", "reinforcement learning robots"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index = VectorIndex(self.tmp.name, HashingEmbedder(dim=256))
+
+    @skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_concurrent_writer_processes_keep_rows_aligned_with_keys(self):
+        root = os.path.join(self.tmp.name, "shared")
+        context = multiprocessing.get_context("fork")
+        writers = [context.Process(target=_append_rows, args=(root, w, 200)) for w in range(4)]
+        for process in writers:
+            process.start()
+        for process in writers:
+            process.join(30)
+        self.assertEqual([p.exitcode for p in writers], [0] * 4)
+
+        index = VectorIndex(root, HashingEmbedder(dim=16))
+        self.assertEqual(len(index), 800)
+        vectors = index._vectors()
+        for key, row in index._latest.items():
+            writer, i = map(int, key.split(":", 1)[1].split("-"))
+            self.assertEqual(vectors[row][0], writer * 1000 + i)
+
+    def test_reader_follows_a_clear_in_another_instance(self):
+        other = VectorIndex(self.tmp.name, HashingEmbedder(dim=256))
+        self.index.add_texts(["literature:1", "literature:2"], ["graphene", "protein"])
+        self.assertEqual(len(other), 2)
+        self.index.clear()
+        self.index.add_texts(["literature:3"], ["lensing"])
+        other.add_texts(["literature:4"], ["robots"])
+        self.assertEqual(len(other), 2)
+        self.assertEqual(other.search_text("robots", k=1)[0][0], "literature:4")
+
+    def _fill(self, per_topic=50):
+        keys, texts = [], []
+        for t, topic in enumerate(self.TOPICS):
+            for i in range(per_topic):
+                keys.append(f"literature:{t * per_topic + i}")
+                texts.append(f"{topic} study {i} measurement {topic.split()[0]} variant{i % 7}")
+        self.index.add_texts(keys, texts)
+
+    def test_exact_search_updates_deletes_and_reloads(self):
+        self.index.add_texts(["literature:1", "literature:2", "note:1"], ["graphene phonon transport", "protein folding", "graphene notes"])
+        hits = self.index.search_text("phonon transport in graphene", k=2)
+        self.assertEqual(hits[0][0], "literature:1")
+        self.assertEqual([k for k, _ in self.index.search_text("graphene", k=5, kinds=["note"])], ["note:1"])
+
+        self.index.add_texts(["literature:1"], ["galaxy lensing"])
+        self.index.remove(["literature:2"])
+        self.assertEqual(len(self.index), 2)
+        reopened = VectorIndex(self.tmp.name, HashingEmbedder(dim=256))
+        self.assertEqual(reopened.search_text("galaxy lensing", k=1)[0][0], "literature:1")
+        self.assertNotIn("literature:2", [k for k, _ in reopened.search_text("protein folding", k=5)])
+        reopened.compact()
+        self.assertEqual(len(reopened), 2)
+        with self.assertRaises(ValueError):
+            VectorIndex(self.tmp.name, HashingEmbedder(dim=128))
+
+    def test_ivf_search_agrees_with_exact_scan(self):
+        self._fill()
+        queries = self.index.embedder.embed([f"{topic} measurement" for topic in self.TOPICS])
+        exact = self.index.search(queries, k=5, nprobe=None)
+        self.assertEqual(self.index.build_ivf(nlist=8), 8)
+        approx = self.index.search(queries, k=5, nprobe=4)
+        for e, a in zip(exact, approx):
+            # Near-duplicate texts tie, so compare the best scores rather than the keys.
+            self.assertAlmostEqual(e[0][1], a[0][1], places=5)
+        self.index.add_texts(["literature:999"], ["graphene phonon transport exact duplicate query measurement"])
+        self.assertEqual(self.index.search(self.index.embedder.embed(["graphene phonon transport exact duplicate query measurement"]), k=1)[0][0][0], "literature:999")
+
+    def test_search_all_library_stage(self):
+        async def library(query, limit, filters):
+            return [_record("library", "D", doi="10.1/d")]
+
+        async def go(sufficient):
+            return await search_all(None, "q", merge=True, library=library, library_sufficient=sufficient)
+
+        results = {"arxiv": [], "doaj": [_record("doaj", "D", doi="10.1/D")], "semanticscholar": [], "openalex": []}
+        with _FakeProviders(results) as fake:
+            merged = asyncio.run(go(None))
+            self.assertEqual(fake.calls["doaj"], 1)
+            asyncio.run(go(1))
+            self.assertEqual(fake.calls["doaj"], 1)
+        self.assertEqual(merged["merged"][0].source, "library")
+        self.assertEqual(merged["merged"][0].sources, ["library", "doaj"])
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        get_registry().reset()
+        self.addCleanup(get_registry().reset)
+        self.addCleanup(reset_breakers)
+
+    def test_http_client_counts_attempts_retries_429s_and_parse_failures(self):
+        responses = [httpx.Response(429), httpx.Response(200, json={"ok": True}), httpx.Response(200, text="<html>")]
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(lambda request: responses.pop(0)), retry_policy=RetryPolicy(backoff_base=0))
+            try:
+                await client.get_json("https://api.openalex.org/works")
+                with self.assertRaises(ValueError):
+                    await client.get_json("https://api.openalex.org/works")
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            asyncio.run(go())
+        text = get_registry().render()
+        self.assertIn('research_http_requests_total{host="api.openalex.org",outcome="200"} 2', text)
+        self.assertIn('research_http_rate_limited_total{host="api.openalex.org"} 1', text)
+        self.assertIn('research_http_retries_total{host="api.openalex.org",reason="429"} 1', text)
+        self.assertIn('research_http_parse_failures_total{host="api.openalex.org"} 1', text)
+        self.assertIn('research_http_request_seconds_count{host="api.openalex.org"} 3', text)
+        self.assertIn('# TYPE research_http_request_seconds histogram', text)
+
+    def test_search_all_diagnostics_and_endpoint(self):
+        with _FakeProviders(delays={"doaj": 1.0}):
+            results = asyncio.run(search_all(None, "q", deadlines={"doaj": 0.05}, merge=True))
+        self.assertEqual(results.diagnostics["doaj"].outcome, "timeout")
+        self.assertEqual(results.diagnostics["doaj"].error, "deadline exceeded")
+        self.assertEqual((results.diagnostics["openalex"].outcome, results.diagnostics["openalex"].records), ("ok", 1))
+
+        with patch.dict(os.environ, {"METRICS_TOKEN": "s3cret"}):
+            self.assertEqual(self.client.get("/metrics/").status_code, 403)
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('research_provider_searches_total{provider="doaj",outcome="timeout"} 1', body)
+        self.assertIn('research_provider_records_total{provider="arxiv"} 1', body)
+
+    def test_malformed_arxiv_feed_is_a_parse_error(self):
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"<feed><entry>")))
+            try:
+                return await search_all(client, "q", providers=["arxiv"], cache=SearchCache(backend=MemoryCacheBackend()))
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            results = asyncio.run(go())
+        self.assertEqual(results.diagnostics["arxiv"].outcome, "parse_error")
+        text = get_registry().render()
+        self.assertIn('research_provider_searches_total{provider="arxiv",outcome="parse_error"} 1', text)
+        self.assertIn('research_http_parse_failures_total{host="export.arxiv.org"} 1', text)
+
+    def test_request_coalescing_is_exported_per_provider(self):
+        async def go():
+            with _FakeProviders(delays={"arxiv": 0.05}):
+                await asyncio.gather(*(search_all(None, query=q, limit_per_source=3) for q in ("Same query", "same query", "other")))
+
+        asyncio.run(go())
+        text = get_registry().render()
+        self.assertIn('research_provider_requests_issued_total{provider="arxiv"} 2', text)
+        self.assertIn('research_provider_requests_coalesced_total{provider="arxiv"} 1', text)
+
+
+class ProviderRegistryTests(SimpleTestCase):
+    def test_subset_selection_and_unknown_names(self):
+        with _FakeProviders() as fake:
+            grouped = asyncio.run(search_all(None, "q", providers=["openalex", "doaj"]))
+            self.assertEqual(list(grouped), ["doaj", "openalex"])
+            self.assertEqual(fake.calls["arxiv"], 0)
+            with self.assertRaises(ValueError):
+                asyncio.run(search_all(None, "q", providers=["openalex", "nope"]))
+
+    def test_registered_provider_joins_search_under_its_concurrency_limit(self):
+        state = {"active": 0, "peak": 0}
+
+        async def search(client, query, limit, filters, mailto):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return [_record("extra", f"{query} result")]
+
+        register_provider(Provider(name="extra", search=search, max_concurrency=2))
+        self.addCleanup(unregister_provider, "extra")
+
+        async def go():
+            return await asyncio.gather(*(search_all(None, f"q{i}", providers=["extra"], breakers=False) for i in range(6)))
+
+        results = asyncio.run(go())
+        self.assertEqual([r["extra"][0].title for r in results], [f"q{i} result" for i in range(6)])
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(get_provider("openalex").batch_size, 50)
+
+
+class LocalCorpusTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.corpus = LocalCorpus(os.path.join(self.tmp.name, "corpus.sqlite3"))
+        self.addCleanup(self.corpus.close)
+
+    def _dump(self, name, items):
+        path = os.path.join(self.tmp.name, name)
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            for item in items:
+                fh.write((item if isinstance(item, str) else json.dumps(item)) + "\n")
+        return path
+
+    def _arxiv(self, arxiv_id, title, abstract, created="Mon, 2 Apr 2007 19:18:42 GMT", **extra):
+        return {
+            "id": arxiv_id, "title": title, "abstract": abstract, "categories": "cond-mat.mes-hall",
+            "authors_parsed": [["Doe", "Jane", ""]], "versions": [{"version": "v1", "created": created}], **extra,
+        }
+
+    def test_ingest_arxiv_snapshot_and_search(self):
+        path = self._dump("arxiv.json.gz", [
+            self._arxiv("0704.0001", "Phonon transport in graphene", "Thermal conductivity of suspended graphene sheets."),
+            self._arxiv("0704.0002", "Protein folding kinetics", "Folding pathways.", created="Tue, 3 Apr 2018 10:00:00 GMT"),
+            "not json",
+            {"id": "0704.0003", "title": ""},
+        ])
+        report = self.corpus.ingest(iter_dump_lines(path), "arxiv", batch_size=1)
+        self.assertEqual((report.lines, report.stored, report.skipped), (4, 2, 2))
+
+        hits = self.corpus.search("the graphene conductivity")
+        self.assertEqual([r.title for r in hits], ["Phonon transport in graphene"])
+        record = hits[0]
+        self.assertEqual((record.source, record.source_id, record.year), ("local", "arxiv:0704.0001", 2007))
+        self.assertEqual(record.authors[0].name, "Jane Doe")
+        self.assertEqual(record.open_access_pdf_url, "https://arxiv.org/pdf/0704.0001")
+        # No paper has both words, so any-word matching takes over.
+        self.assertEqual(len(self.corpus.search("graphene folding")), 2)
+        self.assertEqual([r.year for r in self.corpus.search("graphene folding", filters=SearchFilters(year_from=2010))], [2018])
+
+    def test_reingest_replaces_rows_and_index_terms(self):
+        self.corpus.ingest([json.dumps(self._arxiv("0704.0001", "Galaxy lensing", "Weak lensing.")).encode()], "arxiv")
+        self.corpus.ingest([json.dumps(self._arxiv("0704.0001", "Graphene phonons", "Revised.")).encode()], "arxiv")
+        self.assertEqual(len(self.corpus), 1)
+        self.assertEqual(self.corpus.search("lensing"), [])
+        self.assertEqual(self.corpus.search("graphene")[0].title, "Graphene phonons")
+
+    def test_searches_do_not_wait_for_the_writer_and_bound_the_any_word_pass(self):
+        self.corpus.ingest(
+            [json.dumps(self._arxiv(f"0704.000{i}", f"Graphene sample {i}", "Phonons." if i < 3 else "Folding.")).encode() for i in range(6)],
+            "arxiv",
+        )
+        found = []
+        with self.corpus._lock:  # held as by a long ingest
+            reader = threading.Thread(target=lambda: found.extend(self.corpus.search("phonons")))
+            reader.start()
+            reader.join(5)
+        self.assertEqual(len(found), 3)
+        with patch("main.research_services.localcorpus.OR_CANDIDATES", 4):
+            hits = self.corpus.search("phonons folding")
+        # No paper has both words; only the first four any-word matches were ranked.
+        self.assertEqual(sorted(r.title for r in hits), [f"Graphene sample {i}" for i in range(4)])
+
+    def test_search_all_includes_local_provider(self):
+        self.corpus.ingest([json.dumps(self._arxiv("0704.0001", "Graphene phonons", "Heat.", doi="10.1/G")).encode()], "arxiv")
+        results = {"arxiv": [], "doaj": [], "semanticscholar": [], "openalex": [_record("openalex", "Graphene phonons", doi="10.1/g")]}
+        with _FakeProviders(results), patch("main.research_services.providers.get_local_corpus", return_value=self.corpus):
+            grouped = asyncio.run(search_all(None, "graphene", cache=SearchCache(MemoryCacheBackend())))
+            merged = asyncio.run(search_all(None, "graphene", merge=True))
+        self.assertEqual(list(grouped)[0], "local")
+        self.assertEqual(grouped["local"][0].source_id, "arxiv:0704.0001")
+        self.assertEqual(merged["merged"][0].sources, ["openalex", "local"])
+
+
+class CitationGraphTests(SimpleTestCase):
+    def test_csr_pagerank_cocitation_and_coupling(self):
+        graph = CitationGraph()
+        nodes = [graph.add_paper(_record("openalex", f"Paper number {i}", doi=f"10.1/{i}")) for i in range(4)]
+        self.assertEqual(graph.add_paper(_record("arxiv", "Other title", doi="https://doi.org/10.1/2")), nodes[2])
+        for citing, cited in ((3, 0), (3, 1), (1, 2), (0, 2), (0, 2)):
+            graph.add_edge(citing, cited)
+        indptr, indices = graph.csr()
+        self.assertEqual(graph.edge_count, 4)
+        self.assertEqual(sorted(indices[indptr[3]:indptr[4]]), [0, 1])
+        self.assertAlmostEqual(graph.pagerank().sum(), 1.0)
+        self.assertEqual(graph.cocitation([0]).tolist(), [1, 1, 0, 0])
+        self.assertEqual(graph.coupling([0]).tolist(), [1, 1, 0, 0])
+
+    def test_harvest_expands_seeds_and_ranks_shared_neighbours(self):
+        def paper(key):
+            return {"paperId": key, "title": f"Paper called {key}", "externalIds": {"DOI": f"10.1/{key}"}}
+
+        refs = {"DOI:10.1/a": ["c", "d"], "DOI:10.1/b": ["c", "f"], "c": ["g"], "d": [], "f": [], "e": []}
+        cites = {"DOI:10.1/a": ["e"], "DOI:10.1/b": []}
+        seen = []
+
+        def handler(request):
+            _, _, rest = request.url.path.partition("/paper/")
+            paper_id, _, edge = rest.rpartition("/")
+            seen.append((paper_id, edge))
+            if edge == "references":
+                data = [{"citedPaper": paper(k)} for k in refs.get(paper_id, [])]
+            else:
+                data = [{"citingPaper": paper(k)} for k in cites.get(paper_id, [])]
+            return httpx.Response(200, json={"data": data})
+
+        seeds = [_record("library", "Seed paper a", doi="10.1/a"), _record("library", "Seed paper b", doi="10.1/b")]
+        cache = SearchCache(backend=MemoryCacheBackend())
+
+        async def go(**kwargs):
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await harvest_citation_graph(client, seeds, provider="semanticscholar", cache=cache, **kwargs)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            graph = asyncio.run(go(direction="references", depth=1))
+            self.assertEqual(len(graph), 5)
+            self.assertEqual(seen, [("DOI:10.1/a", "references"), ("DOI:10.1/b", "references")])
+            best = rank_candidates(graph, top_k=3)
+            self.assertEqual(best[0].record.title, "Paper called c")
+            self.assertEqual(best[0].cocitations, 0)
+
+            seen.clear()
+            deeper = asyncio.run(go(direction="both", depth=2, max_papers=6))
+        # Seed references came from the cache; the bound stops "g" (the 7th paper) being added.
+        self.assertNotIn(("DOI:10.1/a", "references"), seen)
+        self.assertIn(("DOI:10.1/a", "citations"), seen)
+        self.assertEqual(len(deeper), 6)
+        self.assertIsNone(deeper.find(_record("x", "y", doi="10.1/g")))
+        self.assertEqual(deeper.depth[deeper.find(_record("x", "y", doi="10.1/e"))], 1)
+
+    def test_harvest_stops_at_its_request_time_and_frontier_budgets(self):
+        def paper(key):
+            return {"paperId": key, "title": f"Paper called {key}", "externalIds": {"DOI": f"10.1/{key}"}}
+
+        refs = {"DOI:10.1/a": ["c", "d"], "DOI:10.1/b": ["c"], "c": ["g"], "d": ["h"]}
+        seen = []
+
+        async def handler(request):
+            _, _, rest = request.url.path.partition("/paper/")
+            paper_id, _, edge = rest.rpartition("/")
+            seen.append(paper_id)
+            if paper_id == "d":
+                await asyncio.sleep(5)
+            return httpx.Response(200, json={"data": [{"citedPaper": paper(k)} for k in refs.get(paper_id, [])]})
+
+        seeds = [_record("library", "Seed paper a", doi="10.1/a"), _record("library", "Seed paper b", doi="10.1/b")]
+
+        async def go(**kwargs):
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await harvest_citation_graph(client, seeds, provider="semanticscholar", direction="references", **kwargs)
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            graph = asyncio.run(go(max_requests=1))
+            self.assertEqual((seen, graph.requests, graph.truncated, len(graph)), (["DOI:10.1/a"], 1, "request budget", 4))
+
+            # "c" is cited by both seeds, so it is the one paper expanded at the next level.
+            seen.clear()
+            graph = asyncio.run(go(depth=2, max_frontier=1))
+            self.assertEqual((seen[2:], graph.truncated, len(graph)), (["c"], "frontier cap", 5))
+
+            seen.clear()
+            started = time.monotonic()
+            graph = asyncio.run(go(depth=2, time_budget=0.5))
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(graph.truncated, "time budget")
+        self.assertIsNotNone(graph.find(_record("x", "y", doi="10.1/g")))  # what finished in time is kept
+        self.assertEqual(graph.errors, {})
+
+    def test_openalex_harvest_resolves_seeds_in_one_batch(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.params["filter"])
+            if request.url.params["filter"].startswith("doi:"):
+                works = [
+                    {"id": f"https://openalex.org/W{n}", "doi": f"https://doi.org/10.1/{k}", "ids": {"doi": f"https://doi.org/10.1/{k}"}, "title": f"Work {k}"}
+                    for n, k in ((2, "b"), (1, "a"))
+                ]
+                return httpx.Response(200, json={"results": works})
+            return httpx.Response(200, json={"results": []})
+
+        seeds = [_record("library", "Seed paper a", doi="10.1/a"), _record("library", "Seed paper b", doi="10.1/B")]
+
+        async def go():
+            client = HttpClient(transport=httpx.MockTransport(handler))
+            try:
+                return await harvest_citation_graph(client, seeds, provider="openalex", direction="references")
+            finally:
+                await client.aclose()
+
+        with patch.dict("main.research_services.ratelimit.RATE_POLICIES", {}, clear=True):
+            graph = asyncio.run(go())
+        self.assertEqual(requests[0], "doi:10.1/a|10.1/b")
+        self.assertEqual(sorted(requests[1:]), ["cited_by:W1", "cited_by:W2"])
+        self.assertEqual(graph.requests, 3)
+
+
+def _text_pdf(*pages: str) -> bytes:
+    """Build a minimal PDF whose pages contain the given text (Helvetica)."""
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class PdfHarvestTests(TestCase):
+    def test_harvest_downloads_dedupes_and_fills_full_text(self):
+        pdf = _text_pdf("Harvested page one", "Harvested page two")
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            if request.url.path.endswith("landing"):
+                return httpx.Response(200, text="<html>not a pdf</html>")
+            return httpx.Response(200, content=pdf)
+
+        a = Literature.objects.create(title="A", open_access_pdf_url="https://pdf.test/a.pdf")
+        b = Literature.objects.create(title="B", open_access_pdf_url="https://mirror.test/b.pdf")
+        c = Literature.objects.create(title="C", open_access_pdf_url="https://pdf.test/landing")
+        created_at, c_updated_at = a.updated_at, c.updated_at
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PdfStore(tmp)
+            report = harvest_literature(client=HttpClient(transport=httpx.MockTransport(handler)), store=store, workers=0)
+            a.refresh_from_db()
+            b.refresh_from_db()
+            c.refresh_from_db()
+            self.assertEqual(a.pdf_sha256, b.pdf_sha256)
+            self.assertTrue(store.has(a.pdf_sha256))
+            stored = [f for _, _, files in os.walk(tmp) for f in files]
+            self.assertEqual(len(stored), 1)
+
+        self.assertIn("Harvested page one", a.full_text)
+        self.assertIn("Harvested page two", b.full_text)
+        self.assertGreater(a.updated_at, created_at)
+        self.assertEqual(c.full_text, "")
+        self.assertEqual(c.updated_at, c_updated_at)  # failed rows are not rewritten
+        self.assertEqual((report.candidates, report.downloaded, report.extracted, report.failed), (3, 2, 2, 1))
+
+    def test_internal_addresses_are_never_fetched(self):
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.host)
+            if request.url.host == "pdf.test":
+                return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data"})
+            return httpx.Response(200, content=_text_pdf("secret"))
+
+        Literature.objects.create(title="Loopback", open_access_pdf_url="http://127.0.0.1:8000/admin.pdf")
+        Literature.objects.create(title="Private", open_access_pdf_url="http://[::ffff:10.0.0.5]/a.pdf")
+        Literature.objects.create(title="Redirected", open_access_pdf_url="https://pdf.test/a.pdf")
+        with tempfile.TemporaryDirectory() as tmp:
+            report = harvest_literature(client=HttpClient(transport=httpx.MockTransport(handler)), store=PdfStore(tmp), workers=0)
+        self.assertEqual(requested, ["pdf.test"])
+        self.assertEqual((report.downloaded, report.failed), (0, 3))
+        self.assertFalse(Literature.objects.exclude(full_text="").exists())
+
+    def test_on_link_harvest_extracts_in_process(self):
+        class InlineThread:
+            def __init__(self, target, **kwargs):
+                self.target = target
+
+            def start(self):
+                self.target()
+
+        with patch("main.utils.pdf_harvest.harvest_literature") as harvest, \
+                patch("main.utils.pdf_harvest.threading.Thread", InlineThread):
+            harvest_in_background([7])
+        harvest.assert_called_once_with([7], workers=0)
+
+    def test_page_ranges_are_extracted_in_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sha = PdfStore(tmp).put_bytes(_text_pdf("first", "second", "third"))
+            path = PdfStore(tmp).path_for(sha)
+            text = extract_texts([path], max_workers=2, pages_per_task=1)[path]
+        self.assertLess(text.index("first"), text.index("second"))
+        self.assertLess(text.index("second"), text.index("third"))
@@ -9,7 +9,10 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('signup/', views.signup, name='signup'),
     path('literature/search/', views.literature_search, name='literature_search'),
+    path('literature/search/stream/', views.literature_search_stream, name='literature_search_stream'),
     path('literature/link/<int:project_pk>/', views.literature_link_to_project, name='literature_link_to_project'),
+    path('library/search/', views.library_search, name='library_search'),
+    path('metrics/', views.research_metrics, name='research_metrics'),
     path('experiments/', views.experiments_list, name='experiments_list'),
     path('experiments/new/', views.experiments_create, name='experiments_create'),
     path('experiments/<int:pk>/', views.experiments_detail, name='experiments_detail'),
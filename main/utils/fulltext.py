@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.db import connection as default_connection
+
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_TABLE = "main_fulltext"
+# Keeps one huge book from dominating index size (and stays under PostgreSQL's 1MB tsvector limit).
+MAX_BODY_CHARS = 200_000
+BATCH_SIZE = 500
+# Kind is folded into the row id (pk * KIND_SLOTS + code) so updates and deletes are primary-key lookups.
+KIND_SLOTS = 4
+KINDS: Dict[str, int] = {"literature": 1, "note": 2, "paper": 3}
+_KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+# Snippet highlight markers; views escape the text and turn these into <mark> tags.
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class FullTextHit:
+    kind: str
+    id: int
+    score: float
+    snippet: str = ""
+
+
+def _rowid(kind: str, pk: int) -> int:
+    return int(pk) * KIND_SLOTS + KINDS[kind]
+
+
+def _split_rowid(rowid: int):
+    return _KIND_NAMES.get(rowid % KIND_SLOTS), rowid // KIND_SLOTS
+
+
+def document_for(kind: str, obj) -> Dict[str, str]:
+    """title / meta / body text indexed for a Literature, Note or Paper (historical models work too)."""
+
+    if kind == "literature":
+        meta = " ".join(p for p in (obj.authors, obj.journal_or_publisher, obj.doi, obj.arxiv_id, obj.tags) if p)
+        body = "\n\n".join(p for p in (obj.abstract, obj.full_text) if p)
+    elif kind == "note":
+        meta, body = "", obj.body or ""
+    else:
+        meta, body = "", "\n\n".join(p for p in (obj.abstract, obj.content_raw) if p)
+    return {"title": obj.title or "", "meta": meta, "body": body[:MAX_BODY_CHARS]}
+
+
+class SqliteFullText:
+    """FTS5 table (porter stemming); ranked with bm25 weighted title > meta > body."""
+
+    vendor = "sqlite"
+
+    def create(self, cursor) -> None:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FULLTEXT_TABLE} USING fts5("
+            "title, meta, body, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor) -> None:
+        cursor.execute(f"DROP TABLE IF EXISTS {FULLTEXT_TABLE}")
+
+    def upsert(self, cursor, rows: Sequence[tuple]) -> None:
+        cursor.executemany(f"DELETE FROM {FULLTEXT_TABLE} WHERE rowid = %s", [(r[0],) for r in rows])
+        cursor.executemany(f"INSERT INTO {FULLTEXT_TABLE} (rowid, title, meta, body) VALUES (%s, %s, %s, %s)", rows)
+
+    def delete(self, cursor, rowids: Sequence[int]) -> None:
+        cursor.executemany(f"DELETE FROM {FULLTEXT_TABLE} WHERE rowid = %s", [(r,) for r in rowids])
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        # Quote every word so user input is never parsed as FTS5 syntax. No prefix matching: a
+        # short prefix expands to hundreds of terms and turns a 5ms query into a 500ms one.
+        return " ".join(f'"{w}"' for w in _WORD.findall(query))
+
+    def search(self, cursor, query: str, codes: Optional[Sequence[int]], limit: int, snippets: bool) -> List[tuple]:
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        snippet = f"snippet({FULLTEXT_TABLE}, 2, '{MARK_START}', '{MARK_END}', '…', 24)" if snippets else "''"
+        kind_filter = ""
+        params: List = [expression]
+        if codes:
+            kind_filter = f" AND rowid %% {KIND_SLOTS} IN ({', '.join('%s' for _ in codes)})"
+            params.extend(codes)
+        params.append(limit)
+        cursor.execute(
+            f"SELECT rowid, -bm25({FULLTEXT_TABLE}, 10.0, 4.0, 1.0) AS score, {snippet} FROM {FULLTEXT_TABLE} "
+            f"WHERE {FULLTEXT_TABLE} MATCH %s{kind_filter} ORDER BY bm25({FULLTEXT_TABLE}, 10.0, 4.0, 1.0) LIMIT %s",
+            params,
+        )
+        return cursor.fetchall()
+
+
+class PostgresFullText:
+    """Plain table with a generated, weighted tsvector column and a GIN index."""
+
+    vendor = "postgresql"
+
+    def create(self, cursor) -> None:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {FULLTEXT_TABLE} ("
+            "id bigint PRIMARY KEY, title text NOT NULL, meta text NOT NULL, body text NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', meta), 'B') || "
+            "setweight(to_tsvector('english', body), 'C')) STORED)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {FULLTEXT_TABLE}_document ON {FULLTEXT_TABLE} USING GIN (document)")
+
+    def drop(self, cursor) -> None:
+        cursor.execute(f"DROP TABLE IF EXISTS {FULLTEXT_TABLE}")
+
+    def upsert(self, cursor, rows: Sequence[tuple]) -> None:
+        cursor.executemany(
+            f"INSERT INTO {FULLTEXT_TABLE} (id, title, meta, body) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, meta = EXCLUDED.meta, body = EXCLUDED.body",
+            rows,
+        )
+
+    def delete(self, cursor, rowids: Sequence[int]) -> None:
+        cursor.execute(f"DELETE FROM {FULLTEXT_TABLE} WHERE id = ANY(%s)", [list(rowids)])
+
+    def search(self, cursor, query: str, codes: Optional[Sequence[int]], limit: int, snippets: bool) -> List[tuple]:
+        if not _WORD.search(query):
+            return []
+        kind_filter = f" AND id %% {KIND_SLOTS} = ANY(%s)" if codes else ""
+        params: List = [query] + ([list(codes)] if codes else []) + [limit]
+        # Headlines are computed only for the rows that survive LIMIT.
+        snippet = (
+            f"ts_headline('english', left(body, 20000), q, 'StartSel={MARK_START}, StopSel={MARK_END}, MaxFragments=1, MaxWords=30')"
+            if snippets else "''"
+        )
+        cursor.execute(
+            f"SELECT id, score, {snippet} FROM ("
+            f"SELECT id, body, q, ts_rank_cd(document, q) AS score FROM {FULLTEXT_TABLE}, websearch_to_tsquery('english', %s) q "
+            f"WHERE document @@ q{kind_filter} ORDER BY score DESC LIMIT %s) ranked ORDER BY score DESC",
+            params,
+        )
+        return cursor.fetchall()
+
+
+_BACKENDS = {"sqlite": SqliteFullText(), "postgresql": PostgresFullText()}
+
+
+def fulltext_backend(connection=None):
+    """The backend for the connection's database, or None when it has no full-text support here."""
+
+    return _BACKENDS.get((connection or default_connection).vendor)
+
+
+def index_objects(kind: str, objects: Iterable, connection=None) -> int:
+    backend = fulltext_backend(connection)
+    if backend is None:
+        return 0
+    rows = []
+    for obj in objects:
+        doc = document_for(kind, obj)
+        rows.append((_rowid(kind, obj.pk), doc["title"], doc["meta"], doc["body"]))
+    if rows:
+        with (connection or default_connection).cursor() as cursor:
+            backend.upsert(cursor, rows)
+    return len(rows)
+
+
+def remove_objects(kind: str, ids: Iterable[int], connection=None) -> None:
+    backend = fulltext_backend(connection)
+    rowids = [_rowid(kind, pk) for pk in ids]
+    if backend is not None and rowids:
+        with (connection or default_connection).cursor() as cursor:
+            backend.delete(cursor, rowids)
+
+
+def search_fulltext(query: str, kinds: Optional[Iterable[str]] = None, limit: int = 50, snippets: bool = True) -> List[FullTextHit]:
+    """Best matches for `query` across the indexed kinds, highest score first."""
+
+    backend = fulltext_backend()
+    if backend is None or not query.strip():
+        return []
+    codes = [KINDS[k] for k in kinds if k in KINDS] if kinds is not None else None
+    with default_connection.cursor() as cursor:
+        rows = backend.search(cursor, query, codes, limit, snippets)
+    hits = []
+    for rowid, score, snippet in rows:
+        kind, pk = _split_rowid(int(rowid))
+        if kind:
+            hits.append(FullTextHit(kind=kind, id=pk, score=float(score), snippet=snippet or ""))
+    return hits
+
+
+def matching_ids(kind: str, query: str, limit: int = 1000) -> Optional[List[int]]:
+    """Primary keys of `kind` matching `query`, best first; None when full-text search is unavailable."""
+
+    if fulltext_backend() is None:
+        return None
+    return [hit.id for hit in search_fulltext(query, kinds=[kind], limit=limit, snippets=False)]
+
+
+def rebuild_fulltext_index(apps=None, connection=None) -> int:
+    """Recreate the table and index every Literature, Note and Paper (see the rebuild_fulltext_index command)."""
+
+    connection = connection or default_connection
+    backend = fulltext_backend(connection)
+    if backend is None:
+        return 0
+    if apps is None:
+        from django.apps import apps
+    models = {
+        "literature": apps.get_model("main", "Literature"),
+        "note": apps.get_model("main", "Note"),
+        "paper": apps.get_model("main", "Paper"),
+    }
+    with connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+    total = 0
+    for kind, model in models.items():
+        batch = []
+        for obj in model.objects.using(connection.alias).order_by("pk").iterator(chunk_size=BATCH_SIZE):
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                total += index_objects(kind, batch, connection)
+                batch = []
+        total += index_objects(kind, batch, connection)
+    return total
+
+
+@dataclass
+class LibraryResult:
+    kind: str
+    id: int
+    title: str
+    score: float
+    snippet: str
+    year: Optional[int] = None
+    url: str = ""
+    project_id: Optional[int] = None
+
+
+def search_library(
+    query: str,
+    kinds: Optional[Iterable[str]] = None,
+    project_ids: Optional[Iterable[int]] = None,
+    limit: int = 20,
+) -> List[LibraryResult]:
+    """Full-text search over the library, loading the matching rows.
+
+    Literature is shared, so it is always visible; notes and papers are limited to
+    `project_ids` when given.
+    """
+
+    from ..models import Literature, Note, Paper
+
+    allowed = set(project_ids) if project_ids is not None else None
+    # Over-fetch when rows from other projects will be dropped.
+    hits = search_fulltext(query, kinds=kinds, limit=limit * 3 if allowed is not None else limit)
+    ids: Dict[str, List[int]] = {}
+    for hit in hits:
+        ids.setdefault(hit.kind, []).append(hit.id)
+    rows = {
+        "literature": Literature.objects.only("id", "title", "year", "url").in_bulk(ids.get("literature", [])),
+        "note": Note.objects.only("id", "title", "project_id").in_bulk(ids.get("note", [])),
+        "paper": Paper.objects.only("id", "title", "project_id").in_bulk(ids.get("paper", [])),
+    }
+    results: List[LibraryResult] = []
+    for hit in hits:
+        obj = rows[hit.kind].get(hit.id)
+        if obj is None:
+            continue
+        project_id = getattr(obj, "project_id", None)
+        if hit.kind != "literature" and allowed is not None and project_id not in allowed:
+            continue
+        results.append(LibraryResult(
+            kind=hit.kind,
+            id=hit.id,
+            title=obj.title,
+            score=hit.score,
+            snippet=hit.snippet,
+            year=getattr(obj, "year", None),
+            url=getattr(obj, "url", "") or "",
+            project_id=project_id,
+        ))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def snippet_html(snippet: str) -> str:
+    """Escape a snippet and turn the highlight markers into <mark> tags."""
+
+    from django.utils.html import escape
+    from django.utils.safestring import mark_safe
+
+    return mark_safe(escape(snippet).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+def plain_snippet(snippet: str) -> str:
+    return snippet.replace(MARK_START, "").replace(MARK_END, "")
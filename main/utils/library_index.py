@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+
+from ..models import Literature, Note
+from ..research_services.filters import SearchFilters
+from ..research_services.types import Author, PaperRecord
+from ..research_services.vectors import DEFAULT_VECTOR_INDEX_PATH, IVF_MIN_ROWS, VectorIndex
+
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_INDEX_ON_SAVE = os.getenv("LIBRARY_INDEX_ON_SAVE", "true").lower() == "true"
+# Share of the query's terms (weighted words and word pairs) a library paper's title, abstract
+# and tags must contain before search_all reports it as a local hit. Measured from the query's
+# side: against a full abstract even an exact title query has a cosine below 0.2, while
+# unrelated papers cover well under half of a query's terms.
+LIBRARY_MIN_COVERAGE = float(os.getenv("LIBRARY_MIN_COVERAGE", "0.5"))
+# Vector candidates checked per requested hit.
+LIBRARY_CANDIDATES_PER_HIT = 4
+EMBED_BATCH = 256
+
+LITERATURE = "literature"
+NOTE = "note"
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_library_index() -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(DEFAULT_VECTOR_INDEX_PATH)
+        return _index
+
+
+def set_library_index(index: Optional[VectorIndex]) -> None:
+    """Swap the process-wide index (tests point it at a temporary directory)."""
+
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def literature_document(lit: Literature) -> str:
+    return "\n".join(part for part in (lit.title, lit.abstract, lit.tags) if part)
+
+
+def note_document(note: Note) -> str:
+    return "\n".join(part for part in (note.title, note.body) if part)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def index_objects(kind: str, objects: Iterable, index: Optional[VectorIndex] = None, force: bool = False) -> int:
+    """Embed and append objects whose indexed text changed; returns how many were written."""
+
+    index = index or get_library_index()
+    render = literature_document if kind == LITERATURE else note_document
+    keys: List[str] = []
+    texts: List[str] = []
+    digests: List[str] = []
+    written = 0
+    for obj in objects:
+        key = f"{kind}:{obj.pk}"
+        text = render(obj)
+        digest = _digest(text)
+        if not force and index.digest(key) == digest:
+            continue
+        keys.append(key)
+        texts.append(text)
+        digests.append(digest)
+        if len(keys) >= EMBED_BATCH:
+            index.add_texts(keys, texts, digests)
+            written += len(keys)
+            keys, texts, digests = [], [], []
+    if keys:
+        index.add_texts(keys, texts, digests)
+        written += len(keys)
+    return written
+
+
+def remove_objects(kind: str, ids: Iterable[int], index: Optional[VectorIndex] = None) -> None:
+    (index or get_library_index()).remove(f"{kind}:{pk}" for pk in ids)
+
+
+def rebuild_library_index(ivf_lists: Optional[int] = None, index: Optional[VectorIndex] = None) -> int:
+    """Re-embed every Literature entry and Note from scratch; builds IVF lists for large libraries."""
+
+    index = index or get_library_index()
+    index.clear()
+    total = index_objects(LITERATURE, Literature.objects.only("id", "title", "abstract", "tags").iterator(), index, force=True)
+    total += index_objects(NOTE, Note.objects.only("id", "title", "body").iterator(), index, force=True)
+    if ivf_lists or total >= IVF_MIN_ROWS:
+        index.build_ivf(ivf_lists)
+    return total
+
+
+@dataclass
+class SimilarItem:
+    kind: str
+    id: int
+    score: float
+
+
+def find_similar(
+    text: str,
+    k: int = 10,
+    kinds: Iterable[str] = (LITERATURE, NOTE),
+    project_id: Optional[int] = None,
+    exclude: Iterable[str] = (),
+) -> List[SimilarItem]:
+    """Library entries and notes closest to `text`, best first.
+
+    Notes are restricted to `project_id` when given (literature is shared across projects).
+    """
+
+    exclude = set(exclude)
+    kinds = tuple(kinds)
+    allowed_notes = None
+    if project_id is not None and NOTE in kinds:
+        allowed_notes = set(Note.objects.filter(project_id=project_id).values_list("id", flat=True))
+    # Over-fetch so results dropped by the project/exclude filters do not leave the list short.
+    fetch = k + len(exclude) + (k * 3 if allowed_notes is not None else 0)
+    items: List[SimilarItem] = []
+    for key, score in get_library_index().search_text(text, k=fetch, kinds=kinds):
+        if key in exclude:
+            continue
+        kind, _, pk = key.partition(":")
+        if kind == NOTE and allowed_notes is not None and int(pk) not in allowed_notes:
+            continue
+        items.append(SimilarItem(kind=kind, id=int(pk), score=score))
+        if len(items) >= k:
+            break
+    return items
+
+
+def literature_record(lit: Literature) -> PaperRecord:
+    return PaperRecord(
+        source="library",
+        source_id=str(lit.pk),
+        title=lit.title,
+        abstract=lit.abstract,
+        authors=[Author(name=name.strip()) for name in lit.authors.split(",") if name.strip()],
+        year=lit.year,
+        published_date=lit.published_date.isoformat() if lit.published_date else None,
+        venue=lit.journal_or_publisher or None,
+        doi=lit.doi or None,
+        arxiv_id=lit.arxiv_id or None,
+        url=lit.url or None,
+        open_access_pdf_url=lit.open_access_pdf_url or None,
+    )
+
+
+def query_coverage(query_features: Counter, document_features: Counter) -> float:
+    """Fraction of the query's feature weight that also occurs in the document."""
+
+    total = sum(query_features.values())
+    if not total:
+        return 0.0
+    return sum(weight for feat, weight in query_features.items() if feat in document_features) / total
+
+
+def library_search(query: str, limit: int, filters: Optional[SearchFilters] = None) -> List[PaperRecord]:
+    """search_all pre-stage: library papers close to `query` that cover LIBRARY_MIN_COVERAGE of its terms.
+
+    The open_access filter is not applied: a paper already in the library needs no open link.
+    """
+
+    embedder = get_library_index().embedder
+    if filters is not None:
+        filters = filters.with_options(open_access=False)
+    hits = find_similar(query, k=limit * LIBRARY_CANDIDATES_PER_HIT, kinds=(LITERATURE,))
+    by_id = Literature.objects.in_bulk([h.id for h in hits if h.score > 0])
+    query_features = embedder.features(query)
+    records: List[PaperRecord] = []
+    for h in hits:
+        lit = by_id.get(h.id)
+        if lit is None or query_coverage(query_features, embedder.features(literature_document(lit))) < LIBRARY_MIN_COVERAGE:
+            continue
+        record = literature_record(lit)
+        if filters is None or filters.matches(record):
+            records.append(record)
+            if len(records) >= limit:
+                break
+    return records
+
+
+library_search_async = sync_to_async(library_search)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from ..models import Literature, LiteraturePassage
+from ..research_services.tokens import tokenize
+
+
+PASSAGE_CHARS = 1200
+PASSAGE_OVERLAP = 200
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_CACHE_SIZE = 64
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, size: int = PASSAGE_CHARS, overlap: int = PASSAGE_OVERLAP) -> List[Tuple[int, int]]:
+    """Cut text into (start, end) spans of about `size` chars, preferring paragraph/sentence breaks.
+
+    Consecutive spans overlap by up to `overlap` chars so a sentence on a boundary is whole in
+    at least one passage.
+    """
+
+    spans: List[Tuple[int, int]] = []
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(length, start + size)
+        if end < length:
+            window = text[start + size // 2:end]
+            for sep in ("\n\n", "\n", ". "):
+                cut = window.rfind(sep)
+                if cut != -1:
+                    end = start + size // 2 + cut + len(sep)
+                    break
+        if text[start:end].strip():
+            spans.append((start, end))
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+    return spans
+
+
+def rebuild_passages(literature: Literature) -> int:
+    """Re-chunk one Literature item if its full_text changed since the last build."""
+
+    text = literature.full_text or ""
+    digest = text_hash(text)
+    current = LiteraturePassage.objects.filter(literature=literature).values_list("source_hash", flat=True).first()
+    if text and current == digest:
+        return 0
+    passages = []
+    for ordinal, (start, end) in enumerate(chunk_text(text)):
+        tokens = tokenize(text[start:end])
+        passages.append(
+            LiteraturePassage(
+                literature=literature,
+                ordinal=ordinal,
+                char_start=start,
+                char_end=end,
+                text=text[start:end],
+                length=len(tokens),
+                terms=dict(Counter(tokens)),
+                source_hash=digest,
+            )
+        )
+    with transaction.atomic():
+        LiteraturePassage.objects.filter(literature=literature).delete()
+        LiteraturePassage.objects.bulk_create(passages, batch_size=500)
+    return len(passages)
+
+
+def refresh_passages(literature_ids: Iterable[int]) -> int:
+    """Rebuild passages for the given documents whose full_text has none yet or changed since.
+
+    post_save keeps passages current, but rows written with .update() or before passages existed
+    have none; searches call this first so such documents are still found. Returns the number
+    of passages built.
+    """
+
+    ids = set(literature_ids)
+    built = dict(LiteraturePassage.objects.filter(literature_id__in=ids, ordinal=0).values_list("literature_id", "source_hash"))
+    count = 0
+    for lit in Literature.objects.filter(pk__in=ids).only("id", "full_text"):
+        text = lit.full_text or ""
+        if (text and built.get(lit.pk) != text_hash(text)) or (not text and lit.pk in built):
+            count += rebuild_passages(lit)
+    return count
+
+
+@dataclass
+class PassageHit:
+    passage_id: int
+    literature_id: int
+    ordinal: int
+    char_start: int
+    char_end: int
+    text: str
+    score: float
+
+
+class BM25Index:
+    """In-memory inverted index over a fixed set of passages."""
+
+    def __init__(self, rows: Sequence[Tuple[int, int, int, int, int, str, int, Dict[str, int]]]) -> None:
+        # rows: (id, literature_id, ordinal, char_start, char_end, text, length, terms)
+        self.rows = rows
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        total = 0
+        for i, row in enumerate(rows):
+            total += row[6]
+            for term, tf in row[7].items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.avg_length = total / len(rows) if rows else 0.0
+
+    def search(self, query: str, limit: int = 10) -> List[PassageHit]:
+        n = len(self.rows)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.rows[i][6] / (self.avg_length or 1))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [PassageHit(*self.rows[i][:6], score=score) for i, score in best]
+
+
+_cache: "OrderedDict[Tuple, BM25Index]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _index_for(literature_ids: Iterable[int]) -> BM25Index:
+    ids = sorted(set(literature_ids))
+    qs = LiteraturePassage.objects.filter(literature_id__in=ids)
+    # Passage ids only grow on rebuild, so (ids, count, max id) identifies the indexed content.
+    stats = qs.aggregate(n=Count("id"), last=Max("id"))
+    key = (tuple(ids), stats["n"], stats["last"])
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+    rows = list(qs.order_by("literature_id", "ordinal").values_list(
+        "id", "literature_id", "ordinal", "char_start", "char_end", "text", "length", "terms"
+    ))
+    index = BM25Index(rows)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def search_passages(literature_ids: Iterable[int], query: str, max_chars: int, limit: int = 50) -> List[PassageHit]:
+    """Best-scoring passages for `query` across the given literature, greedily packed into max_chars.
+
+    Overlapping passages from the same document are skipped so the budget is not spent twice.
+    """
+
+    picked: List[PassageHit] = []
+    used = 0
+    for hit in _index_for(literature_ids).search(query, limit=limit):
+        if any(p.literature_id == hit.literature_id and p.char_start < hit.char_end and hit.char_start < p.char_end for p in picked):
+            continue
+        if used + len(hit.text) > max_chars:
+            if not picked:
+                picked.append(PassageHit(**{**hit.__dict__, "text": hit.text[:max_chars]}))
+                break
+            continue
+        picked.append(hit)
+        used += len(hit.text)
+    return picked
+
+
+def project_literature_ids(project_id: int) -> List[int]:
+    return list(
+        Literature.objects.filter(citations__paper__project_id=project_id).values_list("id", flat=True).distinct()
+    )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..models import Literature
+from ..research_services import HttpClient, get_shared_client, run_in_background
+from ..research_services.pdfstore import DEFAULT_DOWNLOAD_CONCURRENCY, PdfStore, download_pdfs
+from ..research_services.pdftext import extract_texts
+from . import fulltext
+from .passages import rebuild_passages
+
+
+logger = logging.getLogger(__name__)
+
+HARVEST_ON_LINK = os.getenv("PDF_HARVEST_ON_LINK", "true").lower() == "true"
+BULK_UPDATE_BATCH = 100
+
+
+@dataclass
+class HarvestReport:
+    candidates: int = 0
+    downloaded: int = 0
+    reused: int = 0  # PDFs already in the store (same content reached before)
+    extracted: int = 0
+    failed: int = 0
+
+
+def harvest_queryset(force: bool = False):
+    """Literature rows with an open access PDF URL and (unless force) no full text yet."""
+
+    qs = Literature.objects.exclude(open_access_pdf_url="")
+    if not force:
+        qs = qs.filter(full_text="")
+    return qs
+
+
+def harvest_literature(
+    ids: Optional[Iterable[int]] = None,
+    force: bool = False,
+    max_concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+    workers: Optional[int] = None,
+    store: Optional[PdfStore] = None,
+    client: Optional[HttpClient] = None,
+) -> HarvestReport:
+    """Download open access PDFs for Literature rows, extract their text and save full_text.
+
+    Downloads run concurrently on the research loop into the content-addressed PdfStore,
+    extraction runs on a process pool, and results are written back with bulk_update.
+    """
+
+    store = store or PdfStore()
+    qs = harvest_queryset(force)
+    if ids is not None:
+        qs = qs.filter(pk__in=list(ids))
+    items: List[Literature] = list(qs.only("id", "open_access_pdf_url", "pdf_sha256", "full_text", "updated_at"))
+    report = HarvestReport(candidates=len(items))
+    if not items:
+        return report
+
+    # Skip the network for rows whose PDF content is already stored.
+    pending_urls = [lit.open_access_pdf_url for lit in items if not store.has(lit.pdf_sha256)]
+
+    async def go():
+        return await download_pdfs(client or get_shared_client(), pending_urls, store=store, max_concurrency=max_concurrency)
+
+    hashes = run_in_background(go()) if pending_urls else {}
+    report.downloaded = sum(1 for h in hashes.values() if h)
+
+    before = {lit.pk: (lit.full_text, lit.pdf_sha256) for lit in items}
+    for lit in items:
+        if store.has(lit.pdf_sha256):
+            report.reused += 1
+        elif hashes.get(lit.open_access_pdf_url):
+            lit.pdf_sha256 = hashes[lit.open_access_pdf_url]
+
+    by_sha = {lit.pdf_sha256 for lit in items if lit.pdf_sha256}
+    texts = extract_texts([store.path_for(sha) for sha in by_sha], max_workers=workers)
+
+    changed: List[Literature] = []
+    now = timezone.now()
+    for lit in items:
+        text = texts.get(store.path_for(lit.pdf_sha256), "") if lit.pdf_sha256 else ""
+        if text:
+            lit.full_text = text
+            report.extracted += 1
+        else:
+            report.failed += 1
+        # Rows that failed or came out the same are left alone, so their updated_at (which the
+        # agent response cache keys on) only moves when there is new text.
+        if (lit.full_text, lit.pdf_sha256) != before[lit.pk]:
+            # bulk_update skips auto_now.
+            lit.updated_at = now
+            changed.append(lit)
+    Literature.objects.bulk_update(changed, ["full_text", "pdf_sha256", "updated_at"], batch_size=BULK_UPDATE_BATCH)
+    # bulk_update bypasses post_save, so index the new text here.
+    for lit in changed:
+        if lit.full_text:
+            rebuild_passages(lit)
+    fulltext.index_objects("literature", Literature.objects.filter(pk__in=[lit.pk for lit in changed if lit.full_text]))
+    logger.info(f"harvest_literature: {report}")
+    return report
+
+
+def harvest_in_background(ids: Iterable[int]) -> None:
+    """Fire-and-forget harvest for freshly linked literature (same pattern as automation jobs).
+
+    Text is extracted in-process: a process pool costs more to start than one or two PDFs take
+    to parse. Bulk harvests (harvest_literature_pdfs) keep the pool.
+    """
+
+    ids = list(ids)
+
+    def run():
+        try:
+            harvest_literature(ids, workers=0)
+        except Exception as exc:
+            logger.warning(f"Background PDF harvest failed for {ids}: {exc}")
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name="pdf-harvest", daemon=True).start()
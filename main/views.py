@@ -4,14 +4,18 @@ from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
 from django.shortcuts import redirect
 from django.contrib import messages
-from asgiref.sync import async_to_sync
 from django import forms
 from django.db.models import Q, Count
 from django.utils import timezone
 from .models import Simulation, Project, Paper, Hypothesis, Note, Literature, Citation, LiteratureSourceType, ProjectStatus, AutomationJob, AutomationTask, AutomationJobStatus, AutomationTaskStatus
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+import json
+import os
 import threading
 from .utils.transcriptions import transcribe_file_like
+from .utils.pdf_harvest import HARVEST_ON_LINK, harvest_in_background
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.middleware.csrf import get_token
@@ -130,29 +134,26 @@ def signup(request):
 def literature_search(request):
     """Synchronous wrapper view that runs async provider searches and renders results.
 
-    Query via GET param `q`. Shows grouped results by source.
+    Query via GET param `q`. Shows de-duplicated results merged across sources.
     """
     query = request.GET.get('q', '').strip()
     selected_project_id = request.GET.get('project') or None
     user_projects = Project.objects.filter(owner=request.user).order_by('name')
     results_by_source = None
     error = None
-    if query:
-        from .research_services import HttpClient, search_all
-
-        def _run():
-            async def go():
-                client = HttpClient()
-                try:
-                    mailto = request.GET.get('mailto') or None
-                    return await search_all(client, query=query, limit_per_source=10, mailto=mailto)
-                finally:
-                    await client.aclose()
-
-            return async_to_sync(go)()
+    stream_url = None
+    if query and request.GET.get('stream') == '1':
+        # Results arrive progressively from literature_search_stream; render only the shell here.
+        stream_url = f"{reverse('literature_search_stream')}?{request.GET.urlencode()}"
+    elif query:
+        from .research_services import run_sync, search_all, get_default_cache
 
         try:
-            results_by_source = _run()
+            mailto = request.GET.get('mailto') or None
+            results_by_source = run_sync(
+                search_all, query=query, limit_per_source=10, mailto=mailto, cache=get_default_cache(), merge=True,
+                providers=_search_providers(request),
+            )
         except Exception as exc:
             error = str(exc)
 
@@ -160,12 +161,119 @@ def literature_search(request):
         'query': query,
         'results_by_source': results_by_source,
         'error': error,
+        'stream_url': stream_url,
         'projects': user_projects,
         'selected_project_id': int(selected_project_id) if selected_project_id else None,
     }
     return render(request, 'literature_search.html', context)
 
 
+def _search_providers(request):
+    """Providers named in `?providers=a,b` (unknown names ignored), else the fast interactive set."""
+    from .research_services import FAST_PROVIDERS, provider_names
+
+    registered = set(provider_names())
+    requested = [p for p in request.GET.get('providers', '').split(',') if p in registered]
+    return requested or list(FAST_PROVIDERS)
+
+
+@login_required
+def literature_search_stream(request):
+    """Server-sent events variant of literature_search.
+
+    Emits one `provider` event per provider as soon as it returns, carrying the rendered
+    results section, then a final `done` event. Like the merged page, each work is shown
+    once: a provider's section leaves out results an earlier provider already returned.
+    """
+    query = request.GET.get('q', '').strip()
+    mailto = request.GET.get('mailto') or None
+    providers = _search_providers(request)
+    selected_project_id = request.GET.get('project') or None
+    context = {
+        'query': query,
+        'selected_project_id': int(selected_project_id) if selected_project_id else None,
+    }
+
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def events():
+        if not query:
+            yield sse('done', {})
+            return
+        from .research_services import drop_seen, get_shared_client, run_in_background, search_all_stream, get_default_cache
+
+        # WSGI iterates this generator synchronously, so drive the async stream on the shared research loop.
+        async def open_stream():
+            return search_all_stream(
+                get_shared_client(), query=query, limit_per_source=10, mailto=mailto, cache=get_default_cache(),
+                providers=providers,
+            )
+
+        stream = run_in_background(open_stream())
+        seen = set()
+        try:
+            while True:
+                try:
+                    source, items = run_in_background(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+                items = drop_seen(items, seen)
+                html = render_to_string('literature_search_section.html', {**context, 'source': source, 'items': items}, request=request)
+                yield sse('provider', {'provider': source, 'count': len(items), 'html': html})
+            yield sse('done', {})
+        finally:
+            run_in_background(stream.aclose())
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def research_metrics(request):
+    """Prometheus text-format metrics for the research providers (HTTP and search_all).
+
+    Scrapers authenticate with `Authorization: Bearer $METRICS_TOKEN`; without a token
+    configured, only signed-in staff can read it.
+    """
+    from .research_services import get_registry
+
+    token = os.getenv('METRICS_TOKEN')
+    if token:
+        allowed = request.headers.get('Authorization', '') == f'Bearer {token}'
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(get_registry().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+def library_search(request):
+    """Search the local library (literature, the user's notes and papers) via the full-text index.
+
+    Query via GET param `q`; optional `kind` restricts to literature, note or paper.
+    """
+    from .utils.fulltext import KINDS, search_library, snippet_html
+
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind', '')
+    results = []
+    if query:
+        project_ids = Project.objects.filter(owner=request.user).values_list('pk', flat=True)
+        for item in search_library(query, kinds=[kind] if kind in KINDS else None, project_ids=project_ids, limit=50):
+            item.snippet = snippet_html(item.snippet)
+            results.append(item)
+    context = {
+        'query': query,
+        'kind': kind,
+        'kinds': list(KINDS),
+        'results': results,
+    }
+    return render(request, 'library_search.html', context)
+
+
 @login_required
 def literature_link_to_project(request, project_pk: int):
     """Create or update a Literature entry from posted search result payload and link to the project's paper as a Citation.
@@ -183,6 +291,7 @@ def literature_link_to_project(request, project_pk: int):
         abstract = request.POST.get('abstract') or ''
         authors_list = (request.POST.get('authors') or '').strip()
         venue = (request.POST.get('venue') or '').strip()
+        oa_pdf_url = (request.POST.get('open_access_pdf_url') or '').strip()
 
         # Heuristic: prefer DOI, then arXiv id, else title+url
         lit_q = Literature.objects.all()
@@ -205,7 +314,16 @@ def literature_link_to_project(request, project_pk: int):
                 url=url,
                 source_type=LiteratureSourceType.DOI if doi else (LiteratureSourceType.ARXIV if arxiv_id else LiteratureSourceType.URL),
                 abstract=abstract,
+                open_access_pdf_url=oa_pdf_url,
+                is_open_access=bool(oa_pdf_url),
             )
+        elif oa_pdf_url and not literature.open_access_pdf_url:
+            literature.open_access_pdf_url = oa_pdf_url
+            literature.is_open_access = True
+            literature.save(update_fields=['open_access_pdf_url', 'is_open_access', 'updated_at'])
+
+        if HARVEST_ON_LINK and literature.open_access_pdf_url and not literature.full_text:
+            harvest_in_background([literature.pk])
 
         # Link to paper via Citation (append to end)
         last_order = paper.citations.aggregate_max = paper.citations.order_by('-order').first().order if paper.citations.exists() else 0
@@ -579,7 +697,6 @@ def project_chat(request, pk: int):
 
     history is optional list of {role, content}, newest last. We always pin project_id to pk.
     """
-    import json
     try:
         project = Project.objects.get(pk=pk, owner=request.user)
     except Project.DoesNotExist: